@@ -0,0 +1,228 @@
+"""
+async_sessions.py
+asyncio front end for the Store
+many order sessions share one Store (or the stores of a StoreManager) in a
+single event loop. Sessions collect their lines through an async API
+instead of input(); finalized baskets go through one queue and a single
+finalizer task places them in batches with Store.place_orders, so stock
+updates never interleave.
+"""
+
+# imports
+import asyncio
+from typing import Union
+
+from quote_cache import Quote
+from receipts import Receipt
+from store import Store, StoreManager
+
+DEFAULT_BATCH_SIZE = 256
+
+
+class OrderSession:
+    """
+    one shopper's basket, opened with AsyncStoreFrontend.open_session
+    """
+
+    def __init__(self, front_end, store: Store) -> None:
+        """
+        initialise an empty session
+        :param front_end:
+        :type front_end: AsyncStoreFrontend
+        :param store: the store the basket is placed in
+        :type store: Store
+        """
+        self._front_end = front_end
+        self.store = store
+        self.lines: list[tuple[str, int]] = []
+        self.receipt: Union[None, Receipt] = None
+        self._submitted = False
+
+    @property
+    def is_open(self) -> bool:
+        """
+        check if lines can still be added
+        :return:
+        :rtype:
+        """
+        return not self._submitted
+
+    async def add_line(self, product_name: str, quantity: int) -> Quote:
+        """
+        add a line to the basket, stock is only taken on finalize
+        :param product_name:
+        :type product_name:
+        :param quantity:
+        :type quantity:
+        :return: the quote of the line, (subtotal, total after promotions)
+        :rtype:
+        """
+        if not self.is_open:
+            raise ValueError("Session is already finalized")
+        if not isinstance(quantity, int) or quantity < 1:
+            raise ValueError("Quantity should be a positive integer")
+        product = self.store._index.get(product_name)
+        if product is None:
+            raise ValueError(f"Unknown product {product_name}")
+        self.lines.append((product_name, quantity))
+        return self.store._quote(product, quantity)
+
+    async def finalize(self) -> Receipt:
+        """
+        place the basket and wait for the receipt
+        :return:
+        :rtype:
+        """
+        if not self.is_open:
+            raise ValueError("Session is already finalized")
+        # closed once queued, a front end that is not running leaves the
+        # session open to be finalized again
+        receipt = self._front_end._submit(self)
+        self._submitted = True
+        self.receipt = await receipt
+        return self.receipt
+
+
+class AsyncStoreFrontend:
+    """
+    serves order sessions for a Store or for the stores of a StoreManager
+    use it as an async context manager, the finalizer runs inside it
+    """
+
+    def __init__(
+        self,
+        store: Union[Store, StoreManager],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        """
+        :param store: a store, or a store manager to pick stores from
+        :type store: Store | StoreManager
+        :param batch_size: most baskets placed in one place_orders call
+        :type batch_size: int
+        """
+        if not isinstance(store, (Store, StoreManager)):
+            raise ValueError("Front end needs a Store or a StoreManager")
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("Batch size should be a positive integer")
+        self._store = store
+        self.batch_size = batch_size
+        self._queue: Union[None, asyncio.Queue] = None
+        self._finalizer: Union[None, asyncio.Task] = None
+        # set once stop() queued the end of the baskets
+        self._stopping = False
+        self.placed = 0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.stop()
+
+    async def start(self) -> None:
+        """
+        start the finalizer task
+        :return:
+        :rtype:
+        """
+        if self._finalizer is not None:
+            raise ValueError("Front end is already running")
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        self._finalizer = asyncio.create_task(self._finalize_batches())
+
+    async def stop(self) -> None:
+        """
+        place what is still queued and stop the finalizer
+        :return:
+        :rtype:
+        """
+        if self._finalizer is None or self._stopping:
+            return
+        self._stopping = True
+        await self._queue.put(None)
+        await self._finalizer
+        self._finalizer = None
+
+    def open_session(self, store_name: str = None) -> OrderSession:
+        """
+        open a new order session
+        :param store_name: the store to order from, only for a StoreManager
+        :type store_name: str
+        :return:
+        :rtype:
+        """
+        if isinstance(self._store, StoreManager):
+            store = self._store.stores.get(store_name)
+            if store is None:
+                raise ValueError(f"Store {store_name} does not exist")
+        else:
+            store = self._store
+        return OrderSession(self, store)
+
+    # private methods
+    def _submit(self, session: OrderSession) -> asyncio.Future:
+        """
+        queue a session for the finalizer, baskets queued after stop()
+        would never be placed and are refused
+        :param session:
+        :type session:
+        :return: the future of its receipt
+        :rtype:
+        """
+        if self._finalizer is None or self._stopping:
+            raise ValueError("Front end is not running")
+        receipt = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((session, receipt))
+        return receipt
+
+    async def _finalize_batches(self) -> None:
+        """
+        the only place stock is taken: drain the queue in batches and
+        place them store by store
+        :return:
+        :rtype:
+        """
+        stopping = False
+        while not stopping:
+            batch = []
+            item = await self._queue.get()
+            while True:
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if (
+                    stopping
+                    or len(batch) >= self.batch_size
+                    or self._queue.empty()
+                ):
+                    break
+                item = self._queue.get_nowait()
+            self._place(batch)
+
+    def _place(self, batch: list) -> None:
+        """
+        place a batch of sessions and hand out the receipts
+        :param batch: (session, future) pairs
+        :type batch:
+        :return:
+        :rtype:
+        """
+        by_store: dict[Store, list] = {}
+        for session, receipt in batch:
+            by_store.setdefault(session.store, []).append((session, receipt))
+        for store, entries in by_store.items():
+            try:
+                receipts = store.place_orders(
+                    session.lines for session, _ in entries
+                )
+            except Exception as error:
+                for _, receipt in entries:
+                    if not receipt.done():
+                        receipt.set_exception(error)
+                continue
+            for (_, receipt), placed in zip(entries, receipts):
+                if not receipt.done():
+                    receipt.set_result(placed)
+            self.placed += len(entries)
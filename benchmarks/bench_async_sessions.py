@@ -0,0 +1,70 @@
+"""
+bench_async_sessions.py
+thousands of simultaneous order sessions on one event loop
+run with: python -m benchmarks.bench_async_sessions
+"""
+
+# imports
+import asyncio
+import random
+import time
+
+from async_sessions import AsyncStoreFrontend
+from products import Product
+from store import Store
+
+CATALOG_SIZE = 5_000
+SESSIONS = 20_000
+LINES_PER_SESSION = 4
+
+
+async def shopper(front_end: AsyncStoreFrontend, rng: random.Random):
+    """
+    one simulated shopper, yields to the loop between lines
+    :param front_end:
+    :type front_end:
+    :param rng:
+    :type rng:
+    :return:
+    :rtype:
+    """
+    session = front_end.open_session()
+    for _ in range(LINES_PER_SESSION):
+        await session.add_line(
+            f"Product {rng.randrange(CATALOG_SIZE)}", rng.randint(1, 3)
+        )
+        await asyncio.sleep(0)
+    return await session.finalize()
+
+
+async def run() -> float:
+    """
+    run all sessions concurrently
+    :return: elapsed seconds
+    :rtype:
+    """
+    store = Store(
+        [
+            Product(f"Product {idx}", price=10, quantity=1_000)
+            for idx in range(CATALOG_SIZE)
+        ]
+    )
+    rng = random.Random(5)
+    start = time.perf_counter()
+    async with AsyncStoreFrontend(store) as front_end:
+        await asyncio.gather(
+            *(shopper(front_end, rng) for _ in range(SESSIONS))
+        )
+    elapsed = time.perf_counter() - start
+    assert store.verify_aggregates()
+    return elapsed
+
+
+def main() -> None:
+    elapsed = asyncio.run(run())
+    print(f"{SESSIONS} concurrent sessions in {elapsed:.3f}s")
+    print(f"{SESSIONS / elapsed:,.0f} sessions/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+bench_bulk_products.py
+listing and delisting many products in bulk and one by one
+run with: python -m benchmarks.bench_bulk_products
+"""
+
+# imports
+import random
+import time
+
+from products import Product
+from store import Store
+
+CATALOG_SIZE = 1_000_000
+DELISTED = 100_000
+
+
+def main() -> None:
+    rng = random.Random(42)
+    products = [
+        Product(f"Product {idx}", price=5 + idx % 95, quantity=1 + idx % 50)
+        for idx in range(CATALOG_SIZE)
+    ]
+    delisted = rng.sample(products, DELISTED)
+
+    store = Store()
+    start = time.perf_counter()
+    store.add_products(products)
+    print(f"add_products {CATALOG_SIZE}: {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    store.remove_products(delisted)
+    print(f"remove_products {DELISTED}: {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    store.products
+    print(f"  compaction: {time.perf_counter() - start:.3f}s")
+
+    store = Store()
+    start = time.perf_counter()
+    for product in products:
+        store.add_product(product)
+    print(f"add_product x {CATALOG_SIZE}: {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    for product in delisted:
+        store.remove_product(product)
+    print(f"remove_product x {DELISTED}: {time.perf_counter() - start:.3f}s")
+    assert len(store.products) == CATALOG_SIZE - DELISTED
+    assert store.verify_aggregates()
+
+
+if __name__ == "__main__":
+    main()
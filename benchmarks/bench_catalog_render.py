@@ -0,0 +1,49 @@
+"""
+bench_catalog_render.py
+rendering the full listing and one page of a large catalog, cold (display
+lines not cached yet) and warm
+run with: python -m benchmarks.bench_catalog_render
+"""
+
+# imports
+import time
+
+from products import Product
+from promotions import ThirdOneFree
+from ui_helpers import UIHelpers
+
+CATALOG_SIZE = 100_000
+
+
+def timed(func) -> float:
+    """
+    seconds for one call
+    :param func:
+    :type func:
+    :return:
+    :rtype:
+    """
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    promotion = ThirdOneFree("Third One Free!")
+    products = []
+    for idx in range(CATALOG_SIZE):
+        product = Product(f"Product {idx}", price=1 + idx % 500, quantity=5)
+        if idx % 2:
+            product.add_promotion(promotion)
+        products.append(product)
+    cold = timed(lambda: UIHelpers.render_products(products))
+    warm = timed(lambda: UIHelpers.render_products(products))
+    page = timed(lambda: UIHelpers.render_products_page(products, 2500))
+    print(f"{CATALOG_SIZE} products")
+    print(f"{'full listing (cold)':<24}{cold * 1000:>10.1f} ms")
+    print(f"{'full listing (warm)':<24}{warm * 1000:>10.1f} ms")
+    print(f"{'one page (warm)':<24}{page * 1000:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+bench_cents_pricing.py
+float pricing against the integer cents pricing, for the promotion chain
+alone and for whole baskets through Store.place_orders
+run with: python -m benchmarks.bench_cents_pricing
+"""
+
+# imports
+import random
+import time
+
+from products import Product
+from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from store import Store
+
+PAIRS = 200_000
+CATALOG_SIZE = 10_000
+BASKETS = 20_000
+LINES_PER_BASKET = 5
+
+
+def build_store(size: int) -> Store:
+    """
+    build a store with prices in cents, every third product has a
+    promotion
+    :param size:
+    :type size:
+    :return:
+    :rtype:
+    """
+    promotions = [
+        SecondHalfPrice("Second Half price!"),
+        ThirdOneFree("Third One Free!"),
+        PercentDiscount("30% off!", percent=30),
+    ]
+    store = Store()
+    for idx in range(size):
+        product = Product(
+            f"Product {idx}", price=5 + idx % 9_500 / 100, quantity=10**9
+        )
+        if idx % 3 == 0:
+            product.add_promotion(promotions[idx % 9 // 3])
+        store.add_product(product)
+    return store
+
+
+def bench_chain(rng: random.Random) -> None:
+    """
+    time the promotion chain on floats and on cents
+    :param rng:
+    :type rng:
+    :return:
+    :rtype:
+    """
+    chain = [
+        ThirdOneFree("Third One Free!"),
+        SecondHalfPrice("Second Half price!"),
+        PercentDiscount("30% off!", percent=30),
+    ]
+    quantities = [rng.randint(1, 20) for _ in range(PAIRS)]
+    cents = [rng.randint(100, 100_000) * qty for qty in quantities]
+    totals = [total / 100 for total in cents]
+
+    start = time.perf_counter()
+    for total, qty in zip(totals, quantities):
+        for promotion in chain:
+            total = promotion.apply_promotion(total, qty)
+    floats = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for total, qty in zip(cents, quantities):
+        for promotion in chain:
+            total = promotion.apply_promotion_cents(total, qty)
+    integers = time.perf_counter() - start
+
+    print(f"{PAIRS} pairs, chain of {len(chain)} promotions")
+    print(f"{'float':<10}{floats * 1000:>10.1f} ms")
+    print(f"{'cents':<10}{integers * 1000:>10.1f} ms")
+
+
+def bench_baskets(rng: random.Random) -> None:
+    """
+    time place_orders with both pricings and compare the totals
+    :param rng:
+    :type rng:
+    :return:
+    :rtype:
+    """
+    baskets = [
+        [
+            (f"Product {rng.randrange(CATALOG_SIZE)}", rng.randint(1, 6))
+            for _ in range(LINES_PER_BASKET)
+        ]
+        for _ in range(BASKETS)
+    ]
+    results = {}
+    for cents_pricing in (False, True):
+        store = build_store(CATALOG_SIZE)
+        store.cents_pricing = cents_pricing
+        start = time.perf_counter()
+        receipts = store.place_orders(baskets)
+        elapsed = time.perf_counter() - start
+        results[cents_pricing] = [receipt.total for receipt in receipts]
+        label = "cents" if cents_pricing else "float"
+        print(f"{label:<10}{elapsed * 1000:>10.1f} ms")
+    differ = sum(
+        round(floats, 2) != cents
+        for floats, cents in zip(results[False], results[True])
+    )
+    # exact half cents and the drift of adding up float line totals
+    print(f"{differ} of {BASKETS} basket totals differ by a cent")
+
+
+def main() -> None:
+    rng = random.Random(1)
+    bench_chain(rng)
+    print(f"\n{BASKETS} baskets of {LINES_PER_BASKET} lines")
+    bench_baskets(rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+bench_columnar.py
+full scans over the product objects against the running store aggregates
+and the columnar filters
+run with: python -m benchmarks.bench_columnar
+"""
+
+# imports
+import contextlib
+import io
+import time
+
+from columnar import ColumnarStore
+from products import Product
+from store import Store
+
+CATALOG_SIZE = 1_000_000
+
+
+def timed(func) -> float:
+    """
+    seconds for one call with the store printing suppressed
+    :param func:
+    :type func:
+    :return:
+    :rtype:
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    products = [
+        Product(f"Product {idx}", price=1 + idx % 500, quantity=1 + idx % 50)
+        for idx in range(CATALOG_SIZE)
+    ]
+    plain_store = Store(products)
+    columnar_store = ColumnarStore(products)
+    rows = [
+        ("recount (scan)", plain_store._recount),
+        ("total quantity (aggregate)", plain_store.get_total_quantity),
+        ("inventory value (aggregate)", plain_store.get_inventory_value),
+        (
+            "filter 100-200 (plain)",
+            lambda: [p for p in products if 100 <= p.price <= 200],
+        ),
+        (
+            "filter 100-200 (columnar)",
+            lambda: columnar_store.find_products(100, 200),
+        ),
+    ]
+    print(f"{CATALOG_SIZE} products")
+    for label, func in rows:
+        print(f"{label:<30}{timed(func) * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
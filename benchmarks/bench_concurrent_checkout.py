@@ -0,0 +1,86 @@
+"""
+bench_concurrent_checkout.py
+multi-threaded checkout stress test: orders per second against the number
+of threads, and a check that no stock was oversold
+run with: python -m benchmarks.bench_concurrent_checkout
+"""
+
+# imports
+import random
+import threading
+import time
+
+from products import Product
+from store import Store
+
+CATALOG_SIZE = 1_000
+STOCK_PER_PRODUCT = 500
+ORDERS_PER_THREAD = 20_000
+THREAD_COUNTS = (1, 2, 4, 8)
+
+
+def run(thread_count: int) -> None:
+    """
+    run ORDERS_PER_THREAD baskets on every thread and report
+    :param thread_count:
+    :type thread_count:
+    :return:
+    :rtype:
+    """
+    store = Store(
+        [
+            Product(f"Product {idx}", price=10, quantity=STOCK_PER_PRODUCT)
+            for idx in range(CATALOG_SIZE)
+        ]
+    )
+    sold = [0] * thread_count
+    baskets_per_thread = []
+    for worker_id in range(thread_count):
+        rng = random.Random(worker_id)
+        baskets_per_thread.append(
+            [
+                [
+                    (
+                        f"Product {rng.randrange(CATALOG_SIZE)}",
+                        rng.randint(1, 3),
+                    )
+                ]
+                for _ in range(ORDERS_PER_THREAD)
+            ]
+        )
+
+    def worker(worker_id: int) -> None:
+        baskets = baskets_per_thread[worker_id]
+        for receipt in store.place_orders(baskets):
+            sold[worker_id] += sum(line.quantity for line in receipt.lines)
+
+    threads = [
+        threading.Thread(target=worker, args=(idx,))
+        for idx in range(thread_count)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    remaining = sum(product.product_quantity for product in store.products)
+    assert remaining >= 0
+    assert sum(sold) + remaining == CATALOG_SIZE * STOCK_PER_PRODUCT
+    assert store.verify_aggregates()
+    orders = thread_count * ORDERS_PER_THREAD
+    print(f"{thread_count:>8}{orders:>10}{orders / elapsed:>16,.0f}")
+
+
+def main() -> None:
+    print(f"{'threads':>8}{'orders':>10}{'orders / s':>16}")
+    for thread_count in THREAD_COUNTS:
+        run(thread_count)
+    print("stock never oversold")
+    print("(CPython threads share the GIL, the locks keep the stock right")
+    print(" but pure Python checkout does not scale with thread count)")
+
+
+if __name__ == "__main__":
+    main()
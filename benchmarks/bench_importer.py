@@ -0,0 +1,107 @@
+"""
+bench_importer.py
+rows per second of the streaming feed importer, and its peak memory for
+feeds of growing size (the batches are dropped, nothing is stored)
+run with: python -m benchmarks.bench_importer
+"""
+
+# imports
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from importer import import_batches, read_feed
+
+ROWS = 1_000_000
+MEMORY_ROWS = (50_000, 200_000)
+PROMOTIONS = (
+    "",
+    "second_half_price:Second Half price!",
+    "third_one_free:Third One Free!",
+    "percent:30:30% off!",
+)
+
+
+def row(idx: int) -> dict:
+    """
+    a feed row, every 50th row is broken
+    :param idx:
+    :type idx:
+    :return:
+    :rtype:
+    """
+    return {
+        "name": f"Product {idx}",
+        "price": "abc" if idx % 50 == 0 else 5 + idx % 95,
+        "quantity": 1 + idx % 1000,
+        "kind": "limited" if idx % 10 == 0 else "product",
+        "active": "true",
+        "maximum": "",
+        "promotions": PROMOTIONS[idx % 4],
+    }
+
+
+def write_feeds(directory: str, rows: int) -> list[str]:
+    """
+    write the same feed as CSV and as JSONL
+    :param directory:
+    :type directory:
+    :param rows:
+    :type rows:
+    :return: the paths
+    :rtype:
+    """
+    csv_path = os.path.join(directory, f"feed_{rows}.csv")
+    jsonl_path = os.path.join(directory, f"feed_{rows}.jsonl")
+    with open(csv_path, "w", newline="") as csv_file, open(
+        jsonl_path, "w"
+    ) as jsonl_file:
+        writer = csv.DictWriter(csv_file, fieldnames=list(row(1)))
+        writer.writeheader()
+        for idx in range(rows):
+            feed_row = row(idx)
+            writer.writerow(feed_row)
+            jsonl_file.write(json.dumps(feed_row) + "\n")
+    return [csv_path, jsonl_path]
+
+
+def consume(path: str) -> tuple[int, int]:
+    """
+    import a feed and drop the batches
+    :param path:
+    :type path:
+    :return: imported and rejected rows
+    :rtype:
+    """
+    imported = rejected = 0
+    for batch in import_batches(read_feed(path)):
+        imported += len(batch.products)
+        rejected += len(batch.rejected)
+    return imported, rejected
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for path in write_feeds(directory, ROWS):
+            start = time.perf_counter()
+            imported, rejected = consume(path)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{os.path.basename(path)}: {imported} imported, "
+                f"{rejected} rejected in {elapsed:.3f}s"
+            )
+            print(f"  {ROWS / elapsed:,.0f} rows/s")
+        for rows in MEMORY_ROWS:
+            for path in write_feeds(directory, rows):
+                tracemalloc.start()
+                consume(path)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"{os.path.basename(path)}: peak {peak / 2**20:.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
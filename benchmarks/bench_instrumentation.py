@@ -0,0 +1,50 @@
+"""
+bench_instrumentation.py
+cost of Store._order with the stage timers off, on, and off again
+run with: python -m benchmarks.bench_instrumentation
+"""
+
+# imports
+from contextlib import redirect_stdout
+import io
+import random
+import timeit
+
+import instrumentation
+from benchmarks.suite import BASKET_LINES, CATALOG_SIZE, build_products
+from store import Store
+
+ORDERS = 2_000
+REPEAT = 5
+
+
+def main() -> None:
+    products = build_products(CATALOG_SIZE)
+    store = Store(products)
+    rng = random.Random(1)
+    shopping_list = [
+        (rng.choice(products), rng.randint(1, 6)) for _ in range(BASKET_LINES)
+    ]
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            for _ in range(ORDERS):
+                store._order(shopping_list)
+
+    def best() -> float:
+        return min(timeit.repeat(run, number=1, repeat=REPEAT))
+
+    before = best()
+    instrumentation.enable()
+    enabled = best()
+    instrumentation.disable()
+    after = best()
+    print(f"{ORDERS} orders of {BASKET_LINES} lines")
+    print(f"{'disabled':<16}{before * 1000:>10.1f} ms")
+    print(f"{'enabled':<16}{enabled * 1000:>10.1f} ms")
+    print(f"{'disabled again':<16}{after * 1000:>10.1f} ms")
+    print(instrumentation.dump())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+bench_merge.py
+hash join merge of two stores of 1M products each, half of the names are
+in both stores
+run with: python -m benchmarks.bench_merge
+"""
+
+# imports
+import time
+
+from products import Product
+from promotions import PercentDiscount, SecondHalfPrice
+from store import Store
+
+STORE_SIZE = 1_000_000
+# the second store starts half way through the names of the first one
+OFFSET = STORE_SIZE // 2
+
+
+def build_store(first: int, promotion) -> Store:
+    """
+    a store of STORE_SIZE products, every tenth one with the promotion
+    :param first: number of the first product name
+    :type first:
+    :param promotion:
+    :type promotion:
+    :return:
+    :rtype:
+    """
+    products = []
+    for idx in range(first, first + STORE_SIZE):
+        product = Product(f"Product {idx}", price=5 + idx % 95, quantity=10)
+        if idx % 10 == 0:
+            product.add_promotion(promotion)
+        products.append(product)
+    return Store(products)
+
+
+def main() -> None:
+    store_1 = build_store(0, SecondHalfPrice("Second Half price!"))
+    store_2 = build_store(OFFSET, PercentDiscount("30% off!", percent=30))
+    start = time.perf_counter()
+    concatenated = (store_1 + store_2).materialize()
+    elapsed = time.perf_counter() - start
+    print(f"concatenate: {elapsed:.3f}s")
+    print(f"  {len(concatenated.products)} products")
+    del concatenated
+    for price_policy in ("min", "last"):
+        start = time.perf_counter()
+        merged = store_1.merge(store_2, price_policy=price_policy)
+        elapsed = time.perf_counter() - start
+        print(f"merge ({price_policy}): {elapsed:.3f}s")
+        print(f"  {len(merged.products)} products")
+        print(f"  {2 * STORE_SIZE / elapsed:,.0f} input products/s")
+        del merged
+
+
+if __name__ == "__main__":
+    main()
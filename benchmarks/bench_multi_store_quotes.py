@@ -0,0 +1,54 @@
+"""
+bench_multi_store_quotes.py
+quoting baskets in many stores, in process and in the pricing pool of the
+StoreManager
+run with: python -m benchmarks.bench_multi_store_quotes
+"""
+
+# imports
+import random
+import time
+
+from benchmarks.bench_place_orders import build_store
+from store import StoreManager
+
+STORES = 8
+CATALOG_SIZE = 10_000
+BASKETS = 20_000
+LINES_PER_BASKET = 5
+
+
+def main() -> None:
+    rng = random.Random(42)
+    store_manager = StoreManager()
+    store_manager.stores = {
+        f"Store {idx}": build_store(CATALOG_SIZE) for idx in range(STORES)
+    }
+    jobs = [
+        (
+            f"Store {rng.randrange(STORES)}",
+            [
+                (f"Product {rng.randrange(CATALOG_SIZE)}", rng.randint(1, 6))
+                for _ in range(LINES_PER_BASKET)
+            ],
+        )
+        for _ in range(BASKETS)
+    ]
+    start = time.perf_counter()
+    store_manager.quote_jobs(jobs)
+    elapsed = time.perf_counter() - start
+    print(f"in process: {BASKETS} baskets in {elapsed:.3f}s")
+
+    start = time.perf_counter()
+    store_manager.start_pricing_pool()
+    store_manager.quote_jobs(jobs[:1])
+    print(f"pool warm up: {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    store_manager.quote_jobs(jobs)
+    elapsed = time.perf_counter() - start
+    print(f"pricing pool: {BASKETS} baskets in {elapsed:.3f}s")
+    store_manager.stop_pricing_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+bench_name_search.py
+prefix and typo tolerant name search on a large catalog against a scan of
+the product names
+run with: python -m benchmarks.bench_name_search
+"""
+
+# imports
+import random
+import time
+
+from products import Product
+from store import Store
+
+STORE_SIZE = 1_000_000
+SEARCHES = 1000
+BRANDS = (
+    "Apple Bose Google Samsung Sony Dell Lenovo Asus Acer Logitech Canon "
+    "Nikon Philips Panasonic Microsoft Xiaomi Huawei Garmin Fitbit Razer"
+).split()
+LINES = (
+    "MacBook iPhone iPad Pixel Galaxy Bravia XPS ThinkPad ZenBook Aspire "
+    "QuietComfort Magic Surface Watch Headphones Speaker Monitor Keyboard "
+    "Mouse Camera Tablet Router Charger Cable Printer Drone"
+).split()
+MODELS = "Air Pro Max Mini Ultra Plus Lite SE Neo Edge".split()
+QUERIES = ("mac", "pixel", "think", "quiet com", "galaxy ul", "cam")
+TYPOS = ("macbok", "pixle", "thinkapd", "qietcomfort", "galxy", "headphnes")
+
+
+def main() -> None:
+    rng = random.Random(42)
+    store = Store(
+        [
+            Product(
+                f"{rng.choice(BRANDS)} {rng.choice(LINES)} "
+                f"{rng.choice(MODELS)} {idx:07d}",
+                price=10,
+                quantity=5,
+            )
+            for idx in range(STORE_SIZE)
+        ]
+    )
+    start = time.perf_counter()
+    store.search_products("mac")
+    print(
+        f"build index ({STORE_SIZE} names): {time.perf_counter() - start:.3f}s"
+    )
+
+    for label, queries, fuzzy in (
+        ("prefix", QUERIES, False),
+        ("fuzzy", TYPOS, True),
+    ):
+        start = time.perf_counter()
+        for idx in range(SEARCHES):
+            store.search_products(queries[idx % len(queries)], fuzzy=fuzzy)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{SEARCHES} {label} searches: {elapsed:.3f}s "
+            f"({elapsed / SEARCHES * 1000:.3f}ms each)"
+        )
+
+    scans = 10
+    start = time.perf_counter()
+    for idx in range(scans):
+        query = QUERIES[idx % len(QUERIES)]
+        [
+            product
+            for product in store.products
+            if query in product.name.casefold()
+        ][:10]
+    elapsed = time.perf_counter() - start
+    print(f"{scans} scans of the names: {elapsed:.3f}s")
+
+    products = [
+        Product(f"Fresh Product {idx}", price=10, quantity=5)
+        for idx in range(10_000)
+    ]
+    start = time.perf_counter()
+    store.add_products(products)
+    store.remove_products(products)
+    elapsed = time.perf_counter() - start
+    print(f"add + remove {len(products)} products: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+bench_place_orders.py
+throughput of Store.place_orders replaying non-interactive baskets
+run with: python -m benchmarks.bench_place_orders
+"""
+
+# imports
+import random
+import time
+
+from products import Product
+from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from store import Store
+
+CATALOG_SIZE = 10_000
+BASKETS = 50_000
+LINES_PER_BASKET = 5
+
+
+def build_store(size: int) -> Store:
+    """
+    build a store where every third product has a promotion
+    :param size:
+    :type size:
+    :return:
+    :rtype:
+    """
+    promotions = [
+        SecondHalfPrice("Second Half price!"),
+        ThirdOneFree("Third One Free!"),
+        PercentDiscount("30% off!", percent=30),
+    ]
+    store = Store()
+    for idx in range(size):
+        product = Product(f"Product {idx}", price=5 + idx % 95, quantity=10**9)
+        if idx % 3 == 0:
+            product.add_promotion(promotions[idx % 9 // 3])
+        store.add_product(product)
+    return store
+
+
+def make_baskets(rng: random.Random, pick) -> list:
+    """
+    baskets of LINES_PER_BASKET lines, pick chooses the product index
+    :param rng:
+    :type rng:
+    :param pick:
+    :type pick:
+    :return:
+    :rtype:
+    """
+    return [
+        [
+            (f"Product {pick()}", rng.randint(1, 6))
+            for _ in range(LINES_PER_BASKET)
+        ]
+        for _ in range(BASKETS)
+    ]
+
+
+def main() -> None:
+    rng = random.Random(42)
+    scenarios = [
+        ("uniform", lambda: rng.randrange(CATALOG_SIZE)),
+        # a few hot products take most of the traffic
+        ("skewed", lambda: min(int(rng.paretovariate(1.2)) - 1, 9_999)),
+    ]
+    for label, pick in scenarios:
+        store = build_store(CATALOG_SIZE)
+        baskets = make_baskets(rng, pick)
+        start = time.perf_counter()
+        store.place_orders(baskets)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {BASKETS} baskets in {elapsed:.3f}s")
+        print(f"  {BASKETS / elapsed:,.0f} baskets/s")
+        print(f"  {BASKETS * LINES_PER_BASKET / elapsed:,.0f} lines/s")
+        print(f"  quote cache: {store.quote_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+bench_price_index.py
+price range and top n queries from the price index against a scan and
+sort of the product list
+run with: python -m benchmarks.bench_price_index
+"""
+
+# imports
+import random
+import time
+
+from products import Product
+from store import Store
+
+STORE_SIZE = 500_000
+QUERIES = 1000
+TOP_N = 20
+REPRICES = 100_000
+
+
+def main() -> None:
+    rng = random.Random(42)
+    store = Store(
+        [
+            Product(
+                f"Product {idx}",
+                price=rng.randrange(100, 100_000) / 100,
+                quantity=5,
+            )
+            for idx in range(STORE_SIZE)
+        ]
+    )
+    start = time.perf_counter()
+    store.get_cheapest_products(1)
+    print(f"build index: {time.perf_counter() - start:.3f}s")
+
+    ranges = []
+    for _ in range(QUERIES):
+        low = rng.randrange(100, 99_000) / 100
+        ranges.append((low, low + 5))
+
+    start = time.perf_counter()
+    found = sum(len(store.get_products_by_price(*bounds)) for bounds in ranges)
+    elapsed = time.perf_counter() - start
+    print(f"{QUERIES} range queries ({found} products): {elapsed:.3f}s")
+    start = time.perf_counter()
+    for _ in range(QUERIES):
+        store.get_cheapest_products(TOP_N)
+        store.get_most_expensive_products(TOP_N)
+    elapsed = time.perf_counter() - start
+    print(f"{QUERIES} cheapest + most expensive {TOP_N}: {elapsed:.3f}s")
+
+    scan_queries = QUERIES // 100
+    start = time.perf_counter()
+    for low, high in ranges[:scan_queries]:
+        sorted(
+            (p for p in store.products if low <= p.price <= high),
+            key=lambda product: product.price,
+        )
+    elapsed = time.perf_counter() - start
+    print(f"{scan_queries} range queries (scan and sort): {elapsed:.3f}s")
+    start = time.perf_counter()
+    for _ in range(scan_queries):
+        sorted(store.products, key=lambda product: product.price)[:TOP_N]
+    elapsed = time.perf_counter() - start
+    print(f"{scan_queries} cheapest {TOP_N} (sort): {elapsed:.3f}s")
+
+    products = store.products
+    start = time.perf_counter()
+    for _ in range(REPRICES):
+        product = products[rng.randrange(STORE_SIZE)]
+        product.price = rng.randrange(100, 100_000) / 100
+    elapsed = time.perf_counter() - start
+    print(f"{REPRICES} price changes: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
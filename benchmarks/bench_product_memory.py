@@ -0,0 +1,75 @@
+"""
+bench_product_memory.py
+bytes per product for the slotted Product classes against the dict based
+layout the classes had before (per instance __dict__ and an empty
+promotions list each)
+run with: python -m benchmarks.bench_product_memory
+"""
+
+# imports
+import gc
+import tracemalloc
+
+from products import Product, NonStockedProducts, LimitedProducts
+
+CATALOG_SIZE = 200_000
+
+
+class DictProduct:
+    """
+    the attribute layout of Product before __slots__
+    """
+
+    def __init__(self, name, price, quantity, active=True):
+        self.name = name
+        self.price = round(float(price), 2)
+        self._quantity = quantity
+        self._active = active
+        self._promotions = []
+
+
+class DictLimitedProducts(DictProduct):
+    def __init__(self, name, price, quantity, active=True, maximum=1):
+        super().__init__(name, price, quantity, active)
+        self.maximum = maximum
+
+
+def bytes_per_product(factory, names) -> float:
+    """
+    traced allocation per product, names are created up front so they
+    are not counted
+    :param factory:
+    :type factory:
+    :param names:
+    :type names:
+    :return:
+    :rtype:
+    """
+    gc.collect()
+    tracemalloc.start()
+    products = [factory(name) for name in names]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # the list holding the products is not part of the product
+    return (current - products.__sizeof__()) / len(products)
+
+
+def main() -> None:
+    names = [f"Product {idx}" for idx in range(CATALOG_SIZE)]
+    rows = [
+        ("Product (dict layout)", lambda n: DictProduct(n, 10, 5)),
+        ("Product (slots)", lambda n: Product(n, 10, 5)),
+        (
+            "LimitedProducts (dict layout)",
+            lambda n: DictLimitedProducts(n, 10, 5),
+        ),
+        ("LimitedProducts (slots)", lambda n: LimitedProducts(n, 10, 5)),
+        ("NonStockedProducts (slots)", lambda n: NonStockedProducts(n, 10)),
+    ]
+    print(f"{CATALOG_SIZE} products")
+    for label, factory in rows:
+        print(f"{label:<32}{bytes_per_product(factory, names):>8.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+bench_promotion_batch.py
+scalar apply_promotion loop against apply_promotions_batch
+run with: python -m benchmarks.bench_promotion_batch
+"""
+
+# imports
+import random
+import time
+
+from promotions import (
+    PercentDiscount,
+    SecondHalfPrice,
+    ThirdOneFree,
+    apply_promotions_batch,
+)
+
+PAIRS = 1_000_000
+
+
+def main() -> None:
+    rng = random.Random(1)
+    quantities = [rng.randint(1, 20) for _ in range(PAIRS)]
+    totals = [rng.randint(100, 100_000) / 100 * qty for qty in quantities]
+    chain = [
+        ThirdOneFree("Third One Free!"),
+        SecondHalfPrice("Second Half price!"),
+        PercentDiscount("30% off!", percent=30),
+    ]
+
+    start = time.perf_counter()
+    actual = apply_promotions_batch(chain, totals, quantities)
+    batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = []
+    for total, qty in zip(totals, quantities):
+        for promotion in chain:
+            total = promotion.apply_promotion(total, qty)
+        expected.append(total)
+    scalar = time.perf_counter() - start
+
+    assert list(actual) == expected
+    print(f"{PAIRS} pairs, chain of {len(chain)} promotions")
+    print(f"{'scalar':<10}{scalar * 1000:>10.1f} ms")
+    print(f"{'batch':<10}{batch * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+bench_promotion_index.py
+finding, attaching and ending a campaign through the promotion index
+against scanning the promotions of every product
+run with: python -m benchmarks.bench_promotion_index
+"""
+
+# imports
+import time
+
+from products import Product
+from promotions import PercentDiscount, SecondHalfPrice
+from store import Store
+
+STORE_SIZE = 500_000
+# every CAMPAIGN_EVERY-th product takes part in the campaign
+CAMPAIGN_EVERY = 50
+LOOKUPS = 100
+
+
+def main() -> None:
+    everyday = SecondHalfPrice("Second Half price!")
+    campaign = PercentDiscount("Black Friday", percent=30)
+    products = [
+        Product(f"Product {idx}", price=10, quantity=5)
+        for idx in range(STORE_SIZE)
+    ]
+    for product in products[::7]:
+        product.add_promotion(everyday)
+    store = Store(products)
+    start = time.perf_counter()
+    store.get_products_with_promotion(everyday)
+    print(f"build index: {time.perf_counter() - start:.3f}s")
+
+    members = products[::CAMPAIGN_EVERY]
+    start = time.perf_counter()
+    store.attach_promotion(campaign, members)
+    elapsed = time.perf_counter() - start
+    print(f"attach to {len(members)} products: {elapsed:.3f}s")
+
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        found = store.get_products_with_promotion(campaign)
+    elapsed = time.perf_counter() - start
+    print(f"{LOOKUPS} lookups ({len(found)} products, index): {elapsed:.3f}s")
+    scans = LOOKUPS // 10
+    start = time.perf_counter()
+    for _ in range(scans):
+        found = [
+            product
+            for product in store.products
+            if campaign in product._promotions
+        ]
+    elapsed = time.perf_counter() - start
+    print(f"{scans} lookups ({len(found)} products, scan): {elapsed:.3f}s")
+
+    start = time.perf_counter()
+    changed = store.end_campaign(campaign)
+    elapsed = time.perf_counter() - start
+    print(f"end campaign on {changed} products: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
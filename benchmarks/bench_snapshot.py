@@ -0,0 +1,52 @@
+"""
+bench_snapshot.py
+startup from a memory mapped snapshot against building the catalog
+run with: python -m benchmarks.bench_snapshot
+"""
+
+# imports
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_place_orders import build_store
+from snapshot import SnapshotStore, save_snapshot
+
+CATALOG_SIZE = 1_000_000
+LOOKUPS = 100_000
+
+
+def main() -> None:
+    rng = random.Random(42)
+    start = time.perf_counter()
+    store = build_store(CATALOG_SIZE)
+    print(f"build {CATALOG_SIZE} products: {time.perf_counter() - start:.3f}s")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "store.snap")
+        start = time.perf_counter()
+        save_snapshot(store, path)
+        print(f"save snapshot: {time.perf_counter() - start:.3f}s")
+        print(f"  {os.path.getsize(path) / 2**20:.1f} MiB")
+        del store
+
+        start = time.perf_counter()
+        snapshot_store = SnapshotStore(path)
+        print(f"open snapshot: {time.perf_counter() - start:.3f}s")
+        names = [
+            f"Product {rng.randrange(CATALOG_SIZE)}" for _ in range(LOOKUPS)
+        ]
+        start = time.perf_counter()
+        for name in names:
+            snapshot_store._index.get(name)
+        elapsed = time.perf_counter() - start
+        print(f"{LOOKUPS} lookups: {elapsed:.3f}s")
+        print(f"  {len(snapshot_store._products)} products loaded")
+        start = time.perf_counter()
+        snapshot_store.load_all()
+        print(f"load the rest: {time.perf_counter() - start:.3f}s")
+        snapshot_store.close()
+
+
+if __name__ == "__main__":
+    main()
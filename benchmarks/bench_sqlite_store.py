@@ -0,0 +1,58 @@
+"""
+bench_sqlite_store.py
+opening a large SQLite store and ordering from it, only the products that
+are looked up are loaded
+run with: python -m benchmarks.bench_sqlite_store
+"""
+
+# imports
+import os
+import random
+import tempfile
+import time
+
+from products import Product
+from sqlite_store import SQLiteStore
+
+CATALOG_SIZE = 1_000_000
+BASKETS = 10_000
+LINES_PER_BASKET = 5
+
+
+def main() -> None:
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "store.db")
+        start = time.perf_counter()
+        with SQLiteStore(path, flush_every=10_000) as store:
+            store.save_products(
+                Product(f"Product {idx}", price=5 + idx % 95, quantity=10**9)
+                for idx in range(CATALOG_SIZE)
+            )
+        print(
+            f"save {CATALOG_SIZE} products: "
+            f"{time.perf_counter() - start:.3f}s"
+        )
+
+        start = time.perf_counter()
+        store = SQLiteStore(path)
+        print(f"open: {time.perf_counter() - start:.3f}s")
+        baskets = [
+            [
+                (f"Product {rng.randrange(CATALOG_SIZE)}", rng.randint(1, 6))
+                for _ in range(LINES_PER_BASKET)
+            ]
+            for _ in range(BASKETS)
+        ]
+        start = time.perf_counter()
+        store.place_orders(baskets)
+        elapsed = time.perf_counter() - start
+        print(f"{BASKETS} baskets in {elapsed:.3f}s")
+        print(f"  {len(store._products)} products loaded")
+        start = time.perf_counter()
+        store.close()
+        print(f"close (write back): {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+bench_store_lookup.py
+order latency against growing catalog sizes.
+With the name index the time per order should stay flat as the store grows.
+run with: python -m benchmarks.bench_store_lookup
+"""
+
+# imports
+import contextlib
+import io
+import time
+
+from products import Product
+from store import Store
+
+CATALOG_SIZES = (1_000, 10_000, 100_000, 300_000)
+BASKET_LINES = 10
+ORDERS = 200
+
+
+def build_store(size: int) -> Store:
+    """
+    build a store with size products
+    :param size:
+    :type size:
+    :return:
+    :rtype:
+    """
+    store = Store()
+    for idx in range(size):
+        store.add_product(
+            Product(f"Product {idx}", price=10 + idx % 90, quantity=10**9)
+        )
+    return store
+
+
+def time_orders(store: Store, size: int) -> float:
+    """
+    average seconds per order, basket lines taken from the end of the catalog
+    :param store:
+    :type store:
+    :param size:
+    :type size:
+    :return:
+    :rtype:
+    """
+    products = store.products
+    basket = [(products[size - 1 - idx], 1) for idx in range(BASKET_LINES)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(ORDERS):
+            store._order(basket)
+        elapsed = time.perf_counter() - start
+    return elapsed / ORDERS
+
+
+def main() -> None:
+    print(f"{'Catalog size':>12}{'us / order':>14}{'us / lookup':>14}")
+    for size in CATALOG_SIZES:
+        store = build_store(size)
+        per_order = time_orders(store, size)
+        probe = store.products[-1]
+        start = time.perf_counter()
+        for _ in range(10_000):
+            store._find_product(probe)
+        per_lookup = (time.perf_counter() - start) / 10_000
+        print(f"{size:>12}{per_order * 1e6:>14.1f}{per_lookup * 1e6:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
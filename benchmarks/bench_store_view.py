@@ -0,0 +1,53 @@
+"""
+bench_store_view.py
+combining large stores as a view against copying them
+run with: python -m benchmarks.bench_store_view
+"""
+
+# imports
+import random
+import time
+
+from products import Product
+from store import Store
+
+STORE_SIZE = 500_000
+LOOKUPS = 100_000
+
+
+def main() -> None:
+    rng = random.Random(42)
+    stores = [
+        Store(
+            [
+                Product(f"Product {part}-{idx}", price=10, quantity=5)
+                for idx in range(STORE_SIZE)
+            ]
+        )
+        for part in range(2)
+    ]
+    start = time.perf_counter()
+    view = stores[0] + stores[1]
+    print(f"combine (view): {time.perf_counter() - start:.6f}s")
+    start = time.perf_counter()
+    copy = view.materialize()
+    print(f"materialize: {time.perf_counter() - start:.3f}s")
+
+    names = [
+        f"Product {rng.randrange(2)}-{rng.randrange(STORE_SIZE)}"
+        for _ in range(LOOKUPS)
+    ]
+    for label, store in (("view", view), ("copy", copy)):
+        start = time.perf_counter()
+        for name in names:
+            store._index.get(name)
+        elapsed = time.perf_counter() - start
+        print(f"{LOOKUPS} lookups ({label}): {elapsed:.3f}s")
+        start = time.perf_counter()
+        units = sum(product.product_quantity for product in store.products)
+        elapsed = time.perf_counter() - start
+        print(f"iterate {units // 5} products ({label}): {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
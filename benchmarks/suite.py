@@ -0,0 +1,404 @@
+"""
+suite.py
+micro-benchmark suite over the hot paths: Product.buy, Store._order,
+Store.place_orders, the promotion chain and the catalog rendering
+every benchmark is timed best of --repeat runs, the results are written as
+JSON and can be checked against a stored baseline; the run fails (exit
+code 1) when a benchmark got slower than the baseline by more than
+--threshold
+run with: python -m benchmarks.suite [--json results.json]
+                                     [--baseline baseline.json]
+                                     [--threshold 0.25]
+store a baseline with: python -m benchmarks.suite --json baseline.json
+"""
+
+# imports
+import argparse
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import timeit
+from typing import Callable
+
+from products import Product
+from promotions import (
+    PercentDiscount,
+    SecondHalfPrice,
+    ThirdOneFree,
+    apply_promotions_batch,
+)
+from store import Store
+from ui_helpers import UIHelpers
+
+# realistic sizes at scale 1
+CATALOG_SIZE = 10_000
+BASKET_LINES = 10
+BASKETS = 1_000
+PAIRS = 10_000
+PAGE_SIZE = 25
+
+DEFAULT_REPEAT = 5
+# a benchmark 25% slower than the baseline fails the run
+DEFAULT_THRESHOLD = 0.25
+# more stock than any run can buy
+STOCK = 10**12
+
+# name -> setup, the setup builds the data at a scale and returns the
+# callable that is timed
+BENCHMARKS: dict[str, Callable[[float], Callable[[], None]]] = {}
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def benchmark(name: str):
+    """
+    register a benchmark setup under a name
+    :param name:
+    :type name:
+    :return:
+    :rtype:
+    """
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def scaled(size: int, scale: float) -> int:
+    """
+    a size at a scale, never below 1
+    :param size:
+    :type size:
+    :param scale:
+    :type scale:
+    :return:
+    :rtype:
+    """
+    return max(1, int(size * scale))
+
+
+def build_products(size: int) -> list[Product]:
+    """
+    products with prices in cents, every third one has a promotion
+    :param size:
+    :type size:
+    :return:
+    :rtype:
+    """
+    promotions = [
+        SecondHalfPrice("Second Half price!"),
+        ThirdOneFree("Third One Free!"),
+        PercentDiscount("30% off!", percent=30),
+    ]
+    products = []
+    for idx in range(size):
+        product = Product(
+            f"Product {idx}", price=5 + idx % 9_500 / 100, quantity=STOCK
+        )
+        if idx % 3 == 0:
+            product.add_promotion(promotions[idx % 9 // 3])
+        products.append(product)
+    return products
+
+
+@benchmark("product_buy")
+def bench_product_buy(scale: float) -> Callable[[], None]:
+    product = Product("MacBook Air M2", price=1450.99, quantity=STOCK)
+    buy = product.buy
+    buys = range(scaled(PAIRS, scale))
+
+    def run():
+        for _ in buys:
+            buy(1)
+
+    return run
+
+
+@benchmark("store_order")
+def bench_store_order(scale: float) -> Callable[[], None]:
+    products = build_products(scaled(CATALOG_SIZE, scale))
+    store = Store(products)
+    rng = random.Random(1)
+    shopping_list = [
+        (rng.choice(products), rng.randint(1, 6)) for _ in range(BASKET_LINES)
+    ]
+
+    def run():
+        # the printing is part of the cost, the output is not
+        with redirect_stdout(io.StringIO()):
+            store._order(shopping_list)
+
+    return run
+
+
+@benchmark("place_orders")
+def bench_place_orders(scale: float) -> Callable[[], None]:
+    size = scaled(CATALOG_SIZE, scale)
+    store = Store(build_products(size))
+    rng = random.Random(1)
+    baskets = [
+        [
+            (f"Product {rng.randrange(size)}", rng.randint(1, 6))
+            for _ in range(BASKET_LINES)
+        ]
+        for _ in range(scaled(BASKETS, scale))
+    ]
+
+    def run():
+        store.place_orders(baskets)
+
+    return run
+
+
+def promotion_pairs(scale: float) -> tuple[list, list, list]:
+    """
+    a promotion chain and random (total, quantity) pairs
+    :param scale:
+    :type scale:
+    :return:
+    :rtype:
+    """
+    rng = random.Random(1)
+    quantities = [rng.randint(1, 20) for _ in range(scaled(PAIRS, scale))]
+    totals = [rng.randint(100, 100_000) / 100 * qty for qty in quantities]
+    chain = [
+        ThirdOneFree("Third One Free!"),
+        SecondHalfPrice("Second Half price!"),
+        PercentDiscount("30% off!", percent=30),
+    ]
+    return chain, totals, quantities
+
+
+@benchmark("promotions_apply")
+def bench_promotions_apply(scale: float) -> Callable[[], None]:
+    chain, totals, quantities = promotion_pairs(scale)
+    pairs = list(zip(totals, quantities))
+
+    def run():
+        for total, qty in pairs:
+            for promotion in chain:
+                total = promotion.apply_promotion(total, qty)
+
+    return run
+
+
+@benchmark("promotions_batch")
+def bench_promotions_batch(scale: float) -> Callable[[], None]:
+    chain, totals, quantities = promotion_pairs(scale)
+
+    def run():
+        apply_promotions_batch(chain, totals, quantities)
+
+    return run
+
+
+@benchmark("catalog_render")
+def bench_catalog_render(scale: float) -> Callable[[], None]:
+    products = build_products(scaled(CATALOG_SIZE, scale))
+
+    def run():
+        UIHelpers.render_products(products)
+
+    return run
+
+
+@benchmark("catalog_page")
+def bench_catalog_page(scale: float) -> Callable[[], None]:
+    products = build_products(scaled(CATALOG_SIZE, scale))
+    page = max(1, len(products) // PAGE_SIZE // 2)
+
+    def run():
+        UIHelpers.render_products_page(products, page)
+
+    return run
+
+
+def run_benchmark(
+    name: str,
+    scale: float = 1.0,
+    repeat: int = DEFAULT_REPEAT,
+    number: int = None,
+) -> dict:
+    """
+    time one benchmark
+    :param name:
+    :type name:
+    :param scale: multiplies the catalog, basket and pair counts
+    :type scale: float
+    :param repeat: timed runs
+    :type repeat: int
+    :param number: calls per run, picked so a run takes 0.2s when None
+    :type number: int
+    :return: best and median seconds per call
+    :rtype:
+    """
+    setup = BENCHMARKS.get(name)
+    if setup is None:
+        raise ValueError(f"Unknown benchmark {name}")
+    timer = timeit.Timer(setup(scale))
+    if number is None:
+        number, _ = timer.autorange()
+    times = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    return {
+        "best": min(times),
+        "median": statistics.median(times),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run_suite(
+    names: list[str] = None,
+    scale: float = 1.0,
+    repeat: int = DEFAULT_REPEAT,
+    number: int = None,
+) -> dict:
+    """
+    time the benchmarks, all of them when names is None
+    :param names:
+    :type names:
+    :param scale:
+    :type scale: float
+    :param repeat:
+    :type repeat: int
+    :param number:
+    :type number: int
+    :return: the JSON document of the run
+    :rtype:
+    """
+    if not isinstance(repeat, int) or repeat < 1:
+        raise ValueError("Repeat should be a positive integer")
+    if number is not None and (not isinstance(number, int) or number < 1):
+        raise ValueError("Number should be a positive integer")
+    if scale <= 0:
+        raise ValueError("Scale should be positive")
+    if names is None:
+        names = list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            raise ValueError(f"Unknown benchmark {name}")
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scale": scale,
+        "results": {
+            name: run_benchmark(name, scale, repeat, number) for name in names
+        },
+    }
+
+
+def compare(
+    results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD
+) -> list[Regression]:
+    """
+    the benchmarks whose best time grew by more than threshold over the
+    baseline, benchmarks missing from either side are skipped
+    :param results: a run_suite document
+    :type results:
+    :param baseline: a run_suite document
+    :type baseline:
+    :param threshold: allowed slow down, 0.25 is 25%
+    :type threshold: float
+    :return:
+    :rtype:
+    """
+    if threshold < 0:
+        raise ValueError("Threshold should not be negative")
+    if results.get("scale") != baseline.get("scale"):
+        raise ValueError("Results and baseline should have the same scale")
+    regressions = []
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if result["best"] > base["best"] * (1 + threshold):
+            regressions.append(Regression(name, base["best"], result["best"]))
+    return regressions
+
+
+def format_results(results: dict, baseline: dict = None) -> str:
+    """
+    a table of the results, with the change over the baseline
+    :param results:
+    :type results:
+    :param baseline:
+    :type baseline:
+    :return:
+    :rtype:
+    """
+    lines = [f"{'benchmark':<20}{'best':>14}{'median':>14}{'change':>10}"]
+    for name, result in results["results"].items():
+        change = ""
+        base = baseline["results"].get(name) if baseline else None
+        if base is not None:
+            change = f"{result['best'] / base['best'] - 1:+.1%}"
+        lines.append(
+            f"{name:<20}{result['best'] * 1000:>11.3f} ms"
+            f"{result['median'] * 1000:>11.3f} ms{change:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.suite", description=__doc__.split("\n")[2]
+    )
+    parser.add_argument(
+        "names", nargs="*", help=f"benchmarks to run: {', '.join(BENCHMARKS)}"
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare with this results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--number", type=int)
+    parser.add_argument("--scale", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        # checked by compare too, but only after the whole run
+        if baseline.get("scale") != args.scale:
+            parser.error("Results and baseline should have the same scale")
+    if args.threshold < 0:
+        parser.error("Threshold should not be negative")
+    try:
+        results = run_suite(
+            args.names or None, args.scale, args.repeat, args.number
+        )
+        regressions = (
+            compare(results, baseline, args.threshold) if baseline else []
+        )
+    except ValueError as error:
+        parser.error(str(error))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    print(format_results(results, baseline))
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression.name}: {regression.ratio:.2f}x the "
+            f"baseline, over the {args.threshold:.0%} threshold"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
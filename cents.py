@@ -0,0 +1,79 @@
+"""
+cents.py
+fixed point pricing in integer cents
+the opt-in alternative to the float path: a price is turned into integer
+cents once per quote, subtotals and the promotion chain run on integers
+(Promotions.apply_promotion_cents) and order totals are integer sums, so a
+basket of any size adds up to the cent. Every division rounds the exact
+quotient half to even, the rule round(value, 2) follows on the float path;
+the only results that differ are exact half cents, where the float path
+rounds whatever binary neighbour of the half cent it computed.
+"""
+
+# imports
+from fractions import Fraction
+from numbers import Real
+
+# types
+Cents = int
+
+CENTS_PER_UNIT = 100
+
+
+def to_cents(amount: Real) -> Cents:
+    """
+    turn an amount into integer cents, rounded to 2 decimals the same way
+    Product rounds its price
+    :param amount:
+    :type amount:
+    :return:
+    :rtype:
+    """
+    if isinstance(amount, int):
+        return amount * CENTS_PER_UNIT
+    # round(amount, 2) is the double closest to a whole number of cents,
+    # times 100 it is within far less than half a cent of it
+    return round(round(amount, 2) * CENTS_PER_UNIT)
+
+
+def from_cents(cents: Cents) -> float:
+    """
+    turn integer cents back into an amount
+    :param cents:
+    :type cents:
+    :return:
+    :rtype:
+    """
+    return cents / CENTS_PER_UNIT
+
+
+def div_round(numerator: int, denominator: int) -> Cents:
+    """
+    numerator / denominator rounded to a whole cent, exact halves go to
+    the even cent
+    :param numerator:
+    :type numerator:
+    :param denominator: positive
+    :type denominator:
+    :return:
+    :rtype:
+    """
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def percent_kept(percent: Real) -> Fraction:
+    """
+    the exact share of a total kept after a percent discount, a float
+    percent is read as the decimal it was written as
+    :param percent:
+    :type percent:
+    :return:
+    :rtype:
+    """
+    if not isinstance(percent, int):
+        percent = Fraction(repr(float(percent)))
+    return 1 - Fraction(percent) / 100
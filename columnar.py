@@ -0,0 +1,233 @@
+"""
+columnar.py
+optional columnar inventory backend for the Store
+ColumnarStore keeps prices, quantities and active flags of its products in
+contiguous typed arrays next to the normal product list. The products stay
+normal Product objects; every change through their property setters is
+written through to the arrays, so filters run over the columns instead of
+looping over Python objects. Totals and valuations are kept up to date by
+Store itself.
+NumPy is used for the column maths when it is installed, the stdlib array
+module is used otherwise.
+"""
+
+# imports
+from array import array
+from itertools import compress
+import operator
+from typing import Iterable
+
+from products import Product
+from store import Store
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+
+class ColumnarStore(Store):
+    """
+    Store whose aggregations run over typed arrays
+    every product object has exactly one row, rows are not kept in listing
+    order because removal moves the last row into the freed one
+    """
+
+    def __init__(self, products: list[Product] = None) -> None:
+        """
+        initialise the columns before the products are set
+        :param products:
+        :type products:
+        """
+        self._clear_columns()
+        super().__init__(products)
+
+    def add_products(self, products: Iterable[Product]) -> None:
+        """
+        add products to store and give each a row in the columns
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        products = list(products)
+        super().add_products(products)
+        for product in products:
+            self._add_row(product)
+
+    def remove_products(self, products: Iterable[Product]) -> None:
+        """
+        remove products from store and drop the rows of the ones that are
+        no longer listed
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        products = list(products)
+        super().remove_products(products)
+        for product in products:
+            if product in self._rows and product not in self:
+                self._remove_row(product)
+
+    def find_products(
+        self,
+        min_price: float = None,
+        max_price: float = None,
+        active_only: bool = False,
+        in_stock_only: bool = False,
+    ) -> list[Product]:
+        """
+        filter the products over the columns
+        :param min_price: lowest price to include
+        :type min_price: float
+        :param max_price: highest price to include
+        :type max_price: float
+        :param active_only: only active products
+        :type active_only: bool
+        :param in_stock_only: only products with a quantity above 0
+        :type in_stock_only: bool
+        :return: the matching products in row order
+        :rtype: list[Product]
+        """
+        if np is not None:
+            return self._find_products_numpy(
+                min_price, max_price, active_only, in_stock_only
+            )
+        selectors = [True] * len(self._row_products)
+        if min_price is not None:
+            selectors = map(
+                operator.and_,
+                selectors,
+                [price >= min_price for price in self._prices],
+            )
+        if max_price is not None:
+            selectors = map(
+                operator.and_,
+                selectors,
+                [price <= max_price for price in self._prices],
+            )
+        if active_only:
+            selectors = map(operator.and_, selectors, self._active)
+        if in_stock_only:
+            selectors = map(
+                operator.and_,
+                selectors,
+                [quantity > 0 for quantity in self._quantities],
+            )
+        return list(compress(self._row_products, selectors))
+
+    # private methods
+    def _find_products_numpy(
+        self,
+        min_price: float,
+        max_price: float,
+        active_only: bool,
+        in_stock_only: bool,
+    ) -> list[Product]:
+        """
+        numpy version of find_products
+        :return:
+        :rtype:
+        """
+        prices = self._column(self._prices, np.float64)
+        mask = np.ones(len(prices), dtype=bool)
+        if min_price is not None:
+            mask &= prices >= min_price
+        if max_price is not None:
+            mask &= prices <= max_price
+        if active_only:
+            mask &= self._column(self._active, np.int8) != 0
+        if in_stock_only:
+            mask &= self._column(self._quantities, np.int64) > 0
+        row_products = self._row_products
+        return [row_products[row] for row in np.flatnonzero(mask)]
+
+    @staticmethod
+    def _column(column: array, dtype):
+        """
+        zero copy numpy view on an array column
+        the view must not outlive the call, the array can not grow while
+        a view is exported
+        :param column:
+        :type column:
+        :param dtype:
+        :type dtype:
+        :return:
+        :rtype:
+        """
+        return np.frombuffer(column, dtype=dtype)
+
+    def _reindex(self) -> None:
+        """
+        rebuild the name index and the columns
+        :return:
+        :rtype:
+        """
+        super()._reindex()
+        self._clear_columns()
+        for product in self._products:
+            self._add_row(product)
+
+    def _clear_columns(self) -> None:
+        """
+        empty columns
+        :return:
+        :rtype:
+        """
+        self._prices = array("d")
+        self._quantities = array("q")
+        self._active = array("b")
+        self._row_products: list[Product] = []
+        self._rows: dict[Product, int] = {}
+
+    def _add_row(self, product: Product) -> None:
+        """
+        append a row for the product, a product listed twice keeps one row
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        if product in self._rows:
+            return
+        self._rows[product] = len(self._row_products)
+        self._row_products.append(product)
+        self._prices.append(product.price)
+        self._quantities.append(product.product_quantity)
+        self._active.append(product.is_active)
+
+    def _remove_row(self, product: Product) -> None:
+        """
+        drop the row of the product by moving the last row into it
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        row = self._rows.pop(product)
+        last_product = self._row_products.pop()
+        last_price = self._prices.pop()
+        last_quantity = self._quantities.pop()
+        last_active = self._active.pop()
+        if last_product is not product:
+            self._rows[last_product] = row
+            self._row_products[row] = last_product
+            self._prices[row] = last_price
+            self._quantities[row] = last_quantity
+            self._active[row] = last_active
+
+    def _product_changed(self, product: Product) -> None:
+        """
+        write a product change through to its row, the store registers
+        itself as watcher of every product it lists
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        super()._product_changed(product)
+        row = self._rows[product]
+        self._prices[row] = product.price
+        self._quantities[row] = product.product_quantity
+        self._active[row] = product.is_active
@@ -0,0 +1,374 @@
+"""
+importer.py
+streaming importer for supplier feeds in CSV or JSONL
+rows are read one at a time and turned into products in batches; rows that
+can not be turned into a product are reported and skipped, the rest of the
+feed is still imported. Nothing but the current batch is kept, so memory
+does not grow with the size of the feed.
+
+columns / keys of a row:
+    name, price          required
+    quantity             required for product and limited
+    kind                 product (default), limited or non_stocked
+    active               true (default) or false
+    maximum              per order maximum of limited products, 1 default
+    promotions           CSV: specs separated by "|", e.g.
+                         "second_half_price:Second Half price!|percent:30:30%
+                         off!"; JSONL: a list of such specs or of objects
+                         {"type": ..., "description": ..., "percent": ...}
+"""
+
+# imports
+import csv
+from dataclasses import dataclass, field
+import json
+import math
+import os
+from typing import Callable, Iterable, Iterator, Union
+
+from products import Product, NonStockedProducts, LimitedProducts
+from promotions import (
+    Promotions,
+    PercentDiscount,
+    SecondHalfPrice,
+    ThirdOneFree,
+)
+from store import Store
+
+# types
+Record = tuple[int, Union[dict, str]]
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_ERRORS = 100
+
+PROMOTION_SEPARATOR = "|"
+TRUE_VALUES = ("true", "1", "yes", "y")
+FALSE_VALUES = ("false", "0", "no", "n")
+
+
+@dataclass
+class RejectedRow:
+    line: int
+    row: Union[dict, str]
+    reason: str
+
+
+@dataclass
+class ImportBatch:
+    products: list[Product] = field(default_factory=list)
+    rejected: list[RejectedRow] = field(default_factory=list)
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    rejected: int = 0
+    # the first rejected rows, the count keeps going after max_errors
+    errors: list[RejectedRow] = field(default_factory=list)
+
+
+def read_csv(file) -> Iterator[Record]:
+    """
+    read the rows of a CSV feed with a header line
+    :param file: an open text file
+    :type file:
+    :return: (line number, row) pairs
+    :rtype:
+    """
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(file) -> Iterator[Record]:
+    """
+    read the lines of a JSONL feed, they are decoded with the rest of the
+    row so a broken line is rejected like any other bad row
+    :param file: an open text file
+    :type file:
+    :return: (line number, line) pairs
+    :rtype:
+    """
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if line:
+            yield line_number, line
+
+
+READERS = {".csv": read_csv, ".jsonl": read_jsonl, ".ndjson": read_jsonl}
+
+
+def read_feed(path: str) -> Iterator[Record]:
+    """
+    read a feed file, the format is picked by the extension
+    :param path:
+    :type path:
+    :return:
+    :rtype:
+    """
+    reader = READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        raise ValueError("Feed should be a .csv or .jsonl file")
+    with open(path, newline="", encoding="utf-8") as file:
+        yield from reader(file)
+
+
+def import_batches(
+    records: Iterable[Record], batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[ImportBatch]:
+    """
+    turn records into products, batch_size records at a time
+    promotions with the same spec are shared by all products of the feed
+    :param records: (line number, row) pairs
+    :type records:
+    :param batch_size:
+    :type batch_size: int
+    :return:
+    :rtype:
+    """
+    if not isinstance(batch_size, int) or batch_size < 1:
+        raise ValueError("Batch size should be a positive integer")
+    promotions: dict[tuple, Promotions] = {}
+    batch = ImportBatch()
+    size = 0
+    for line, row in records:
+        try:
+            batch.products.append(product_from_row(row, promotions))
+        except (ValueError, TypeError) as error:
+            batch.rejected.append(RejectedRow(line, row, str(error)))
+        size += 1
+        if size >= batch_size:
+            yield batch
+            batch = ImportBatch()
+            size = 0
+    if size:
+        yield batch
+
+
+def import_feed(
+    store: Store,
+    path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+    on_rejected: Callable[[RejectedRow], None] = None,
+) -> ImportReport:
+    """
+    import a feed file into a store
+    :param store:
+    :type store:
+    :param path: .csv or .jsonl file
+    :type path:
+    :param batch_size:
+    :type batch_size: int
+    :param max_errors: rejected rows kept in the report
+    :type max_errors: int
+    :param on_rejected: called with every rejected row
+    :type on_rejected:
+    :return:
+    :rtype:
+    """
+    return import_records(
+        store, read_feed(path), batch_size, max_errors, on_rejected
+    )
+
+
+def import_records(
+    store: Store,
+    records: Iterable[Record],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+    on_rejected: Callable[[RejectedRow], None] = None,
+) -> ImportReport:
+    """
+    import (line number, row) records into a store
+    :param store:
+    :type store:
+    :param records:
+    :type records:
+    :param batch_size:
+    :type batch_size: int
+    :param max_errors: rejected rows kept in the report
+    :type max_errors: int
+    :param on_rejected: called with every rejected row
+    :type on_rejected:
+    :return:
+    :rtype:
+    """
+    report = ImportReport()
+    for batch in import_batches(records, batch_size):
+        store.add_products(batch.products)
+        report.imported += len(batch.products)
+        report.rejected += len(batch.rejected)
+        for rejected in batch.rejected:
+            if len(report.errors) < max_errors:
+                report.errors.append(rejected)
+            if on_rejected is not None:
+                on_rejected(rejected)
+    return report
+
+
+def product_from_row(
+    row: Union[dict, str], promotions: dict = None
+) -> Product:
+    """
+    turn one row into a product, the constructors validate the values
+    :param row: a CSV row or a JSONL line
+    :type row:
+    :param promotions: promotions built so far, by spec
+    :type promotions:
+    :return:
+    :rtype:
+    """
+    if isinstance(row, str):
+        row = json.loads(row)
+    if not isinstance(row, dict):
+        raise ValueError("Row should be an object")
+    if promotions is None:
+        promotions = {}
+    kind = row.get("kind")
+    kind = "product" if kind in (None, "") else str(kind).strip().lower()
+    name = row.get("name")
+    price = _to_float(row.get("price"), "Price")
+    active = _to_bool(row.get("active"))
+    if kind == "non_stocked":
+        # the constructor has no stock to take, active is set afterwards
+        product = NonStockedProducts(name, price)
+        product.is_active = active
+    elif kind == "limited":
+        maximum = row.get("maximum")
+        product = LimitedProducts(
+            name,
+            price,
+            _to_int(row.get("quantity"), "Quantity"),
+            active,
+            _to_int(maximum, "Maximum") if maximum not in (None, "") else 1,
+        )
+    elif kind == "product":
+        product = Product(
+            name, price, _to_int(row.get("quantity"), "Quantity"), active
+        )
+    else:
+        raise ValueError(f"Unknown product kind {kind}")
+    for spec in _promotion_specs(row.get("promotions")):
+        promotion = promotions.get(spec)
+        if promotion is None:
+            promotion = promotions[spec] = _promotion_from_spec(spec)
+        product.add_promotion(promotion)
+    return product
+
+
+def _promotion_specs(value) -> list[tuple]:
+    """
+    normalise the promotions of a row to (type, percent, description)
+    :param value:
+    :type value:
+    :return:
+    :rtype:
+    """
+    if value in (None, ""):
+        return []
+    if isinstance(value, str):
+        value = value.split(PROMOTION_SEPARATOR)
+    if not isinstance(value, list):
+        raise ValueError("Promotions should be a list")
+    specs = []
+    for item in value:
+        if isinstance(item, dict):
+            promotion_type = str(item.get("type", "")).strip().lower()
+            percent = item.get("percent")
+            description = item.get("description")
+        elif isinstance(item, str):
+            promotion_type, _, rest = item.strip().partition(":")
+            promotion_type = promotion_type.strip().lower()
+            percent = None
+            if promotion_type == "percent":
+                percent, _, rest = rest.partition(":")
+            description = rest or None
+        else:
+            raise ValueError("Promotion should be a spec or an object")
+        if promotion_type == "percent":
+            percent = _to_float(percent, "Percent")
+        specs.append((promotion_type, percent, description))
+    return specs
+
+
+def _promotion_from_spec(spec: tuple) -> Promotions:
+    """
+    build the promotion of a spec
+    :param spec: (type, percent, description)
+    :type spec:
+    :return:
+    :rtype:
+    """
+    promotion_type, percent, description = spec
+    if promotion_type == "second_half_price":
+        return SecondHalfPrice(description)
+    if promotion_type == "third_one_free":
+        return ThirdOneFree(description)
+    if promotion_type == "percent":
+        if not 0 <= percent <= 100:
+            raise ValueError("Percent should be between 0 and 100")
+        return PercentDiscount(description, percent)
+    raise ValueError(f"Unknown promotion {promotion_type}")
+
+
+def _to_float(value, label: str) -> float:
+    """
+    read a number of a row
+    :param value:
+    :type value:
+    :param label: used in the error message
+    :type label:
+    :return:
+    :rtype:
+    """
+    if isinstance(value, bool) or value in (None, ""):
+        raise ValueError(f"{label} should be a number")
+    try:
+        number = float(value)
+    except (TypeError, ValueError, OverflowError):
+        # OverflowError: JSON integers too large for a float
+        raise ValueError(f"{label} should be a number") from None
+    if not math.isfinite(number):
+        raise ValueError(f"{label} should be a number")
+    return number
+
+
+def _to_int(value, label: str) -> int:
+    """
+    read a whole number of a row
+    :param value:
+    :type value:
+    :param label: used in the error message
+    :type label:
+    :return:
+    :rtype:
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise ValueError(f"{label} should be a whole number")
+
+
+def _to_bool(value) -> bool:
+    """
+    read the active flag of a row, missing means active
+    :param value:
+    :type value:
+    :return:
+    :rtype:
+    """
+    if value in (None, ""):
+        return True
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError("Active should be true or false")
@@ -0,0 +1,251 @@
+"""
+instrumentation.py
+per stage timings and call counts of the order processing
+enable() wraps the stages of Store._order (product lookup, the subtotal
+rules, the promotions and the UIHelpers printing) and _order itself in
+timers; disable() puts the original methods back, so a disabled store runs
+exactly the code it runs without this module. Times are inclusive, the
+_order stage contains all the others.
+
+    import instrumentation
+    instrumentation.enable()
+    ...
+    print(instrumentation.dump())
+    instrumentation.disable()
+
+dump_on_signal() dumps the stats to stderr every time the process gets a
+signal (SIGUSR1 by default) for a running store.
+"""
+
+# imports
+from contextlib import contextmanager
+import functools
+import json
+import signal
+import sys
+import threading
+import time
+
+from quote_cache import QuoteCache
+from store import Store
+from ui_helpers import UIHelpers
+
+# the hooked stages, (class, method name); the stage is called
+# "Class.method"
+STAGES = (
+    (Store, "_order"),
+    (Store, "_find_product"),
+    (Store, "_calc_subtotal_non_stocked_product"),
+    (Store, "_calc_subtotal_limited_product"),
+    (Store, "_calc_subtotal_stocked_product"),
+    # the quote cache calls the promotions stage on a miss only
+    (Store, "_calc_any_promotions"),
+    (Store, "_calc_any_promotions_cents"),
+    (QuoteCache, "quote"),
+    (QuoteCache, "quote_cents"),
+    (UIHelpers, "print_shopping_confirmation_start"),
+    (UIHelpers, "print_shopping_confirmation"),
+    (UIHelpers, "print_shopping_confirmation_end"),
+)
+
+
+class StageStats:
+    """
+    call counts and times per stage, shared by all threads
+    """
+
+    def __init__(self) -> None:
+        # reentrant: a dump_on_signal handler runs on the main thread and
+        # may interrupt a record() holding the lock there
+        self._lock = threading.RLock()
+        # stage -> [calls, total seconds, slowest call]
+        self._stages: dict[str, list] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        count one call of a stage
+        :param stage:
+        :type stage:
+        :param seconds:
+        :type seconds:
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                self._stages[stage] = [1, seconds, seconds]
+                return
+            stats[0] += 1
+            stats[1] += seconds
+            if seconds > stats[2]:
+                stats[2] = seconds
+
+    def snapshot(self) -> dict:
+        """
+        a copy of the stats of every stage called so far
+        :return: stage -> calls, total, mean and max seconds
+        :rtype:
+        """
+        with self._lock:
+            stages = {
+                stage: list(stats) for stage, stats in self._stages.items()
+            }
+        return {
+            stage: {
+                "calls": calls,
+                "total": total,
+                "mean": total / calls,
+                "max": slowest,
+            }
+            for stage, (calls, total, slowest) in stages.items()
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+
+stats = StageStats()
+# (class, method name) -> the original class attribute, while enabled
+_originals: dict[tuple[type, str], object] = {}
+_switch_lock = threading.Lock()
+
+
+def enable() -> None:
+    """
+    start timing the stages, enabling twice does nothing
+    :return:
+    :rtype:
+    """
+    with _switch_lock:
+        if _originals:
+            return
+        for owner, name in STAGES:
+            stage = f"{owner.__name__}.{name}"
+            # subclasses overriding a stage are timed under the same stage
+            for cls in dict.fromkeys(_with_subclasses(owner)):
+                original = cls.__dict__.get(name)
+                if original is not None:
+                    _originals[(cls, name)] = original
+                    setattr(cls, name, _timed(original, stage))
+
+
+def disable() -> None:
+    """
+    stop timing, the original methods are put back; the stats are kept
+    :return:
+    :rtype:
+    """
+    with _switch_lock:
+        for (cls, name), original in _originals.items():
+            setattr(cls, name, original)
+        _originals.clear()
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+@contextmanager
+def instrumented():
+    """
+    time the stages for the duration of a with block
+    :return: the stats
+    :rtype:
+    """
+    was_enabled = is_enabled()
+    enable()
+    try:
+        yield stats
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def snapshot() -> dict:
+    """
+    the stats of every stage called so far
+    :return:
+    :rtype:
+    """
+    return stats.snapshot()
+
+
+def reset() -> None:
+    stats.reset()
+
+
+def dump(file=None) -> str:
+    """
+    the stats as JSON, also written to file when given
+    :param file: an open text file
+    :type file:
+    :return:
+    :rtype:
+    """
+    text = json.dumps(snapshot(), indent=2, sort_keys=True)
+    if file is not None:
+        file.write(text + "\n")
+        file.flush()
+    return text
+
+
+def dump_on_signal(signum: int = None, file=None) -> None:
+    """
+    dump the stats every time the process gets signum, SIGUSR1 by default
+    must be called from the main thread
+    :param signum:
+    :type signum:
+    :param file: stderr by default
+    :type file:
+    :return:
+    :rtype:
+    """
+    if signum is None:
+        signum = signal.SIGUSR1
+    signal.signal(
+        signum,
+        lambda received, frame: dump(sys.stderr if file is None else file),
+    )
+
+
+# private functions
+def _with_subclasses(cls: type) -> list[type]:
+    """
+    a class and all classes derived from it
+    :param cls:
+    :type cls:
+    :return:
+    :rtype:
+    """
+    classes = [cls]
+    for subclass in cls.__subclasses__():
+        classes.extend(_with_subclasses(subclass))
+    return classes
+
+
+def _timed(original, stage: str):
+    """
+    wrap a class attribute in a timer, static methods stay static
+    :param original: function or staticmethod
+    :type original:
+    :param stage:
+    :type stage:
+    :return:
+    :rtype:
+    """
+    if isinstance(original, staticmethod):
+        return staticmethod(_timed(original.__func__, stage))
+    perf_counter = time.perf_counter
+    record = stats.record
+
+    @functools.wraps(original)
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            record(stage, perf_counter() - start)
+
+    return timed
@@ -0,0 +1,374 @@
+"""
+name_search.py
+name search index for the Store
+product names are split into lower case words. A trie over the distinct
+words answers prefix searches ("mac" finds "MacBook Air M2") by walking
+down the prefix and then through the words below it; a trigram index over
+the same words answers typo tolerant searches ("macbok"). Both hold words,
+not products, so a word shared by a million products is stored once and a
+product only costs an entry per word.
+"""
+
+# imports
+from collections import Counter
+import re
+import sys
+import threading
+from typing import Iterable, Iterator
+
+from products import Product
+
+WORD = re.compile(r"\w+")
+GRAM_SIZE = 3
+# least trigram similarity (Dice) of a word to a misspelled query word
+FUZZY_THRESHOLD = 0.4
+DEFAULT_SEARCH_LIMIT = 10
+
+# a trie node keeps its word under the empty key, a character never is
+_WORD_KEY = ""
+
+
+def name_words(name: str) -> tuple[str, ...]:
+    """
+    split a name into its distinct lower case words, interned so the
+    products sharing a word share the string
+    :param name:
+    :type name:
+    :return:
+    :rtype:
+    """
+    return tuple(dict.fromkeys(map(sys.intern, WORD.findall(name.casefold()))))
+
+
+def word_grams(word: str) -> set[str]:
+    """
+    the trigrams of a word, padded so the first and last letters count
+    :param word:
+    :type word:
+    :return:
+    :rtype:
+    """
+    padded = f"${word}$"
+    return {
+        "".join(chars)
+        for chars in zip(*(padded[skip:] for skip in range(GRAM_SIZE)))
+    }
+
+
+class NameSearchIndex:
+    """
+    prefix and typo tolerant search over product names
+    """
+
+    def __init__(self, products: Iterable[Product] = ()) -> None:
+        """
+        index the products, a product listed twice is indexed once
+        :param products:
+        :type products:
+        """
+        self._trie: dict = {}
+        self._grams: dict[str, set[str]] = {}
+        # word -> products with the word, a dict keeps them in order
+        self._products: dict[str, dict[Product, None]] = {}
+        # product -> the words it is indexed under
+        self._words: dict[Product, tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        for product in products:
+            if product not in self._words:
+                self._add(product)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, product) -> bool:
+        return product in self._words
+
+    def add(self, product: Product) -> None:
+        """
+        index a product
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            if product not in self._words:
+                self._add(product)
+
+    def discard(self, product: Product) -> None:
+        """
+        drop a product from the index if it is in it
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            words = self._words.pop(product, None)
+            if words is not None:
+                self._drop(product, words)
+
+    def rename(self, product: Product) -> None:
+        """
+        index a product under its new name
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            words = self._words.pop(product, None)
+            if words is not None:
+                self._drop(product, words)
+                self._add(product)
+
+    def search(
+        self, query: str, limit: int = DEFAULT_SEARCH_LIMIT
+    ) -> list[Product]:
+        """
+        prefix matches first, typo tolerant matches fill up the rest
+        :param query:
+        :type query: str
+        :param limit: most products returned
+        :type limit: int
+        :return:
+        :rtype: list[Product]
+        """
+        found = dict.fromkeys(self.prefix_search(query, limit))
+        if len(found) < limit:
+            for product in self.fuzzy_search(query, limit):
+                found.setdefault(product)
+        return list(found)[:limit]
+
+    def prefix_search(
+        self, query: str, limit: int = DEFAULT_SEARCH_LIMIT
+    ) -> list[Product]:
+        """
+        products with a word starting with every word of the query, in
+        the alphabetical order of the word that matched the longest query
+        word
+        :param query:
+        :type query: str
+        :param limit: most products returned
+        :type limit: int
+        :return:
+        :rtype: list[Product]
+        """
+        terms = name_words(query)
+        if not terms or limit < 1:
+            return []
+        # the longest word has the fewest completions, the other words
+        # are checked on its products
+        anchor = max(terms, key=len)
+        found = {}
+        with self._lock:
+            for term in terms:
+                if next(self._completions(term), None) is None:
+                    return []
+            for word in self._completions(anchor):
+                for product in self._products[word]:
+                    if product not in found and self._has_prefixes(
+                        self._words[product], terms
+                    ):
+                        found[product] = None
+                        if len(found) >= limit:
+                            return list(found)
+        return list(found)
+
+    def fuzzy_search(
+        self, query: str, limit: int = DEFAULT_SEARCH_LIMIT
+    ) -> list[Product]:
+        """
+        products with a word similar to every word of the query, most
+        similar first
+        :param query:
+        :type query: str
+        :param limit: most products returned
+        :type limit: int
+        :return:
+        :rtype: list[Product]
+        """
+        terms = name_words(query)
+        if not terms or limit < 1:
+            return []
+        scores = {}
+        with self._lock:
+            similar = [self._similar_words(term) for term in terms]
+            if not all(similar):
+                return []
+            # start from the query word with the fewest candidate products
+            anchor = min(
+                similar,
+                key=lambda words: sum(
+                    map(len, map(self._products.get, words))
+                ),
+            )
+            for word in sorted(anchor, key=anchor.get, reverse=True):
+                for product in self._products[word]:
+                    if product not in scores:
+                        score = self._score(product, similar)
+                        if score:
+                            scores[product] = score
+                            if len(scores) >= limit:
+                                break
+                if len(scores) >= limit:
+                    break
+        return sorted(scores, key=scores.get, reverse=True)
+
+    # private methods
+    def _add(self, product: Product) -> None:
+        """
+        index a product that is not indexed, the caller holds the lock
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        words = self._words[product] = name_words(product._name)
+        for word in words:
+            products = self._products.get(word)
+            if products is None:
+                products = self._products[word] = {}
+                self._add_word(word)
+            products[product] = None
+
+    def _drop(self, product: Product, words: tuple[str, ...]) -> None:
+        """
+        take a product out of the products of its words, a word without
+        products leaves the trie and the trigrams; the caller holds the
+        lock
+        :param product:
+        :type product:
+        :param words:
+        :type words:
+        :return:
+        :rtype:
+        """
+        for word in words:
+            products = self._products[word]
+            del products[product]
+            if not products:
+                del self._products[word]
+                self._drop_word(word)
+
+    def _add_word(self, word: str) -> None:
+        """
+        put a new word in the trie and the trigram index
+        :param word:
+        :type word:
+        :return:
+        :rtype:
+        """
+        node = self._trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[_WORD_KEY] = word
+        # numbers (sizes, model and article numbers) are only searched by
+        # prefix, a typo in a number is another number
+        if not word.isdigit():
+            for gram in word_grams(word):
+                self._grams.setdefault(gram, set()).add(word)
+
+    def _drop_word(self, word: str) -> None:
+        """
+        take a word out of the trie, pruning the nodes it leaves empty,
+        and out of the trigram index
+        :param word:
+        :type word:
+        :return:
+        :rtype:
+        """
+        path = [self._trie]
+        for char in word:
+            path.append(path[-1][char])
+        del path[-1][_WORD_KEY]
+        for char, parent in zip(reversed(word), reversed(path[:-1])):
+            if parent[char]:
+                break
+            del parent[char]
+        if word.isdigit():
+            return
+        for gram in word_grams(word):
+            words = self._grams[gram]
+            words.discard(word)
+            if not words:
+                del self._grams[gram]
+
+    def _completions(self, prefix: str) -> Iterator[str]:
+        """
+        the words starting with prefix in alphabetical order, depth first
+        so the first ones come without walking the whole subtree
+        :param prefix:
+        :type prefix:
+        :return:
+        :rtype:
+        """
+        node = self._trie
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            word = node.get(_WORD_KEY)
+            if word is not None:
+                yield word
+            stack.extend(
+                node[char] for char in sorted(node, reverse=True) if char
+            )
+
+    @staticmethod
+    def _has_prefixes(words: tuple[str, ...], terms: tuple[str, ...]) -> bool:
+        """
+        check every query word starts one of the words
+        :param words:
+        :type words:
+        :param terms:
+        :type terms:
+        :return:
+        :rtype:
+        """
+        return all(
+            any(word.startswith(term) for word in words) for term in terms
+        )
+
+    def _similar_words(self, term: str) -> dict[str, float]:
+        """
+        the indexed words sharing enough trigrams with a query word
+        :param term:
+        :type term:
+        :return: word -> similarity between 0 and 1
+        :rtype:
+        """
+        grams = word_grams(term)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._grams.get(gram, ()))
+        similar = {}
+        for word, count in shared.items():
+            # a padded word of n letters has at most n trigrams
+            score = 2 * count / (len(grams) + len(word))
+            if score >= FUZZY_THRESHOLD:
+                similar[word] = score
+        return similar
+
+    def _score(self, product: Product, similar: list[dict]) -> float:
+        """
+        mean similarity of the best word of a product for every query
+        word, 0 when a query word matches none of its words
+        :param product:
+        :type product:
+        :param similar: the similar words of every query word
+        :type similar:
+        :return:
+        :rtype:
+        """
+        words = self._words[product]
+        total = 0.0
+        for scores in similar:
+            best = max((scores.get(word, 0.0) for word in words), default=0.0)
+            if not best:
+                return 0.0
+            total += best
+        return total / len(similar)
@@ -0,0 +1,263 @@
+"""
+price_index.py
+price index for the Store
+the products sorted by price in buckets, answers the price range and
+cheapest / most expensive queries of the store without sorting the
+catalog, and follows price changes of the products
+"""
+
+# imports
+from bisect import bisect_left, bisect_right
+from itertools import chain, count, islice
+import math
+import operator
+import threading
+from typing import Iterable, Iterator
+
+from products import Product
+
+# keys per bucket of the price index
+PRICE_BUCKET_SIZE = 1000
+
+
+class PriceIndex:
+    """
+    the products of a store sorted by price, products of the same price in
+    the order they were indexed. The sorted keys are kept in buckets of
+    about PRICE_BUCKET_SIZE: queries bisect the last key of every bucket
+    and then one bucket, so they cost O(log n + k), and a repriced product
+    only moves the entries of the buckets it leaves and enters.
+    """
+
+    def __init__(self, products: Iterable[Product] = ()) -> None:
+        """
+        index the products, a product listed twice is indexed once
+        :param products:
+        :type products:
+        """
+        self._sequence = count()
+        self._keys: dict[Product, tuple[float, int]] = {}
+        for product in products:
+            if product not in self._keys:
+                self._keys[product] = (product._price, next(self._sequence))
+        entries = sorted(
+            zip(self._keys.values(), self._keys), key=operator.itemgetter(0)
+        )
+        # parallel buckets, the key at [i][j] is the key of the product at
+        # [i][j], _maxes[i] is the last key of bucket i
+        self._key_buckets: list[list[tuple[float, int]]] = []
+        self._product_buckets: list[list[Product]] = []
+        for start in range(0, len(entries), PRICE_BUCKET_SIZE):
+            end = start + PRICE_BUCKET_SIZE
+            bucket = entries[start:end]
+            self._key_buckets.append([key for key, _ in bucket])
+            self._product_buckets.append([product for _, product in bucket])
+        self._maxes = [keys[-1] for keys in self._key_buckets]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, product) -> bool:
+        return product in self._keys
+
+    def add(self, product: Product) -> None:
+        """
+        index a product
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            if product in self._keys:
+                return
+            key = self._keys[product] = (
+                product._price,
+                next(self._sequence),
+            )
+            self._insert(key, product)
+
+    def discard(self, product: Product) -> None:
+        """
+        drop a product from the index if it is in it
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            key = self._keys.pop(product, None)
+            if key is not None:
+                self._delete(key)
+
+    def reprice(self, product: Product) -> None:
+        """
+        move a product to its new price, a no-op when the price did not
+        change so stock changes only pay for one lookup
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        key = self._keys.get(product)
+        if key is None or key[0] == product._price:
+            return
+        with self._lock:
+            key = self._keys[product]
+            self._delete(key)
+            key = self._keys[product] = (product._price, key[1])
+            self._insert(key, product)
+
+    def between(
+        self,
+        min_price: float = None,
+        max_price: float = None,
+        active_only: bool = False,
+    ) -> list[Product]:
+        """
+        the products with min_price <= price <= max_price, cheapest first
+        :param min_price: no lower bound when None
+        :type min_price: float
+        :param max_price: no upper bound when None
+        :type max_price: float
+        :param active_only: only active products
+        :type active_only: bool
+        :return:
+        :rtype: list[Product]
+        """
+        with self._lock:
+            buckets = len(self._maxes)
+            first, start = 0, 0
+            if min_price is not None:
+                first = bisect_left(self._maxes, (min_price,))
+                if first < buckets:
+                    start = bisect_left(self._key_buckets[first], (min_price,))
+            last = buckets - 1
+            if max_price is not None:
+                last = bisect_right(self._maxes, (max_price, math.inf))
+                if last == buckets:
+                    last -= 1
+            if first > last:
+                return []
+            end = len(self._key_buckets[last])
+            if max_price is not None:
+                end = bisect_right(
+                    self._key_buckets[last], (max_price, math.inf)
+                )
+            if first == last:
+                products = self._product_buckets[first][start:end]
+            else:
+                products = self._product_buckets[first][start:]
+                for bucket in islice(self._product_buckets, first + 1, last):
+                    products.extend(bucket)
+                products.extend(self._product_buckets[last][:end])
+        if active_only:
+            products = [product for product in products if product._active]
+        return products
+
+    def cheapest(self, n: int, active_only: bool = False) -> list[Product]:
+        """
+        the n cheapest products, cheapest first
+        :param n:
+        :type n: int
+        :param active_only: only active products
+        :type active_only: bool
+        :return:
+        :rtype: list[Product]
+        """
+        with self._lock:
+            products = chain.from_iterable(self._product_buckets)
+            return self._take(products, n, active_only)
+
+    def most_expensive(
+        self, n: int, active_only: bool = False
+    ) -> list[Product]:
+        """
+        the n most expensive products, most expensive first
+        :param n:
+        :type n: int
+        :param active_only: only active products
+        :type active_only: bool
+        :return:
+        :rtype: list[Product]
+        """
+        with self._lock:
+            products = chain.from_iterable(
+                map(reversed, reversed(self._product_buckets))
+            )
+            return self._take(products, n, active_only)
+
+    # private methods
+    @staticmethod
+    def _take(
+        products: Iterator[Product], n: int, active_only: bool
+    ) -> list[Product]:
+        """
+        take the first n (active) products
+        :param products:
+        :type products:
+        :param n:
+        :type n:
+        :param active_only:
+        :type active_only:
+        :return:
+        :rtype:
+        """
+        if active_only:
+            products = (product for product in products if product._active)
+        return list(islice(products, n))
+
+    def _insert(self, key: tuple[float, int], product: Product) -> None:
+        """
+        put a key and its product in place, a bucket that grew to twice
+        its size is split; the caller holds the lock
+        :param key:
+        :type key:
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        if not self._maxes:
+            self._key_buckets.append([key])
+            self._product_buckets.append([product])
+            self._maxes.append(key)
+            return
+        bucket = min(bisect_left(self._maxes, key), len(self._maxes) - 1)
+        keys = self._key_buckets[bucket]
+        products = self._product_buckets[bucket]
+        position = bisect_left(keys, key)
+        keys.insert(position, key)
+        products.insert(position, product)
+        self._maxes[bucket] = keys[-1]
+        if len(keys) >= 2 * PRICE_BUCKET_SIZE:
+            next_bucket = bucket + 1
+            self._key_buckets.insert(next_bucket, keys[PRICE_BUCKET_SIZE:])
+            self._product_buckets.insert(
+                next_bucket, products[PRICE_BUCKET_SIZE:]
+            )
+            del keys[PRICE_BUCKET_SIZE:]
+            del products[PRICE_BUCKET_SIZE:]
+            self._maxes.insert(bucket, keys[-1])
+
+    def _delete(self, key: tuple[float, int]) -> None:
+        """
+        take a key and its product out, an empty bucket is dropped; the
+        caller holds the lock
+        :param key:
+        :type key:
+        :return:
+        :rtype:
+        """
+        bucket = bisect_left(self._maxes, key)
+        keys = self._key_buckets[bucket]
+        position = bisect_left(keys, key)
+        del keys[position]
+        del self._product_buckets[bucket][position]
+        if keys:
+            self._maxes[bucket] = keys[-1]
+        else:
+            del self._key_buckets[bucket]
+            del self._product_buckets[bucket]
+            del self._maxes[bucket]
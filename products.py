@@ -6,10 +6,134 @@ Non Stocked contain items that have no physical presence in the store
 """
 
 # imports
+from bisect import insort
+from functools import cache, wraps
+import threading
+
+from cents import to_cents
 from promotions import Promotions
 
+# every product without promotions shares this empty tuple, the promotions
+# getter swaps in a private PromotionList the first time it is asked for
+_NO_PROMOTIONS = ()
+
+# watchers and caches are not pickled
+_TRANSIENT_SLOTS = ("_watchers", "_pricing", "_display")
+
+
+@cache
+def _state_slots(cls: type) -> tuple:
+    """
+    the slots of a product class that are pickled, looked up once per class
+    :param cls:
+    :type cls:
+    :return:
+    :rtype:
+    """
+    return tuple(
+        slot
+        for klass in cls.__mro__
+        for slot in getattr(klass, "__slots__", ())
+        if slot not in _TRANSIENT_SLOTS
+    )
+
+
+# lock striping for stock changes: a product maps to one of a fixed set of
+# locks, checkouts on products in different stripes run in parallel
+LOCK_STRIPES = 64
+_STOCK_LOCKS = tuple(threading.Lock() for _ in range(LOCK_STRIPES))
+
+
+def stock_lock(product) -> threading.Lock:
+    """
+    the lock guarding the stock of a product
+    :param product:
+    :type product:
+    :return:
+    :rtype:
+    """
+    return _STOCK_LOCKS[hash(product) % LOCK_STRIPES]
+
+
+def stock_locks(products) -> list[threading.Lock]:
+    """
+    the locks guarding the stock of several products, deduplicated and in
+    stripe order, acquire them in this order to avoid deadlocks
+    :param products:
+    :type products:
+    :return:
+    :rtype:
+    """
+    stripes = sorted({hash(product) % LOCK_STRIPES for product in products})
+    return [_STOCK_LOCKS[stripe] for stripe in stripes]
+
+
+def _notifying(method):
+    """
+    wrap a list method of PromotionList so a change of the list is passed
+    on to the product
+    :param method:
+    :type method:
+    :return:
+    :rtype:
+    """
+
+    @wraps(method)
+    def notifying(self, *args):
+        old_promotions = tuple(self)
+        result = method(self, *args)
+        if self._product is not None:
+            self._product._promotions_replaced(old_promotions)
+        return result
+
+    return notifying
+
+
+class PromotionList(list):
+    """
+    the promotions list handed out by Product.promotions, every change
+    made through it drops the compiled pricing of the product and tells
+    its watchers, so the list can be appended to like a plain list
+    """
+
+    __slots__ = ("_product",)
+
+    def __init__(self, product, promotions=()) -> None:
+        super().__init__(promotions)
+        self._product = product
+
+    def __reduce__(self):
+        # pickled and copied as a plain list, without the product
+        return list, (list(self),)
+
+    append = _notifying(list.append)
+    extend = _notifying(list.extend)
+    insert = _notifying(list.insert)
+    remove = _notifying(list.remove)
+    pop = _notifying(list.pop)
+    clear = _notifying(list.clear)
+    sort = _notifying(list.sort)
+    reverse = _notifying(list.reverse)
+    __setitem__ = _notifying(list.__setitem__)
+    __delitem__ = _notifying(list.__delitem__)
+    __iadd__ = _notifying(list.__iadd__)
+    __imul__ = _notifying(list.__imul__)
+
 
 class Product:
+    # no per instance __dict__, a catalog holds millions of these
+    __slots__ = (
+        "_name",
+        "_price",
+        "_quantity",
+        "_active",
+        "_promotions",
+        "_watchers",
+        "_pricing",
+        "_version",
+        "_display",
+    )
+
     def __init__(
         self,
         name: str,
@@ -33,23 +157,29 @@ class Product:
         Product._validate_price(price)
         Product._validate_quantity(quantity)
 
-        self.name = name
-        self.price = round(float(price), 2)
+        self._name = name
+        self._price = round(float(price), 2)
         self._quantity = quantity
         self._active = active
-        self._promotions = promotions if promotions is not None else []
+        self._promotions = (
+            promotions if promotions is not None else _NO_PROMOTIONS
+        )
+        self._watchers = ()
+        self._pricing = None
+        self._version = 0
+        self._display = None
 
     def __str__(self):
         """
         refactored in bonus step to use str instead of show method
+        the line is rendered once and cached until the product changes
         :return:
         :rtype:
         """
-        promotion_text = self.create_promotion_text()
-        return (
-            f"{self.name.ljust(30)} - {str(self.price).ljust(6)} - {str(self.product_quantity).ljust(6)}\n"  # noqa E501
-            + promotion_text  # noqa E501
-        )
+        display = self._display
+        if display is None:
+            display = self._display = self._render()
+        return display
 
     def __gt__(self, other):
         """
@@ -75,6 +205,87 @@ class Product:
             return NotImplemented
         return self.price < other.price
 
+    def __getstate__(self) -> dict:
+        """
+        pickle the product without its watchers and caches, a copy sent
+        to another process belongs to no store yet
+        :return:
+        :rtype:
+        """
+        return {slot: getattr(self, slot) for slot in _state_slots(type(self))}
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        restore a pickled product, the caches are rebuilt on first use
+        :param state:
+        :type state:
+        :return:
+        :rtype:
+        """
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        if not self._promotions:
+            self._promotions = _NO_PROMOTIONS
+        self._watchers = ()
+        self._pricing = None
+        self._display = None
+
+    @property
+    def name(self) -> str:
+        """
+        get the name of the product
+        :return:
+        :rtype:
+        """
+        return self._name
+
+    @name.setter
+    def name(self, name: str) -> None:
+        """
+        set the name of the product
+        :param name:
+        :type name:
+        :return:
+        :rtype:
+        """
+        old_name = self._name
+        self._name = name
+        self._display = None
+        for watcher in self._watchers:
+            watcher._product_renamed(self, old_name)
+
+    @property
+    def price(self) -> float:
+        """
+        get the price of the product
+        :return:
+        :rtype:
+        """
+        return self._price
+
+    @price.setter
+    def price(self, price: float) -> None:
+        """
+        set the price of the product
+        :param price:
+        :type price:
+        :return:
+        :rtype:
+        """
+        self._changing()
+        self._price = price
+        self._version += 1
+        self._changed()
+
+    @property
+    def price_cents(self) -> int:
+        """
+        the price in integer cents, for the cents pricing
+        :return:
+        :rtype:
+        """
+        return to_cents(self._price)
+
     @property
     def product_quantity(self) -> int:
         """
@@ -95,7 +306,9 @@ class Product:
         """
         if quantity < 0:
             raise ValueError("Quantity should be a positive integer")
+        self._changing()
         self._quantity = quantity
+        self._changed()
 
     @property
     def is_active(self) -> bool:
@@ -110,7 +323,9 @@ class Product:
     def is_active(self, _active: bool) -> None:
         if not isinstance(_active, bool):
             raise ValueError("Active should be a boolean")
+        self._changing()
         self._active = _active
+        self._changed()
 
     @property
     def promotions(self) -> list[Promotions]:
@@ -119,7 +334,12 @@ class Product:
         :return:
         :rtype:
         """
-        return self._promotions
+        promotions = self._promotions
+        if type(promotions) is not PromotionList:
+            # loaded products hold a plain list, changes to the list handed
+            # out must reach the caches and the watchers
+            promotions = self._promotions = PromotionList(self, promotions)
+        return promotions
 
     @promotions.setter
     def promotions(self, promotions: list) -> None:
@@ -132,11 +352,55 @@ class Product:
         """
         if not isinstance(promotions, list):
             raise ValueError("Promotions should be a list")
-        self._promotions = promotions
+        old_promotions = self._promotions
+        if type(old_promotions) is PromotionList:
+            # a list handed out before no longer belongs to the product
+            old_promotions._product = None
+        # copied, the caller's list stays theirs
+        self._promotions = PromotionList(self, promotions)
+        self._promotions_replaced(old_promotions)
+
+    @property
+    def pricing(self):
+        """
+        the promotion chain compiled into one callable
+        pricing(current_total, basket_quantity) returns the total after all
+        promotions, it is compiled on first use and kept until the
+        promotions change
+        :return:
+        :rtype:
+        """
+        pricing = self._pricing
+        if pricing is None:
+            pricing = self._pricing = self._compile_pricing()
+        return pricing
+
+    def quote_cents(
+        self, basket_quantity: int, subtotal: int = None
+    ) -> tuple[int, int]:
+        """
+        quote a basket line in integer cents, the promotions run on
+        integers one after the other like the pricing chain
+        :param basket_quantity:
+        :type basket_quantity: int
+        :param subtotal: in cents, the price times the quantity when None
+        :type subtotal: int
+        :return: (subtotal, total after promotions) in cents
+        :rtype:
+        """
+        if subtotal is None:
+            subtotal = to_cents(self._price) * basket_quantity
+        total = subtotal
+        if not self._promotions:
+            return subtotal, total
+        for promotion in self._promotions:
+            if isinstance(promotion, Promotions):
+                total = promotion.apply_promotion_cents(total, basket_quantity)
+        return subtotal, total
 
     def create_promotion_text(self) -> str:
         """create promotion text"""
-        return " - ".join(str(promotion) for promotion in self.promotions)
+        return " - ".join(str(promotion) for promotion in self._promotions)
 
     # public methods
     def add_promotion(self, promotion: Promotions) -> None:
@@ -149,10 +413,7 @@ class Product:
         """
         if not isinstance(promotion, Promotions):
             raise ValueError("Promotion must be a valid promotion object")
-        if promotion not in self.promotions:
-            self.promotions.append(promotion)
-            self.promotions.sort(key=lambda promo: str(promo))
-        else:
+        if not self._attach_promotion(promotion):
             print(f"Promotion already applied to {self.name}")
 
     def remove_promotion(self, promotion: Promotions) -> None:
@@ -165,9 +426,7 @@ class Product:
         """
         if not isinstance(promotion, Promotions):
             raise ValueError("Promotion must be a valid promotion object")
-        if promotion in self.promotions:
-            self.promotions.remove(promotion)
-        else:
+        if not self._detach_promotion(promotion):
             print(f"Promotion was not applied to {self.name}")
 
     def activate(self) -> None:
@@ -192,6 +451,14 @@ class Product:
         :return:
         :rtype:
         """
+        return str(self)
+
+    def _render(self) -> str:
+        """
+        build the display line, overridden by the child classes
+        :return:
+        :rtype:
+        """
         promotion_text = self.create_promotion_text()
         return (
             f"{self.name.ljust(30)} - {str(self.price).ljust(6)} - {str(self.product_quantity).ljust(6)}\n"  # noqa E501
@@ -207,12 +474,160 @@ class Product:
         :rtype:
         """
         self._validate_quantity(quantity_to_buy)
-        if self.product_quantity < quantity_to_buy:
-            raise ValueError("Not enough _quantity")
-        self.product_quantity -= quantity_to_buy
+        # check and take the stock in one step for concurrent buyers
+        with stock_lock(self):
+            if self.product_quantity < quantity_to_buy:
+                raise ValueError("Not enough _quantity")
+            self.product_quantity -= quantity_to_buy
         return round(self.price * quantity_to_buy, 2)
 
     # private methods
+    def _compile_pricing(self):
+        """
+        build the pricing callable for the current promotion chain
+        :return:
+        :rtype:
+        """
+        steps = tuple(
+            promotion.apply_promotion
+            for promotion in self._promotions
+            if isinstance(promotion, Promotions)
+        )
+        if not steps:
+            return _without_promotions
+        if len(steps) == 1:
+            return steps[0]
+
+        def pricing(current_total, basket_quantity):
+            for step in steps:
+                current_total = step(current_total, basket_quantity)
+            return current_total
+
+        return pricing
+
+    def _attach_promotion(self, promotion: Promotions) -> bool:
+        """
+        add a promotion without a message, for bulk changes
+        :param promotion:
+        :type promotion:
+        :return: False when it was already applied
+        :rtype:
+        """
+        if promotion in self._promotions:
+            return False
+        # the list is kept sorted, insort keeps the order a full sort
+        # after an append would give
+        insort(self.promotions, promotion, key=str)
+        return True
+
+    def _detach_promotion(self, promotion: Promotions) -> bool:
+        """
+        remove a promotion without a message, for bulk changes
+        :param promotion:
+        :type promotion:
+        :return: False when it was not applied
+        :rtype:
+        """
+        if promotion not in self._promotions:
+            return False
+        self.promotions.remove(promotion)
+        return True
+
+    def _promotions_changed(self) -> None:
+        """
+        drop the compiled pricing and the display line and bump the
+        version stamp
+        :return:
+        :rtype:
+        """
+        self._pricing = None
+        self._display = None
+        self._version += 1
+
+    def _promotions_replaced(self, old_promotions) -> None:
+        """
+        the promotions list changed, drop the caches and tell the watchers
+        which promotions were added and removed
+        :param old_promotions: the promotions before the change
+        :type old_promotions:
+        :return:
+        :rtype:
+        """
+        promotions = self._promotions
+        self._promotions_changed()
+        self._promoted(
+            tuple(
+                promotion
+                for promotion in promotions
+                if promotion not in old_promotions
+            ),
+            tuple(
+                promotion
+                for promotion in old_promotions
+                if promotion not in promotions
+            ),
+        )
+
+    def _watch(self, watcher) -> None:
+        """
+        register a watcher, e.g. a store listing this product
+        watchers get _product_changing(product) before and
+        _product_changed(product) after the price, quantity or active state
+        change, _product_renamed(product, old_name) after a new name and
+        _product_promoted(product, added, removed) after promotions were
+        added or removed
+        :param watcher:
+        :type watcher:
+        :return:
+        :rtype:
+        """
+        self._watchers = self._watchers + (watcher,)
+
+    def _unwatch(self, watcher) -> None:
+        """
+        remove a watcher registered with _watch
+        :param watcher:
+        :type watcher:
+        :return:
+        :rtype:
+        """
+        watchers = list(self._watchers)
+        watchers.remove(watcher)
+        self._watchers = tuple(watchers)
+
+    def _changing(self) -> None:
+        """
+        tell the watchers this product is about to change
+        :return:
+        :rtype:
+        """
+        for watcher in self._watchers:
+            watcher._product_changing(self)
+
+    def _promoted(self, added: tuple, removed: tuple) -> None:
+        """
+        tell the watchers promotions were added to / removed from this
+        product
+        :param added:
+        :type added:
+        :param removed:
+        :type removed:
+        :return:
+        :rtype:
+        """
+        for watcher in self._watchers:
+            watcher._product_promoted(self, added, removed)
+
+    def _changed(self) -> None:
+        """
+        drop the display line and tell the watchers this product changed
+        :return:
+        :rtype:
+        """
+        self._display = None
+        for watcher in self._watchers:
+            watcher._product_changed(self)
+
     @staticmethod
     def _validate_name(name: str) -> bool:
         """
@@ -253,27 +668,29 @@ class Product:
         return True
 
 
+def _without_promotions(current_total, basket_quantity):
+    """
+    pricing callable for products without promotions
+    :param current_total:
+    :type current_total:
+    :param basket_quantity:
+    :type basket_quantity:
+    :return:
+    :rtype:
+    """
+    return current_total
+
+
 class NonStockedProducts(Product):
+    __slots__ = ()
 
     def __init__(self, name: str, price: float, active: bool = True) -> None:
         super().__init__(name, price, active)
         self._quantity = 0
 
-    def __str__(self):
-        """
-        customized str override for show method
-        :return:
-        :rtype:
-        """
-        promotion_text = self.create_promotion_text()
-        return (
-            f"{self.name.ljust(30)} - {str(self.price).ljust(6)} - On Demand\n"
-            + promotion_text
-        )  # noqa E501
-
-    def show(self) -> str:
+    def _render(self) -> str:
         """
-        show the product details
+        customized display line, there is no stock to show
         :return:
         :rtype:
         """
@@ -285,6 +702,7 @@ class NonStockedProducts(Product):
 
 
 class LimitedProducts(Product):
+    __slots__ = ("_maximum",)
 
     def __init__(
         self,
@@ -295,28 +713,37 @@ class LimitedProducts(Product):
         maximum: int = 1,
     ) -> None:
         super().__init__(name, price, quantity, active)
-        self.maximum = maximum
+        self._maximum = maximum
 
-    def __str__(self):
+    @property
+    def maximum(self) -> int:
         """
-        override str method
+        get the maximum per order
         :return:
         :rtype:
         """
-        promotion_text = self.create_promotion_text()
-        return (
-            f"{self.name.ljust(30)} - {str(self.price).ljust(6)} - {str(self.product_quantity).ljust(6)}(Max per order:{self.maximum})\n"  # noqa E501
-            + promotion_text
-        )
+        return self._maximum
 
-    def show(self) -> str:
+    @maximum.setter
+    def maximum(self, maximum: int) -> None:
         """
-        show the product details
+        set the maximum per order
+        :param maximum:
+        :type maximum:
+        :return:
+        :rtype:
+        """
+        self._maximum = maximum
+        self._display = None
+
+    def _render(self) -> str:
+        """
+        display line with the maximum per order
         :return:
         :rtype:
         """
         promotion_text = self.create_promotion_text()
         return (
             f"{self.name.ljust(30)} - {str(self.price).ljust(6)} - {str(self.product_quantity).ljust(6)}(Max per order:{self.maximum})\n"  # noqa E501
-            + promotion_text  # noqa E501
+            + promotion_text
         )
@@ -0,0 +1,121 @@
+"""
+promotion_index.py
+promotion index for the Store
+promotion -> the products using it, so campaign changes over a whole
+store only touch the products of the promotion
+"""
+
+# imports
+import threading
+from typing import Iterable
+
+from products import Product
+from promotions import Promotions
+
+
+class PromotionIndex:
+    """
+    promotion -> the products using it, the inverted index of the
+    promotions lists of the products of a store
+    """
+
+    def __init__(self, products: Iterable[Product] = ()) -> None:
+        """
+        index the promotions of the products
+        :param products:
+        :type products:
+        """
+        # a dict keeps the products of a promotion in order
+        self._products: dict[Promotions, dict[Product, None]] = {}
+        self._lock = threading.Lock()
+        for product in products:
+            self._link(product, product._promotions)
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def __contains__(self, promotion) -> bool:
+        return promotion in self._products
+
+    def products(self, promotion: Promotions) -> list[Product]:
+        """
+        the products using a promotion, O(k)
+        :param promotion:
+        :type promotion:
+        :return:
+        :rtype: list[Product]
+        """
+        with self._lock:
+            return list(self._products.get(promotion, ()))
+
+    def add(self, product: Product) -> None:
+        """
+        index the promotions of a product
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            self._link(product, product._promotions)
+
+    def discard(self, product: Product) -> None:
+        """
+        drop a product from the products of its promotions
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            self._unlink(product, product._promotions)
+
+    def update(self, product: Product, added: tuple, removed: tuple) -> None:
+        """
+        follow promotions added to / removed from a product
+        :param product:
+        :type product:
+        :param added:
+        :type added:
+        :param removed:
+        :type removed:
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            self._unlink(product, removed)
+            self._link(product, added)
+
+    # private methods
+    def _link(self, product: Product, promotions) -> None:
+        """
+        add a product to the products of promotions, the caller holds
+        the lock
+        :param product:
+        :type product:
+        :param promotions:
+        :type promotions:
+        :return:
+        :rtype:
+        """
+        for promotion in promotions:
+            self._products.setdefault(promotion, {})[product] = None
+
+    def _unlink(self, product: Product, promotions) -> None:
+        """
+        take a product out of the products of promotions, a promotion
+        without products is dropped; the caller holds the lock
+        :param product:
+        :type product:
+        :param promotions:
+        :type promotions:
+        :return:
+        :rtype:
+        """
+        for promotion in promotions:
+            products = self._products.get(promotion)
+            if products is None:
+                continue
+            products.pop(product, None)
+            if not products:
+                del self._products[promotion]
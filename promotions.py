@@ -6,6 +6,14 @@ that can be applied to shopping baskets to calculate discounts.
 
 # imports
 from abc import ABC, abstractmethod
+from array import array
+
+from cents import div_round, from_cents, percent_kept, to_cents
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
 
 
 # abstract parent class
@@ -59,6 +67,125 @@ class Promotions(ABC):
         """
         pass
 
+    def apply_promotion_cents(
+        self, current_total: int, basket_quantity: int
+    ) -> int:
+        """
+        apply the promotion to a total in integer cents, for the cents
+        pricing; the default goes through apply_promotion, the child
+        classes override it with integer maths
+        :param current_total: in cents
+        :type current_total: int
+        :param basket_quantity:
+        :type basket_quantity: int
+        :return: the new total in cents
+        :rtype: int
+        """
+        return to_cents(
+            self.apply_promotion(from_cents(current_total), basket_quantity)
+        )
+
+    def apply_promotion_batch(self, current_totals, basket_quantities):
+        """
+        apply the promotion to many (total, quantity) pairs at once
+        the default prices every pair with apply_promotion, the child
+        classes override it with column maths
+        :param current_totals: totals before the promotion
+        :type current_totals: sequence of float
+        :param basket_quantities: quantities, must be positive
+        :type basket_quantities: sequence of int
+        :return: the totals after the promotion, a numpy array when numpy
+        is installed, an array("d") otherwise
+        :rtype:
+        """
+        totals, quantities = _as_columns(current_totals, basket_quantities)
+        totals = map(
+            self.apply_promotion, totals.tolist(), quantities.tolist()
+        )
+        if np is not None:
+            return np.fromiter(totals, dtype=np.float64)
+        return array("d", totals)
+
+
+def apply_promotions_batch(promotions, current_totals, basket_quantities):
+    """
+    apply a chain of promotions in order to many (total, quantity) pairs,
+    the batch version of Store._calc_any_promotions
+    :param promotions:
+    :type promotions: list[Promotions]
+    :param current_totals:
+    :type current_totals: sequence of float
+    :param basket_quantities:
+    :type basket_quantities: sequence of int
+    :return:
+    :rtype:
+    """
+    totals, quantities = _as_columns(current_totals, basket_quantities)
+    for promotion in promotions:
+        if isinstance(promotion, Promotions):
+            totals = promotion.apply_promotion_batch(totals, quantities)
+    return totals
+
+
+def _as_columns(current_totals, basket_quantities):
+    """
+    turn the inputs into float / int columns, the quantities are checked
+    to be positive like the scalar path needs them
+    :param current_totals:
+    :type current_totals:
+    :param basket_quantities:
+    :type basket_quantities:
+    :return:
+    :rtype:
+    """
+    if np is not None:
+        totals = np.asarray(current_totals, dtype=np.float64)
+        quantities = np.asarray(basket_quantities, dtype=np.int64)
+        if (quantities < 1).any():
+            raise ValueError("Quantity should be a positive integer")
+        return totals, quantities
+    quantities = array("q", basket_quantities)
+    if quantities and min(quantities) < 1:
+        raise ValueError("Quantity should be a positive integer")
+    return array("d", current_totals), quantities
+
+
+# _round_batch rounds exactly below 2**53 cents
+_ROUND_BATCH_LIMIT = 2.0**53 / 100
+
+
+def _round_batch(values):
+    """
+    round a numpy column to 2 decimals exactly like round(value, 2)
+    round() works on the exact binary value, so value * 100 is split into
+    the rounded product and its exact error (Dekker's two product) and the
+    pair decides which side of the .5 the value is on; exact ties go to
+    the even cent like the builtin. The split is only exact below
+    _ROUND_BATCH_LIMIT, where value * 100 still has a fraction; larger
+    (and non finite) values are rounded one by one with the builtin
+    :param values:
+    :type values:
+    :return:
+    :rtype:
+    """
+    large = ~(np.abs(values) < _ROUND_BATCH_LIMIT)
+    if large.any():
+        rounded = np.where(large, 0.0, values)
+        rounded = _round_batch(rounded)
+        rounded[large] = [round(value, 2) for value in values[large].tolist()]
+        return rounded
+    scaled = values * 100
+    split = values * 134217729.0  # 2**27 + 1
+    high = split - (split - values)
+    low = values - high
+    error = (high * 100 - scaled) + low * 100
+    cents = np.floor(scaled)
+    above_half = (scaled - cents - 0.5) + error
+    ties = above_half == 0
+    cents += above_half > 0
+    cents[ties] += cents[ties] % 2
+    return cents / 100
+
 
 # child classes
 class SecondHalfPrice(Promotions):
@@ -113,6 +240,52 @@ class SecondHalfPrice(Promotions):
         )
         return total
 
+    def apply_promotion_cents(
+        self, current_total: int, basket_quantity: int
+    ) -> int:
+        """
+        integer version of apply_promotion: the full price items at the
+        item price and the others at half of it, divided once
+        :param current_total: in cents
+        :type current_total: int
+        :param basket_quantity:
+        :type basket_quantity: int
+        :return: the new total in cents
+        :rtype: int
+        """
+        discounted_items = basket_quantity // 2
+        full_price_items = basket_quantity - discounted_items
+        return div_round(
+            current_total
+            * (full_price_items * self.HALF_PRICE_DIVISOR + discounted_items),
+            basket_quantity * self.HALF_PRICE_DIVISOR,
+        )
+
+    def apply_promotion_batch(self, current_totals, basket_quantities):
+        """
+        column version of apply_promotion, same operations in the same
+        order so the results match the scalar path
+        :param current_totals:
+        :type current_totals:
+        :param basket_quantities:
+        :type basket_quantities:
+        :return:
+        :rtype:
+        """
+        if np is None:
+            return super().apply_promotion_batch(
+                current_totals, basket_quantities
+            )
+        totals, quantities = _as_columns(current_totals, basket_quantities)
+        price_per_item = totals / quantities
+        discounted_items = quantities // 2
+        full_price_items = quantities - discounted_items
+        full_price_total = full_price_items * price_per_item
+        discounted_total = (
+            discounted_items * price_per_item / self.HALF_PRICE_DIVISOR
+        )
+        return _round_batch(full_price_total + discounted_total)
+
 
 class ThirdOneFree(Promotions):
 
@@ -142,12 +315,49 @@ class ThirdOneFree(Promotions):
         total = round(current_total * full_price_items / basket_quantity, 2)
         return total
 
+    def apply_promotion_cents(
+        self, current_total: int, basket_quantity: int
+    ) -> int:
+        """
+        integer version of apply_promotion
+        :param current_total: in cents
+        :type current_total: int
+        :param basket_quantity:
+        :type basket_quantity: int
+        :return: the new total in cents
+        :rtype: int
+        """
+        free_items = basket_quantity // self.EVERY_N_FREE
+        full_price_items = basket_quantity - free_items
+        return div_round(current_total * full_price_items, basket_quantity)
+
+    def apply_promotion_batch(self, current_totals, basket_quantities):
+        """
+        column version of apply_promotion
+        :param current_totals:
+        :type current_totals:
+        :param basket_quantities:
+        :type basket_quantities:
+        :return:
+        :rtype:
+        """
+        if np is None:
+            return super().apply_promotion_batch(
+                current_totals, basket_quantities
+            )
+        totals, quantities = _as_columns(current_totals, basket_quantities)
+        free_items = quantities // self.EVERY_N_FREE
+        full_price_items = quantities - free_items
+        return _round_batch(totals * full_price_items / quantities)
+
 
 class PercentDiscount(Promotions):
 
     def __init__(self, description, percent):
         super().__init__(description)
         self.discount = percent / 100
+        # the exact share kept, for the cents pricing
+        self._kept = percent_kept(percent)
 
     def __str__(self):
         return f"Promotion: 03 {self.description}"
@@ -168,3 +378,36 @@ class PercentDiscount(Promotions):
         """
         total = round(current_total * (1 - self.discount), 2)
         return total
+
+    def apply_promotion_cents(
+        self, current_total: int, basket_quantity: int
+    ) -> int:
+        """
+        integer version of apply_promotion
+        :param current_total: in cents
+        :type current_total: int
+        :param basket_quantity: not used
+        :type basket_quantity: int
+        :return: the new total in cents
+        :rtype: int
+        """
+        return div_round(
+            current_total * self._kept.numerator, self._kept.denominator
+        )
+
+    def apply_promotion_batch(self, current_totals, basket_quantities):
+        """
+        column version of apply_promotion
+        :param current_totals:
+        :type current_totals:
+        :param basket_quantities:
+        :type basket_quantities:
+        :return:
+        :rtype:
+        """
+        if np is None:
+            return super().apply_promotion_batch(
+                current_totals, basket_quantities
+            )
+        totals, _ = _as_columns(current_totals, basket_quantities)
+        return _round_batch(totals * (1 - self.discount))
@@ -0,0 +1,193 @@
+"""
+quote_cache.py
+bounded LRU cache for line quotes
+a quote is (subtotal, total after promotions) for a product, a basket
+quantity and the subtotal of the line. The key holds the version stamp of
+the product, which is bumped when the price or the promotion chain
+changes, so stale quotes are never returned and simply age out of the
+cache.
+The promotions of a missed quote run through the pricing callable given
+by the caller, a store passes its _calc_any_promotions so a store
+overriding it is quoted with its own rule; a cache serves one store.
+"""
+
+# imports
+from collections import OrderedDict
+import threading
+from typing import Callable, Union
+
+from products import Product
+
+# types
+Quote = tuple[float, float]
+# (product, subtotal, basket_quantity) -> total after promotions
+Pricing = Callable[[Product, float, int], float]
+
+# marks the keys of quotes in integer cents
+CENTS = "cents"
+
+DEFAULT_MAXSIZE = 4096
+
+
+class QuoteCache:
+    """
+    LRU cache of quotes with hit / miss / eviction counters
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        """
+        initialise an empty cache
+        :param maxsize: number of quotes kept before the least recently
+        used one is evicted
+        :type maxsize: int
+        """
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise ValueError("Maxsize should be a positive integer")
+        self.maxsize = maxsize
+        self._quotes: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._quotes)
+
+    def quote(
+        self,
+        product: Product,
+        basket_quantity: int,
+        subtotal: float = None,
+        pricing: Pricing = None,
+    ) -> Quote:
+        """
+        quote a basket line, from the cache when possible
+        lines of products without promotions are not cached or counted
+        :param product:
+        :type product:
+        :param basket_quantity:
+        :type basket_quantity:
+        :param subtotal: the subtotal of the line, price * quantity when
+        None
+        :type subtotal:
+        :param pricing: applies the promotions on a miss, the compiled
+        chain of the product when None
+        :type pricing:
+        :return: (subtotal, total after promotions)
+        :rtype:
+        """
+        if subtotal is None:
+            subtotal = product.price * basket_quantity
+        if not product._promotions:
+            # nothing to save, the total is the subtotal
+            return subtotal, subtotal
+        key = (product, basket_quantity, product._version, subtotal)
+        quote = self._lookup(key)
+        if quote is None:
+            # priced outside the lock, a racing thread computes the same
+            # quote
+            if pricing is None:
+                total = product.pricing(subtotal, basket_quantity)
+            else:
+                total = pricing(product, subtotal, basket_quantity)
+            quote = (subtotal, total)
+            self._store(key, quote)
+        return quote
+
+    def quote_cents(
+        self,
+        product: Product,
+        basket_quantity: int,
+        subtotal: int = None,
+        pricing: Pricing = None,
+    ) -> Quote:
+        """
+        quote a basket line in integer cents for the cents pricing, kept
+        in the same cache as the float quotes
+        :param product:
+        :type product:
+        :param basket_quantity:
+        :type basket_quantity:
+        :param subtotal: the subtotal of the line in cents,
+        price_cents * quantity when None
+        :type subtotal: int
+        :param pricing: applies the promotions in cents on a miss, the
+        integer chain of the product when None
+        :type pricing:
+        :return: (subtotal, total after promotions) in cents
+        :rtype:
+        """
+        if subtotal is None:
+            subtotal = product.price_cents * basket_quantity
+        if not product._promotions:
+            return subtotal, subtotal
+        key = (CENTS, product, basket_quantity, product._version, subtotal)
+        quote = self._lookup(key)
+        if quote is None:
+            if pricing is None:
+                quote = product.quote_cents(basket_quantity, subtotal)
+            else:
+                quote = (subtotal, pricing(product, subtotal, basket_quantity))
+            self._store(key, quote)
+        return quote
+
+    def _lookup(self, key: tuple) -> Union[None, Quote]:
+        """
+        get a cached quote and count the hit or miss
+        :param key:
+        :type key:
+        :return:
+        :rtype:
+        """
+        quotes = self._quotes
+        with self._lock:
+            quote = quotes.get(key)
+            if quote is not None:
+                quotes.move_to_end(key)
+                self.hits += 1
+                return quote
+            self.misses += 1
+        return None
+
+    def _store(self, key: tuple, quote: Quote) -> None:
+        """
+        cache a quote, evicting the least recently used one when full
+        :param key:
+        :type key:
+        :param quote:
+        :type quote:
+        :return:
+        :rtype:
+        """
+        quotes = self._quotes
+        with self._lock:
+            quotes[key] = quote
+            if len(quotes) > self.maxsize:
+                quotes.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        counters of the cache
+        :return:
+        :rtype:
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._quotes),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self) -> None:
+        """
+        drop all quotes and reset the counters
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            self._quotes.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
@@ -0,0 +1,109 @@
+"""
+receipts.py
+structured results for orders placed without the interactive prompts
+Receipt collects the priced lines of one basket and the lines that could
+not be filled
+"""
+
+# imports
+from dataclasses import dataclass, field
+from typing import Union
+
+from cents import from_cents
+
+
+@dataclass
+class ReceiptLine:
+    """
+    one priced basket line
+    subtotal is price * quantity, total is the subtotal after promotions
+    the cents pricing also keeps both in integer cents
+    """
+
+    product_name: str
+    quantity: int
+    price: float
+    subtotal: float
+    total: float
+    subtotal_cents: Union[None, int] = None
+    total_cents: Union[None, int] = None
+
+    @property
+    def discount(self) -> float:
+        """
+        amount taken off the subtotal by promotions
+        :return:
+        :rtype:
+        """
+        if self.total_cents is not None:
+            return from_cents(self.subtotal_cents - self.total_cents)
+        return round(self.subtotal - self.total, 2)
+
+
+@dataclass
+class RejectedLine:
+    """
+    a basket line that was not filled and why
+    """
+
+    product_name: str
+    quantity: int
+    reason: str
+
+
+@dataclass
+class Receipt:
+    """
+    receipt for one basket
+    """
+
+    lines: list[ReceiptLine] = field(default_factory=list)
+    rejected: list[RejectedLine] = field(default_factory=list)
+
+    @property
+    def subtotal(self) -> float:
+        """
+        sum of the line subtotals before promotions
+        :return:
+        :rtype:
+        """
+        if self._in_cents():
+            return from_cents(sum(line.subtotal_cents for line in self.lines))
+        return sum(line.subtotal for line in self.lines)
+
+    @property
+    def discount(self) -> float:
+        """
+        sum of all promotion discounts
+        :return:
+        :rtype:
+        """
+        if self._in_cents():
+            return from_cents(
+                sum(
+                    line.subtotal_cents - line.total_cents
+                    for line in self.lines
+                )
+            )
+        return round(self.subtotal - self.total, 2)
+
+    @property
+    def total(self) -> float:
+        """
+        amount to pay, added up the same way as Store._order
+        :return:
+        :rtype:
+        """
+        if self._in_cents():
+            return from_cents(sum(line.total_cents for line in self.lines))
+        return sum(line.total for line in self.lines)
+
+    def _in_cents(self) -> bool:
+        """
+        check the lines were priced in cents, so they add up exactly
+        :return:
+        :rtype:
+        """
+        return bool(self.lines) and all(
+            line.total_cents is not None for line in self.lines
+        )
@@ -0,0 +1,590 @@
+"""
+snapshot.py
+memory mapped binary snapshots of a Store
+save_snapshot writes the catalog as fixed width columns (prices,
+quantities, maximums, flags), a string table for names and promotion
+descriptions and a name sorted row order. SnapshotStore maps the file and
+answers lookups and aggregates from the columns; a row only becomes a
+Product object when it is looked up by name, without running the
+validators again.
+Changes of loaded products are written through to the mapped columns, to
+the file itself when it is opened with write_back=True. Names and
+promotions are not written back, products added after opening live in
+memory only.
+"""
+
+# imports
+from array import array
+import mmap
+import struct
+import sys
+import threading
+from typing import Iterable, Union
+
+from products import Product, NonStockedProducts, LimitedProducts
+from promotions import (
+    Promotions,
+    PercentDiscount,
+    SecondHalfPrice,
+    ThirdOneFree,
+)
+from quote_cache import QuoteCache
+from store import LazyIndex, Store
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+MAGIC = b"BBSNAP01"
+# magic, byte order, products, promotions, promotion links, string bytes
+HEADER = struct.Struct("<8s8sQQQQ")
+
+# the kind is stored in the flags, the order must not change
+PRODUCT_KINDS = (Product, NonStockedProducts, LimitedProducts)
+PROMOTION_KINDS = (SecondHalfPrice, ThirdOneFree, PercentDiscount)
+
+ACTIVE = 0x01
+KIND_SHIFT = 1
+KIND_MASK = 0x06
+REMOVED = 0x08
+# promotion kind flag for a promotion without description
+NO_DESCRIPTION = 0x80
+
+# (name, typecode, length in rows) of every section after the header, the
+# length is per product ("n"), per product + 1 ("n+1"), per promotion
+# ("p", "p+1"), per link ("l") or per string byte ("s")
+SECTIONS = (
+    ("prices", "d", "n"),
+    ("quantities", "q", "n"),
+    ("maximums", "q", "n"),
+    ("name_offsets", "Q", "n+1"),
+    ("link_offsets", "Q", "n+1"),
+    ("order", "Q", "n"),
+    ("links", "Q", "l"),
+    ("percents", "d", "p"),
+    ("description_offsets", "Q", "p+1"),
+    ("flags", "B", "n"),
+    ("promotion_kinds", "B", "p"),
+    ("strings", "B", "s"),
+)
+
+
+def save_snapshot(store: Store, path: str) -> None:
+    """
+    write the products of a store to a snapshot file
+    :param store:
+    :type store:
+    :param path:
+    :type path:
+    :return:
+    :rtype:
+    """
+    products = store.products
+    columns = {name: array(typecode) for name, typecode, _ in SECTIONS[:-1]}
+    strings = bytearray()
+    descriptions = bytearray()
+    promotion_ids: dict[Promotions, int] = {}
+    name_bytes = []
+    columns["name_offsets"].append(0)
+    columns["link_offsets"].append(0)
+    columns["description_offsets"].append(0)
+    for product in products:
+        kind = PRODUCT_KINDS.index(type(product))
+        columns["prices"].append(product._price)
+        columns["quantities"].append(product._quantity)
+        columns["maximums"].append(getattr(product, "_maximum", 0))
+        columns["flags"].append(
+            (ACTIVE if product._active else 0) | kind << KIND_SHIFT
+        )
+        encoded = product._name.encode()
+        name_bytes.append(encoded)
+        strings += encoded
+        columns["name_offsets"].append(len(strings))
+        for promotion in product._promotions:
+            if not isinstance(promotion, Promotions):
+                continue
+            if promotion not in promotion_ids:
+                promotion_ids[promotion] = len(promotion_ids)
+                _add_promotion(columns, promotion, descriptions)
+            columns["links"].append(promotion_ids[promotion])
+        columns["link_offsets"].append(len(columns["links"]))
+    columns["order"].extend(
+        sorted(range(len(products)), key=lambda row: (name_bytes[row], row))
+    )
+    # the descriptions follow the names in the string table
+    columns["description_offsets"] = array(
+        "Q",
+        [offset + len(strings) for offset in columns["description_offsets"]],
+    )
+    strings += descriptions
+
+    with open(path, "wb") as file:
+        file.write(
+            HEADER.pack(
+                MAGIC,
+                sys.byteorder.encode().ljust(8),
+                len(products),
+                len(promotion_ids),
+                len(columns["links"]),
+                len(strings),
+            )
+        )
+        for name, _, _ in SECTIONS[:-1]:
+            _write_section(file, columns[name].tobytes())
+        _write_section(file, bytes(strings))
+
+
+def _add_promotion(
+    columns: dict, promotion: Promotions, descriptions: bytearray
+) -> None:
+    """
+    add a promotion to the promotion columns
+    :param columns:
+    :type columns:
+    :param promotion:
+    :type promotion:
+    :param descriptions: the encoded descriptions so far
+    :type descriptions:
+    :return:
+    :rtype:
+    """
+    if type(promotion) not in PROMOTION_KINDS:
+        raise ValueError(
+            f"Promotion {type(promotion).__name__} can not be saved"
+        )
+    kind = PROMOTION_KINDS.index(type(promotion))
+    if promotion.description is None:
+        kind |= NO_DESCRIPTION
+    descriptions += str(promotion.description or "").encode()
+    columns["promotion_kinds"].append(kind)
+    columns["percents"].append(
+        round(promotion.discount * 100, 10)
+        if isinstance(promotion, PercentDiscount)
+        else 0.0
+    )
+    columns["description_offsets"].append(len(descriptions))
+
+
+def _write_section(file, data: bytes) -> None:
+    """
+    write a section padded to 8 bytes so every column stays aligned
+    :param file:
+    :type file:
+    :param data:
+    :type data:
+    :return:
+    :rtype:
+    """
+    file.write(data)
+    file.write(b"\0" * (-len(data) % 8))
+
+
+class SnapshotStore(Store):
+    """
+    Store serving its catalog from a memory mapped snapshot
+    every row of the snapshot is one product object once it is loaded
+    """
+
+    def __init__(self, path: str, write_back: bool = False) -> None:
+        """
+        map a snapshot, no product is loaded
+        Store.__init__ is not called, it would replace the catalog with an
+        empty one
+        :param path:
+        :type path: str
+        :param write_back: write changes of loaded products to the file,
+        they only change the mapped copy otherwise
+        :type write_back: bool
+        """
+        self._writable = write_back
+        with open(path, "r+b" if write_back else "rb") as file:
+            self._mmap = mmap.mmap(
+                file.fileno(),
+                0,
+                access=mmap.ACCESS_WRITE if write_back else mmap.ACCESS_COPY,
+            )
+        self._map_columns()
+        self._rows: dict[Product, int] = {}
+        self._by_row: dict[int, Product] = {}
+        self._promotions_by_id: dict[int, Promotions] = {}
+        self._loaded_all = False
+        self._products: list[Product] = []
+        self._aggregate_lock = threading.Lock()
+        # loading a row is check then act on the row maps
+        self._load_lock = threading.RLock()
+        self.stores = {}
+        self.quote_cache = QuoteCache()
+        self._reindex()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def __reduce__(self):
+        """
+        a snapshot store is pickled as an in memory Store with the whole
+        catalog
+        :return:
+        :rtype:
+        """
+        return Store, (list(self.products),)
+
+    @property
+    def products(self) -> list[Product]:
+        """
+        get the products of the store, loads every row of the snapshot
+        :return:
+        :rtype:
+        """
+        self.load_all()
+        return super().products
+
+    @products.setter
+    def products(self, products: list[Product]) -> None:
+        """
+        replace the catalog, every row of the snapshot is removed
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        self._compact()
+        for product in self._products:
+            product._unwatch(self)
+        flags = self._flags
+        for row in range(self._count):
+            flags[row] |= REMOVED
+        self._rows = {}
+        self._by_row = {}
+        self._products = list(products)
+        self._loaded_all = True
+        self._reindex()
+
+    def add_products(self, products: Iterable[Product]) -> None:
+        """
+        add products to store, they are not written to the snapshot
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        products = list(products)
+        for product in products:
+            # a row of the same name keeps the index slot
+            self._index.get(getattr(product, "name", None))
+        super().add_products(products)
+
+    def remove_products(self, products: Iterable[Product]) -> None:
+        """
+        remove products from store and mark their rows removed
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        products = list(products)
+        super().remove_products(products)
+        for product in products:
+            if product in self:
+                continue
+            row = self._rows.pop(product, None)
+            if row is not None:
+                del self._by_row[row]
+                self._flags[row] |= REMOVED
+
+    def load_all(self) -> None:
+        """
+        load every row, products keep the snapshot order and products
+        added later follow them
+        :return:
+        :rtype:
+        """
+        if self._loaded_all:
+            return
+        with self._load_lock:
+            flags = self._flags
+            for row in range(self._count):
+                if not flags[row] & REMOVED and row not in self._by_row:
+                    self._materialize(row)
+            self._compact()
+            self._products.sort(key=lambda p: self._rows.get(p, self._count))
+            self._reposition()
+            self._loaded_all = True
+
+    def flush(self) -> None:
+        """
+        write the changed columns to the file, only with write_back
+        :return:
+        :rtype:
+        """
+        self._mmap.flush()
+
+    def close(self) -> None:
+        """
+        unmap the snapshot, loaded products stay usable
+        :return:
+        :rtype:
+        """
+        if self._mmap.closed:
+            return
+        for name, _, _ in SECTIONS:
+            getattr(self, f"_{name}").release()
+        self._view.release()
+        if self._writable:
+            self._mmap.flush()
+        self._mmap.close()
+
+    # private methods
+    def _map_columns(self) -> None:
+        """
+        check the header and cast a view on every section
+        :return:
+        :rtype:
+        """
+        mapped = self._mmap
+        if len(mapped) < HEADER.size:
+            raise ValueError("File is not a store snapshot")
+        magic, byteorder, products, promotions, links, string_bytes = (
+            HEADER.unpack_from(mapped)
+        )
+        if magic != MAGIC:
+            raise ValueError("File is not a store snapshot")
+        if byteorder.strip() != sys.byteorder.encode():
+            raise ValueError("Snapshot was written with another byte order")
+        lengths = {
+            "n": products,
+            "n+1": products + 1,
+            "p": promotions,
+            "p+1": promotions + 1,
+            "l": links,
+            "s": string_bytes,
+        }
+        sections = []
+        offset = HEADER.size
+        for name, typecode, length in SECTIONS:
+            size = lengths[length] * array(typecode).itemsize
+            sections.append((name, typecode, offset, offset + size))
+            offset += size + -size % 8
+        # a truncated file would map short columns
+        if len(mapped) < sections[-1][3]:
+            raise ValueError("File is not a store snapshot")
+        self._count = products
+        self._view = memoryview(mapped)
+        for name, typecode, start, end in sections:
+            setattr(self, f"_{name}", self._view[start:end].cast(typecode))
+
+    def _reindex(self) -> None:
+        """
+        rebuild the index over the loaded products, other names are found
+        in the snapshot on demand
+        :return:
+        :rtype:
+        """
+        super()._reindex()
+        self._index = LazyIndex(self._load, self._index)
+
+    def _recount(self) -> tuple[int, float, int, int]:
+        """
+        count the aggregates over the live rows and the products added
+        after opening
+        :return: total units, inventory value, active and out of stock
+        count
+        :rtype:
+        """
+        self._compact()
+        if np is not None:
+            totals = self._recount_numpy()
+        else:
+            totals = self._recount_rows()
+        total_units, inventory_value, active_count, out_of_stock = totals
+        for product in self._products:
+            if product in self._rows:
+                continue
+            quantity = product.product_quantity
+            total_units += quantity
+            inventory_value += product.price * quantity
+            active_count += product.is_active
+            if quantity == 0 and not isinstance(product, NonStockedProducts):
+                out_of_stock += 1
+        return total_units, inventory_value, active_count, out_of_stock
+
+    def _recount_rows(self) -> tuple[int, float, int, int]:
+        """
+        aggregates of the live rows
+        :return:
+        :rtype:
+        """
+        total_units = 0
+        inventory_value = 0.0
+        active_count = 0
+        out_of_stock = 0
+        non_stocked = PRODUCT_KINDS.index(NonStockedProducts) << KIND_SHIFT
+        for price, quantity, flag in zip(
+            self._prices, self._quantities, self._flags
+        ):
+            if flag & REMOVED:
+                continue
+            total_units += quantity
+            inventory_value += price * quantity
+            active_count += flag & ACTIVE
+            if quantity == 0 and flag & KIND_MASK != non_stocked:
+                out_of_stock += 1
+        return total_units, inventory_value, active_count, out_of_stock
+
+    def _recount_numpy(self) -> tuple[int, float, int, int]:
+        """
+        numpy version of _recount_rows
+        :return:
+        :rtype:
+        """
+        flags = np.frombuffer(self._flags, dtype=np.uint8)
+        live = (flags & REMOVED) == 0
+        prices = np.frombuffer(self._prices, dtype=np.float64)[live]
+        quantities = np.frombuffer(self._quantities, dtype=np.int64)[live]
+        flags = flags[live]
+        non_stocked = PRODUCT_KINDS.index(NonStockedProducts) << KIND_SHIFT
+        return (
+            int(quantities.sum()),
+            # summed in row order like the loop
+            float(sum((prices * quantities).tolist())),
+            int(np.count_nonzero(flags & ACTIVE)),
+            int(
+                np.count_nonzero(
+                    (quantities == 0) & ((flags & KIND_MASK) != non_stocked)
+                )
+            ),
+        )
+
+    def _name(self, row: int) -> bytes:
+        """
+        the encoded name of a row
+        :param row:
+        :type row:
+        :return:
+        :rtype:
+        """
+        start = self._name_offsets[row]
+        end = self._name_offsets[row + 1]
+        return self._strings[start:end].tobytes()
+
+    def _find_row(self, name: bytes) -> int:
+        """
+        position in the sorted order of the first row with the name
+        :param name:
+        :type name:
+        :return:
+        :rtype:
+        """
+        order = self._order
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(order[middle]) < name:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _load(self, name: str) -> Union[None, Product]:
+        """
+        load the first row of a name that is live and not loaded yet
+        :param name:
+        :type name:
+        :return:
+        :rtype:
+        """
+        if not isinstance(name, str):
+            return None
+        encoded = name.encode()
+        order = self._order
+        flags = self._flags
+        with self._load_lock:
+            if name in dict.keys(self._index):
+                return dict.__getitem__(self._index, name)
+            position = self._find_row(encoded)
+            while position < self._count:
+                row = order[position]
+                if self._name(row) != encoded:
+                    break
+                if not flags[row] & REMOVED and row not in self._by_row:
+                    product = self._materialize(row)
+                    return dict.setdefault(self._index, name, product)
+                position += 1
+        return None
+
+    def _materialize(self, row: int) -> Product:
+        """
+        turn a row into a product of the store, rows are trusted and are
+        not validated again
+        :param row:
+        :type row:
+        :return:
+        :rtype:
+        """
+        flag = self._flags[row]
+        cls = PRODUCT_KINDS[(flag & KIND_MASK) >> KIND_SHIFT]
+        first, last = self._link_offsets[row], self._link_offsets[row + 1]
+        state = {
+            "_name": self._name(row).decode(),
+            "_price": self._prices[row],
+            "_quantity": self._quantities[row],
+            "_active": bool(flag & ACTIVE),
+            "_promotions": [
+                self._promotion(self._links[link])
+                for link in range(first, last)
+            ],
+            "_version": 0,
+        }
+        if cls is LimitedProducts:
+            state["_maximum"] = self._maximums[row]
+        product = cls.__new__(cls)
+        product.__setstate__(state)
+        self._rows[product] = row
+        self._by_row[row] = product
+        self._list(product)
+        return product
+
+    def _promotion(self, promotion_id: int) -> Promotions:
+        """
+        get a promotion of the snapshot, products sharing a promotion in
+        the snapshot share the object once loaded
+        :param promotion_id:
+        :type promotion_id:
+        :return:
+        :rtype:
+        """
+        promotion = self._promotions_by_id.get(promotion_id)
+        if promotion is None:
+            kind = self._promotion_kinds[promotion_id]
+            description = None
+            if not kind & NO_DESCRIPTION:
+                start = self._description_offsets[promotion_id]
+                end = self._description_offsets[promotion_id + 1]
+                description = self._strings[start:end].tobytes().decode()
+            cls = PROMOTION_KINDS[kind & ~NO_DESCRIPTION]
+            if cls is PercentDiscount:
+                promotion = cls(description, self._percents[promotion_id])
+            else:
+                promotion = cls(description)
+            self._promotions_by_id[promotion_id] = promotion
+        return promotion
+
+    def _product_changed(self, product: Product) -> None:
+        """
+        watcher hook, write the change through to the mapped row
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        super()._product_changed(product)
+        row = self._rows.get(product)
+        if row is None or self._mmap.closed:
+            return
+        self._prices[row] = product._price
+        self._quantities[row] = product._quantity
+        flag = self._flags[row] & ~ACTIVE
+        self._flags[row] = flag | (ACTIVE if product._active else 0)
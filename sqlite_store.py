@@ -0,0 +1,602 @@
+"""
+sqlite_store.py
+Store persisted in a local SQLite file
+products live in the file and are only turned into Product objects when
+they are looked up by name (or all at once with load_all), so a store with
+millions of SKUs opens without reading the catalog. The aggregates are
+summed by SQLite on open and kept up to date in memory from then on.
+Changes of loaded products (stock taken by orders, new prices, names or
+active states) are collected and written back in batches; promotion
+changes are written with save().
+"""
+
+# imports
+import sqlite3
+import threading
+from typing import Iterable, Union
+
+from products import Product, NonStockedProducts, LimitedProducts
+from promotions import (
+    Promotions,
+    PercentDiscount,
+    SecondHalfPrice,
+    ThirdOneFree,
+)
+from quote_cache import QuoteCache
+from store import LazyIndex, Store
+
+# products changed before the changes are written back
+DEFAULT_FLUSH_EVERY = 1000
+
+PRODUCT_KINDS = {
+    cls.__name__: cls for cls in (Product, NonStockedProducts, LimitedProducts)
+}
+PROMOTION_KINDS = {
+    cls.__name__: cls
+    for cls in (SecondHalfPrice, ThirdOneFree, PercentDiscount)
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    quantity INTEGER NOT NULL,
+    active INTEGER NOT NULL,
+    maximum INTEGER
+);
+CREATE INDEX IF NOT EXISTS products_name ON products (name, id);
+CREATE TABLE IF NOT EXISTS promotions (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    description TEXT,
+    percent REAL
+);
+CREATE TABLE IF NOT EXISTS product_promotions (
+    product_id INTEGER NOT NULL,
+    promotion_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (product_id, position)
+);
+"""
+
+PRODUCT_COLUMNS = "id, kind, name, price, quantity, active, maximum"
+
+
+class SQLiteStore(Store):
+    """
+    Store backed by a SQLite file
+    every row of the file is one product object once it is loaded
+    """
+
+    def __init__(
+        self, path: str, flush_every: int = DEFAULT_FLUSH_EVERY
+    ) -> None:
+        """
+        open (or create) the store file, no product is loaded
+        Store.__init__ is not called, it would replace the catalog in the
+        file with an empty one
+        :param path: file name, ":memory:" for a throw away store
+        :type path: str
+        :param flush_every: changed products kept before they are written
+        :type flush_every: int
+        """
+        if not isinstance(flush_every, int) or flush_every < 1:
+            raise ValueError("Flush every should be a positive integer")
+        self.flush_every = flush_every
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        # orders may run in several threads, the file is used by one
+        self._db_lock = threading.RLock()
+        self._rowids: dict[Product, int] = {}
+        self._by_rowid: dict[int, Product] = {}
+        self._promotion_rows: dict[Promotions, int] = {}
+        self._promotions_by_row: dict[int, Promotions] = {}
+        self._dirty: set[Product] = set()
+        self._closed = False
+        self._loaded_all = False
+        self._products: list[Product] = []
+        self._aggregate_lock = threading.Lock()
+        self.stores = {}
+        self.quote_cache = QuoteCache()
+        self._reindex()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def __reduce__(self):
+        """
+        a SQLite store is pickled (e.g. for the pricing pool) as an in
+        memory Store with the whole catalog
+        :return:
+        :rtype:
+        """
+        return Store, (list(self.products),)
+
+    @property
+    def products(self) -> list[Product]:
+        """
+        get the products of the store, loads every product of the file
+        :return:
+        :rtype:
+        """
+        self.load_all()
+        return super().products
+
+    @products.setter
+    def products(self, products: list[Product]) -> None:
+        """
+        replace the catalog in the file with the products
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        self._compact()
+        for product in self._products:
+            product._unwatch(self)
+        with self._db_lock, self._connection:
+            self._connection.execute("DELETE FROM product_promotions")
+            self._connection.execute("DELETE FROM products")
+            self._connection.execute("DELETE FROM promotions")
+        self._forget()
+        self._products = list(products)
+        self._insert(products)
+        self._loaded_all = True
+        self._reindex()
+
+    def add_products(self, products: Iterable[Product]) -> None:
+        """
+        add products to the store and write them to the file
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        products = list(products)
+        seen = set()
+        for product in products:
+            if product in self._rowids or product in seen:
+                raise ValueError("Product is already in the store")
+            seen.add(product)
+            # a product of the same name in the file keeps the index slot
+            self._index.get(getattr(product, "name", None))
+        super().add_products(products)
+        self._insert(products)
+
+    def remove_products(self, products: Iterable[Product]) -> None:
+        """
+        remove products from the store and the file
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        products = list(products)
+        super().remove_products(products)
+        rowids = []
+        for product in products:
+            rowid = self._rowids.pop(product)
+            del self._by_rowid[rowid]
+            self._dirty.discard(product)
+            rowids.append((rowid,))
+        with self._db_lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM product_promotions WHERE product_id = ?", rowids
+            )
+            self._connection.executemany(
+                "DELETE FROM products WHERE id = ?", rowids
+            )
+
+    def save_products(self, products: Iterable[Product]) -> None:
+        """
+        bulk write products to the file without keeping them loaded
+        the store gets its own objects for them when they are looked up
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        batch = []
+        for product in products:
+            if not isinstance(product, Product):
+                raise ValueError("Product should be an instance of Product")
+            self._account(product, 1)
+            batch.append(product)
+            if len(batch) >= self.flush_every:
+                self._write_new(batch)
+                batch = []
+        self._write_new(batch)
+        self._loaded_all = False
+        # rebuilt with the saved products on the next query
+        self._price_index = None
+        self._name_search = None
+        self._promotion_index = None
+
+    def load_all(self) -> None:
+        """
+        load every product of the file, in the order they were added
+        :return:
+        :rtype:
+        """
+        if self._loaded_all:
+            return
+        with self._db_lock:
+            rows = self._connection.execute(
+                f"SELECT {PRODUCT_COLUMNS} FROM products ORDER BY id"
+            ).fetchall()
+            links = self._links()
+            for row in rows:
+                if row[0] not in self._by_rowid:
+                    self._materialize(row, links.get(row[0], []))
+        self._compact()
+        self._products.sort(key=self._rowids.__getitem__)
+        self._reposition()
+        self._loaded_all = True
+
+    def flush(self) -> None:
+        """
+        write the changed products back to the file
+        :return:
+        :rtype:
+        """
+        with self._db_lock:
+            dirty = list(self._dirty)
+            self._dirty.clear()
+            if not dirty:
+                return
+            rowids = self._rowids
+            with self._connection:
+                self._connection.executemany(
+                    "UPDATE products SET name = ?, price = ?, quantity = ?, "
+                    "active = ?, maximum = ? WHERE id = ?",
+                    [
+                        (*self._row(product)[1:], rowids[product])
+                        for product in dirty
+                    ],
+                )
+
+    def save(self) -> None:
+        """
+        write every loaded product back, including its promotions
+        :return:
+        :rtype:
+        """
+        with self._db_lock:
+            self._dirty.clear()
+            products = list(self._rowids)
+            with self._connection:
+                self._connection.executemany(
+                    "UPDATE products SET name = ?, price = ?, quantity = ?, "
+                    "active = ?, maximum = ? WHERE id = ?",
+                    [
+                        (*self._row(product)[1:], rowid)
+                        for product, rowid in self._rowids.items()
+                    ],
+                )
+                self._connection.executemany(
+                    "DELETE FROM product_promotions WHERE product_id = ?",
+                    [(self._rowids[product],) for product in products],
+                )
+                self._write_links(products)
+
+    def close(self) -> None:
+        """
+        write the changes back and close the file, loaded products stay
+        usable but their changes are no longer written
+        :return:
+        :rtype:
+        """
+        with self._db_lock:
+            if self._closed:
+                return
+            self.flush()
+            self._connection.close()
+            self._closed = True
+
+    # private methods
+    def _reindex(self) -> None:
+        """
+        rebuild the index over the loaded products, other names are loaded
+        on demand
+        :return:
+        :rtype:
+        """
+        super()._reindex()
+        self._index = LazyIndex(self._load, self._index)
+
+    def _recount(self) -> tuple[int, float, int, int]:
+        """
+        sum the aggregates over the file
+        :return: total units, inventory value, active and out of stock
+        count
+        :rtype:
+        """
+        self.flush()
+        with self._db_lock:
+            total_units, inventory_value, active_count, out_of_stock = (
+                self._connection.execute(
+                    "SELECT TOTAL(quantity), TOTAL(price * quantity), "
+                    "TOTAL(active), TOTAL(quantity = 0 AND kind != ?) "
+                    "FROM products",
+                    (NonStockedProducts.__name__,),
+                ).fetchone()
+            )
+        return (
+            int(total_units),
+            inventory_value,
+            int(active_count),
+            int(out_of_stock),
+        )
+
+    def _forget(self) -> None:
+        """
+        drop the row and promotion bookkeeping
+        :return:
+        :rtype:
+        """
+        self._rowids = {}
+        self._by_rowid = {}
+        self._promotion_rows = {}
+        self._promotions_by_row = {}
+        self._dirty = set()
+
+    def _load(self, name: str) -> Union[None, Product]:
+        """
+        load the first product of a name that is not loaded yet
+        loaded products are indexed already, their rows may hold an old
+        name until they are flushed
+        :param name:
+        :type name:
+        :return:
+        :rtype:
+        """
+        if not isinstance(name, str):
+            return None
+        with self._db_lock:
+            rows = self._connection.execute(
+                f"SELECT {PRODUCT_COLUMNS} FROM products WHERE name = ? "
+                "ORDER BY id",
+                (name,),
+            ).fetchall()
+            for row in rows:
+                if row[0] in self._by_rowid:
+                    continue
+                links = self._links(row[0])
+                product = self._materialize(row, links.get(row[0], []))
+                return dict.setdefault(self._index, name, product)
+        return None
+
+    def _materialize(self, row: tuple, promotion_ids: list) -> Product:
+        """
+        turn a row into a product of the store, rows are trusted and are
+        not validated again
+        :param row:
+        :type row:
+        :param promotion_ids: ids of its promotions in order
+        :type promotion_ids:
+        :return:
+        :rtype:
+        """
+        rowid, kind, name, price, quantity, active, maximum = row
+        cls = PRODUCT_KINDS[kind]
+        state = {
+            "_name": name,
+            "_price": price,
+            "_quantity": quantity,
+            "_active": bool(active),
+            "_promotions": [
+                self._promotion(promotion_id) for promotion_id in promotion_ids
+            ],
+            "_version": 0,
+        }
+        if cls is LimitedProducts:
+            state["_maximum"] = maximum
+        product = cls.__new__(cls)
+        product.__setstate__(state)
+        self._rowids[product] = rowid
+        self._by_rowid[rowid] = product
+        self._list(product)
+        return product
+
+    def _promotion(self, promotion_id: int) -> Promotions:
+        """
+        get the promotion of a row, products sharing a promotion in the
+        file share the object once loaded
+        :param promotion_id:
+        :type promotion_id:
+        :return:
+        :rtype:
+        """
+        promotion = self._promotions_by_row.get(promotion_id)
+        if promotion is None:
+            kind, description, percent = self._connection.execute(
+                "SELECT kind, description, percent FROM promotions "
+                "WHERE id = ?",
+                (promotion_id,),
+            ).fetchone()
+            cls = PROMOTION_KINDS[kind]
+            if cls is PercentDiscount:
+                promotion = cls(description, percent)
+            else:
+                promotion = cls(description)
+            self._promotions_by_row[promotion_id] = promotion
+            self._promotion_rows[promotion] = promotion_id
+        return promotion
+
+    def _links(self, product_id: int = None) -> dict[int, list]:
+        """
+        promotion ids per product id in order, of one or every product
+        :param product_id:
+        :type product_id:
+        :return:
+        :rtype:
+        """
+        query = "SELECT product_id, promotion_id FROM product_promotions"
+        params = ()
+        if product_id is not None:
+            query += " WHERE product_id = ?"
+            params = (product_id,)
+        links: dict[int, list] = {}
+        for link_product, promotion_id in self._connection.execute(
+            query + " ORDER BY product_id, position", params
+        ):
+            links.setdefault(link_product, []).append(promotion_id)
+        return links
+
+    def _insert(self, products: list[Product]) -> None:
+        """
+        write new products of the store to the file and remember their
+        rows
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        for product, rowid in zip(products, self._write_new(products)):
+            self._rowids[product] = rowid
+            self._by_rowid[rowid] = product
+
+    def _write_new(self, products: list[Product]) -> list[int]:
+        """
+        insert product rows and their promotions
+        :param products:
+        :type products:
+        :return: the row ids in order
+        :rtype:
+        """
+        if not products:
+            return []
+        with self._db_lock, self._connection:
+            (next_id,) = self._connection.execute(
+                "SELECT COALESCE(MAX(id), 0) + 1 FROM products"
+            ).fetchone()
+            rowids = list(range(next_id, next_id + len(products)))
+            self._connection.executemany(
+                f"INSERT INTO products ({PRODUCT_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (rowid, *self._row(product))
+                    for rowid, product in zip(rowids, products)
+                ],
+            )
+            self._write_links(products, rowids)
+        return rowids
+
+    def _write_links(
+        self, products: list[Product], rowids: list[int] = None
+    ) -> None:
+        """
+        write the promotion links of products, shared promotions are
+        written once
+        :param products:
+        :type products:
+        :param rowids: their rows, the loaded rows by default
+        :type rowids:
+        :return:
+        :rtype:
+        """
+        if rowids is None:
+            rowids = [self._rowids[product] for product in products]
+        links = []
+        for product, rowid in zip(products, rowids):
+            if not product._promotions:
+                continue
+            for position, promotion in enumerate(product._promotions):
+                if isinstance(promotion, Promotions):
+                    links.append(
+                        (rowid, self._promotion_row(promotion), position)
+                    )
+        self._connection.executemany(
+            "INSERT INTO product_promotions "
+            "(product_id, promotion_id, position) VALUES (?, ?, ?)",
+            links,
+        )
+
+    def _promotion_row(self, promotion: Promotions) -> int:
+        """
+        get the row of a promotion, written on first use
+        :param promotion:
+        :type promotion:
+        :return:
+        :rtype:
+        """
+        promotion_id = self._promotion_rows.get(promotion)
+        if promotion_id is None:
+            kind = type(promotion).__name__
+            if PROMOTION_KINDS.get(kind) is not type(promotion):
+                raise ValueError(f"Promotion {kind} can not be saved")
+            percent = (
+                round(promotion.discount * 100, 10)
+                if isinstance(promotion, PercentDiscount)
+                else None
+            )
+            promotion_id = self._connection.execute(
+                "INSERT INTO promotions (kind, description, percent) "
+                "VALUES (?, ?, ?)",
+                (kind, promotion.description, percent),
+            ).lastrowid
+            self._promotion_rows[promotion] = promotion_id
+            self._promotions_by_row[promotion_id] = promotion
+        return promotion_id
+
+    @staticmethod
+    def _row(product: Product) -> tuple:
+        """
+        column values of a product, without the id
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        return (
+            type(product).__name__,
+            product._name,
+            product._price,
+            product._quantity,
+            int(product._active),
+            getattr(product, "_maximum", None),
+        )
+
+    def _product_changed(self, product: Product) -> None:
+        """
+        watcher hook, the change is written with the next flush
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        super()._product_changed(product)
+        self._mark_dirty(product)
+
+    def _product_renamed(self, product: Product, old_name: str) -> None:
+        """
+        watcher hook, the new name is written with the next flush
+        :param product:
+        :type product:
+        :param old_name:
+        :type old_name:
+        :return:
+        :rtype:
+        """
+        super()._product_renamed(product, old_name)
+        self._mark_dirty(product)
+
+    def _mark_dirty(self, product: Product) -> None:
+        """
+        remember a changed product, flush once enough have changed
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        with self._db_lock:
+            if self._closed:
+                return
+            self._dirty.add(product)
+            if len(self._dirty) >= self.flush_every:
+                self.flush()
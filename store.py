@@ -1,14 +1,87 @@
 # imports
-from typing import Union
+from bisect import insort
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import heapq
+from itertools import chain, islice
+import math
+import operator
+import pickle
+import threading
+from typing import Iterable, Iterator, Union
 
-from products import Product, NonStockedProducts, LimitedProducts
+from cents import from_cents, to_cents
+from name_search import NameSearchIndex, DEFAULT_SEARCH_LIMIT
+from price_index import PriceIndex
+from promotion_index import PromotionIndex
+from products import (
+    Product,
+    NonStockedProducts,
+    LimitedProducts,
+    _NO_PROMOTIONS,
+    _state_slots,
+    stock_lock,
+    stock_locks,
+)
 from promotions import Promotions
-from ui_helpers import UIHelpers
+from quote_cache import Quote, QuoteCache
+from receipts import Receipt, ReceiptLine, RejectedLine
+from ui_helpers import UIHelpers, ProductPager
 
 # types
 Subtotal = float
 Quantity = int
 ShoppingList = list[tuple[Product, int]]
+Basket = Iterable[tuple[str, int]]
+
+# most a limited product can be ordered per order
+MAX_LIMITED_PER_ORDER = 1
+
+# baskets sent to a pricing worker in one job
+DEFAULT_CHUNK_SIZE = 256
+
+# sort key of the price queries of combined stores
+_price = operator.attrgetter("_price")
+
+# how Store.merge picks the price of a product listed more than once,
+# called with the price kept so far and the next price
+PRICE_POLICIES = {
+    "min": min,
+    "max": max,
+    "first": lambda kept, other: kept,
+    "last": lambda kept, other: other,
+}
+
+
+class LazyIndex(dict):
+    """
+    name -> product index that loads the names it does not know on demand,
+    used by the stores that keep their catalog outside of memory
+    """
+
+    def __init__(self, load, *args) -> None:
+        """
+        :param load: loads the product of a name, None if there is none
+        :type load:
+        """
+        super().__init__(*args)
+        self._load = load
+
+    def __missing__(self, name: str) -> Product:
+        product = self._load(name)
+        if product is None:
+            raise KeyError(name)
+        return product
+
+    def __contains__(self, name) -> bool:
+        return self.get(name) is not None
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
 
 
 class Store:
@@ -16,200 +89,1279 @@ class Store:
     Store class
     """
 
+    # True to price orders in integer cents (cents.py) instead of floats
+    cents_pricing = False
+
     def __init__(self, products: list[Product] = None) -> None:
         """
         initialise store with products
         :param products:
         :type products:
         """
+        self._index: dict[str, Product] = {}
+        # removed products leave a None (tombstone) in the list until it is
+        # compacted, _positions maps every listed product to its first slot
+        # and _copies counts the further slots of products listed twice;
+        # a list handed out by products is copied before the next tombstone
+        self._products: list[Product] = []
+        self._positions: dict[Product, int] = {}
+        self._copies: dict[Product, int] = {}
+        self._tombstones = 0
+        # the aggregates are shared by all products of the store
+        self._aggregate_lock = threading.Lock()
         self.products = products if products else []
         self.stores = {}
+        self.quote_cache = QuoteCache()
+
+    @property
+    def products(self) -> list[Product]:
+        """
+        get the products of the store
+        the list is the store's own until the next removal, which copies
+        it first, so it never shows a removed product as None
+        :return:
+        :rtype:
+        """
+        if self._tombstones:
+            self._compact()
+        self._products_shared = True
+        return self._products
+
+    @products.setter
+    def products(self, products: list[Product]) -> None:
+        """
+        set the products of the store, rebuild the name index and the
+        aggregates
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        self._compact()
+        for product in self._products:
+            product._unwatch(self)
+        # copied, removals must not write tombstones into the caller's list
+        self._products = list(products)
+        self._reindex()
+
+    def __getstate__(self) -> dict:
+        """
+        pickle the store without its locks and quote cache
+        :return:
+        :rtype:
+        """
+        state = self.__dict__.copy()
+        del state["_aggregate_lock"]
+        # rebuilt on first use
+        state["_price_index"] = None
+        state["_name_search"] = None
+        state["_promotion_index"] = None
+        state["quote_cache"] = self.quote_cache.maxsize
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        restore a pickled store, it watches its products again and starts
+        with an empty quote cache
+        :param state:
+        :type state:
+        :return:
+        :rtype:
+        """
+        self.__dict__.update(state)
+        self._aggregate_lock = threading.Lock()
+        self.quote_cache = QuoteCache(state["quote_cache"])
+        for product in self._products:
+            if product is not None:
+                product._watch(self)
 
     def __contains__(self, product):
         """
         implements product in products
+        looks the product up in the slot positions
                 :param item:
                 :type item:
                 :return:
                 :rtype:
         """
-        return product in self.products
+        try:
+            return product in self._positions
+        except TypeError:  # unhashable, can not be a product
+            return False
 
     def __add__(self, other):
         """
         Combine two _stores using the + operator.
+        nothing is copied, the result is a view over both stores, see
+        StoreView.materialize for a standalone copy
         :param other: Another store instance
         :type other: Store
-        :return: A new store with combined products
-        :rtype: Store
+        :return: A view with the products of both stores
+        :rtype: StoreView
         """
         if not isinstance(other, Store):
             raise ValueError("Can only combine with another Store instance.")
 
-        # Create a new store
-        combined_store = Store()
+        return StoreView(self, other)
+
+    def merge(self, *others: "Store", price_policy="min") -> "Store":
+        """
+        merge stores into a new store with one product per name
+        the products are joined on their name in one pass: the first
+        product of a name is copied, the quantities of the others are
+        added to it (non stocked products stay without stock), the price
+        is picked by the price policy, it is active if any of them is and
+        gets the promotions of all of them. The kind and the per order
+        maximum of the first product are kept. The stores are not changed.
+        :param others: the stores to merge with this one
+        :type others: Store
+        :param price_policy: a name of PRICE_POLICIES or a callable
+        (kept price, other price) -> price
+        :type price_policy: str | Callable
+        :return:
+        :rtype: Store
+        """
+        if callable(price_policy):
+            pick_price = price_policy
+        else:
+            pick_price = PRICE_POLICIES.get(price_policy)
+            if pick_price is None:
+                raise ValueError(f"Unknown price policy {price_policy}")
+        for other in others:
+            if not isinstance(other, Store):
+                raise ValueError("Can only merge with another Store instance.")
+        merged: dict[str, Product] = {}
+        for store in (self, *others):
+            for product in store.products:
+                kept = merged.get(product._name)
+                if kept is None:
+                    merged[product._name] = self._merge_copy(product)
+                else:
+                    self._merge_into(kept, product, pick_price)
+        return Store(list(merged.values()))
+
+    def add_product(self, product: Product) -> None:
+        """
+        add product to store
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        self.add_products((product,))
+
+    def remove_product(self, product: Product) -> None:
+        """
+        remove product from store
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        self.remove_products((product,))
+
+    def add_products(self, products: Iterable[Product]) -> None:
+        """
+        add many products to the end of the store, nothing is added if one
+        of them is not a product
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        products = list(products)
+        for product in products:
+            if not isinstance(
+                product, (Product, NonStockedProducts, LimitedProducts)
+            ):
+                raise ValueError("Product should be an instance of Product")
+        for product in products:
+            self._list(product)
+        self._account_many(products, 1)
+
+    def remove_products(self, products: Iterable[Product]) -> None:
+        """
+        remove many products, each in O(1): its slot becomes a tombstone
+        and the list is compacted once half of it is tombstones, the
+        remaining products keep their order. Nothing is removed if one of
+        them is not in the store
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        products = list(products)
+        wanted: dict[Product, int] = {}
+        for product in products:
+            n_wanted = wanted[product] = wanted.get(product, 0) + 1
+            listed = 0
+            if product in self._positions:
+                listed = 1 + self._copies.get(product, 0)
+            if n_wanted > listed:
+                raise ValueError("Product is not in the store")
+        for product in products:
+            self._delist(product)
+        self._account_many(products, -1)
+        if self._tombstones > len(self._products) // 2:
+            self._compact()
+
+    def get_total_quantity(self) -> Quantity:
+        """
+        get quantity _quantity of products in store
+        kept up to date on every change, no recount
+        :return:
+        :rtype:
+        """
+        total = self._total_units
+        UIHelpers.print_total_quantity(total)
+        return total
+
+    def get_inventory_value(self) -> float:
+        """
+        value of the stock at list price
+        :return:
+        :rtype:
+        """
+        return self._inventory_value
+
+    def get_active_count(self) -> int:
+        """
+        number of active products
+        :return:
+        :rtype:
+        """
+        return self._active_count
+
+    def get_out_of_stock_count(self) -> int:
+        """
+        number of stocked products with nothing left, non stocked products
+        are never out of stock
+        :return:
+        :rtype:
+        """
+        return self._out_of_stock_count
+
+    def verify_aggregates(self) -> bool:
+        """
+        recount the aggregates from the products and compare them with the
+        running values, the inventory value is compared with a float
+        tolerance
+        :return: True if they agree
+        :rtype: bool
+        """
+        total_units, inventory_value, active_count, out_of_stock_count = (
+            self._recount()
+        )
+        return (
+            total_units == self._total_units
+            and math.isclose(
+                inventory_value,
+                self._inventory_value,
+                rel_tol=1e-9,
+                abs_tol=1e-6,
+            )
+            and active_count == self._active_count
+            and out_of_stock_count == self._out_of_stock_count
+        )
+
+    def get_all_products(self) -> list[Product]:
+        """
+        get all products in store
+        :return:
+        :rtype:
+        """
+        products = self.products
+        UIHelpers.print_all_products(products)
+        return self.products
+
+    def search_products(
+        self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, fuzzy=True
+    ) -> list[Product]:
+        """
+        search the product names: products with words starting with the
+        words of the query first, then (fuzzy) products with words close
+        to them, so "mac" and "macbok" both find "MacBook Air M2"
+        :param query:
+        :type query: str
+        :param limit: most products returned
+        :type limit: int
+        :param fuzzy: fill up with typo tolerant matches
+        :type fuzzy: bool
+        :return:
+        :rtype: list[Product]
+        """
+        if not isinstance(query, str):
+            raise ValueError("Query should be a string")
+        if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1:
+            raise ValueError("Limit should be a positive integer")
+        if fuzzy:
+            return self._by_name().search(query, limit)
+        return self._by_name().prefix_search(query, limit)
+
+    def get_products_by_price(
+        self,
+        min_price: float = None,
+        max_price: float = None,
+        active_only: bool = False,
+    ) -> list[Product]:
+        """
+        get the products with min_price <= price <= max_price from the
+        price index, cheapest first
+        :param min_price: no lower bound when None
+        :type min_price: float
+        :param max_price: no upper bound when None
+        :type max_price: float
+        :param active_only: only active products
+        :type active_only: bool
+        :return:
+        :rtype: list[Product]
+        """
+        return self._by_price().between(min_price, max_price, active_only)
+
+    def get_cheapest_products(
+        self, n: int, active_only: bool = False
+    ) -> list[Product]:
+        """
+        get the n cheapest products, cheapest first
+        :param n:
+        :type n: int
+        :param active_only: only active products
+        :type active_only: bool
+        :return:
+        :rtype: list[Product]
+        """
+        self._validate_top_n(n)
+        return self._by_price().cheapest(n, active_only)
+
+    def get_most_expensive_products(
+        self, n: int, active_only: bool = False
+    ) -> list[Product]:
+        """
+        get the n most expensive products, most expensive first
+        :param n:
+        :type n: int
+        :param active_only: only active products
+        :type active_only: bool
+        :return:
+        :rtype: list[Product]
+        """
+        self._validate_top_n(n)
+        return self._by_price().most_expensive(n, active_only)
+
+    def get_products_with_promotion(
+        self, promotion: Promotions
+    ) -> list[Product]:
+        """
+        get the products using a promotion from the promotion index
+        :param promotion:
+        :type promotion:
+        :return:
+        :rtype: list[Product]
+        """
+        self._validate_promotion(promotion)
+        return self._by_promotion().products(promotion)
+
+    def attach_promotion(
+        self, promotion: Promotions, products: Iterable[Product]
+    ) -> int:
+        """
+        add a promotion to many products of the store in one step, orders
+        see it on all of them or on none; nothing is changed if one of
+        them is not in the store
+        :param promotion:
+        :type promotion:
+        :param products:
+        :type products:
+        :return: number of products it was added to
+        :rtype: int
+        """
+        self._validate_promotion(promotion)
+        products = self._listed(products)
+        with self._stock_locked(products):
+            return sum(
+                product._attach_promotion(promotion) for product in products
+            )
+
+    def detach_promotion(
+        self, promotion: Promotions, products: Iterable[Product] = None
+    ) -> int:
+        """
+        remove a promotion from many products of the store in one step
+        :param promotion:
+        :type promotion:
+        :param products: every product using it when None
+        :type products:
+        :return: number of products it was removed from
+        :rtype: int
+        """
+        self._validate_promotion(promotion)
+        if products is None:
+            products = self.get_products_with_promotion(promotion)
+        else:
+            products = self._listed(products)
+        with self._stock_locked(products):
+            return sum(
+                product._detach_promotion(promotion) for product in products
+            )
+
+    def end_campaign(self, *promotions: Promotions) -> int:
+        """
+        remove promotions from every product of the store at once, no
+        order is priced with some of them gone and others still applied
+        :param promotions:
+        :type promotions:
+        :return: number of products changed
+        :rtype: int
+        """
+        for promotion in promotions:
+            self._validate_promotion(promotion)
+        products = list(
+            dict.fromkeys(
+                chain.from_iterable(
+                    map(self.get_products_with_promotion, promotions)
+                )
+            )
+        )
+        with self._stock_locked(products):
+            for product in products:
+                for promotion in promotions:
+                    product._detach_promotion(promotion)
+        return len(products)
+
+    def make_an_order(self) -> ShoppingList:
+        """
+        make an order
+        :return:
+        :rtype:
+        """
+        shopping_list = []
+        pager = ProductPager(self.products)
+        print("Enter the product name and quantity to order")
+        while True:
+            pager.show()
+            product_num = self._validate_product_number(pager)
+            if product_num is None:
+                break
+
+            if product_num < 1 or product_num > len(self.products):
+                print("Invalid product number, please enter a valid number")
+                continue
+            # stay on the page of the product just picked
+            pager.go_to_product(product_num)
+            product = self.products[product_num - 1]
+
+            quantity = self._validate_prod_qty("quantity")
+            if quantity is None:
+                break
+            UIHelpers.print_shopping_confirmation(product, quantity)
+            print("Added to the shopping list")
+            shopping_list.append((product, quantity))
+        self._order(shopping_list)
+        return shopping_list
+
+    def place_orders(self, baskets: Iterable[Basket]) -> list[Receipt]:
+        """
+        place a batch of orders without any prompting or printing
+        every basket is an iterable of (product_name, quantity) pairs and
+        is priced with the same rules as _order
+        :param baskets:
+        :type baskets:
+        :return: one receipt per basket, in order
+        :rtype:
+        """
+        place_order = self._place_order
+        return [place_order(basket) for basket in baskets]
+
+    def quote_orders(self, baskets: Iterable[Basket]) -> list[Receipt]:
+        """
+        price a batch of orders like place_orders without taking any stock
+        lines are checked against the current stock, nothing is locked
+        :param baskets:
+        :type baskets:
+        :return: one receipt per basket, in order
+        :rtype:
+        """
+        find = self._index.get
+        return [
+            self._fill_basket(
+                [
+                    (product_name, basket_quantity, find(product_name))
+                    for product_name, basket_quantity in basket
+                ],
+                take_stock=False,
+            )
+            for basket in baskets
+        ]
+
+    # private methods
+    def _validate_prod_qty(self, message: str) -> Union[None, int]:
+        """
+        validate the order
+        :param pot_number:
+        :type pot_number:
+        :return:
+        :rtype:
+        """
+        while True:
+            user_number = input(f"Enter the {message}: ")
+            if user_number == "":
+                return None
+            try:
+                user_number = int(user_number)
+                if user_number < 1:
+                    print(f"Invalid {message}, please enter a valid number")
+                    continue
+                return user_number
+            except ValueError:
+                print(f"Invalid {message}, please enter a valid number")
+                continue
+
+    def _validate_product_number(
+        self, pager: ProductPager
+    ) -> Union[None, int]:
+        """
+        ask for a product number, n / p turn the page of the listing and
+        anything else is searched for in the product names
+        :param pager:
+        :type pager:
+        :return:
+        :rtype:
+        """
+        while True:
+            user_input = input(
+                f"Enter the product number or a name to search (page "
+                f"{pager.page} of {pager.pages}, n: next page, p: previous "
+                f"page): "
+            ).strip()
+            if user_input == "":
+                return None
+            if user_input.lower() in ("n", "p"):
+                if user_input.lower() == "n":
+                    pager.next_page()
+                else:
+                    pager.previous_page()
+                pager.show()
+                continue
+            try:
+                user_number = int(user_input)
+                if user_number < 1:
+                    print(
+                        "Invalid product number, please enter a valid number"
+                    )
+                    continue
+                return user_number
+            except ValueError:
+                self._show_search(user_input)
+                continue
+
+    def _show_search(self, query: str) -> None:
+        """
+        print the products found for a name, with their product numbers
+        :param query:
+        :type query:
+        :return:
+        :rtype:
+        """
+        products = self.search_products(query)
+        if not products:
+            print(f"No products found for {query!r}")
+            return
+        UIHelpers.print_search_results(
+            query,
+            [(self._product_number(product), product) for product in products],
+        )
+
+    def _order(self, shopping_list: ShoppingList) -> float:
+        """
+        finalise order and print summary
+        :param shopping_list:
+        :type shopping_list:
+        :return:
+        :rtype:
+        """
+        print("\nOrder summary:")
+        print("-" * 70)
+        UIHelpers.print_shopping_confirmation_start()
+        cents_pricing = self.cents_pricing
+        calc_subtotal = (
+            self._calc_subtotal_cents if cents_pricing else self._calc_subtotal
+        )
+        total = 0
+        for product, basket_quantity in shopping_list:
+            found_product = self._find_product(product)
+            line_total = 0
+            if found_product:
+                with stock_lock(found_product):
+                    subtotal = calc_subtotal(found_product, basket_quantity)
+                UIHelpers.print_shopping_confirmation(
+                    found_product, basket_quantity
+                )
+                # None when the stock could not fill the line
+                if subtotal is not None and cents_pricing:
+                    _, line_total = self.quote_cache.quote_cents(
+                        found_product,
+                        basket_quantity,
+                        subtotal,
+                        self._calc_any_promotions_cents,
+                    )
+                elif subtotal is not None:
+                    _, line_total = self.quote_cache.quote(
+                        found_product,
+                        basket_quantity,
+                        subtotal,
+                        self._calc_any_promotions,
+                    )
+            total += line_total
+        if cents_pricing:
+            total = from_cents(total)
+        UIHelpers.print_shopping_confirmation_end()
+        print(f"Total: {total} \n")
+        return total
+
+    def _place_order(self, basket: Basket) -> Receipt:
+        """
+        fill one basket without prompting or printing
+        lines that can not be filled are rejected, the rest of the basket
+        is still processed
+        :param basket:
+        :type basket:
+        :return:
+        :rtype:
+        """
+        find = self._index.get
+        lines = [
+            (product_name, basket_quantity, find(product_name))
+            for product_name, basket_quantity in basket
+        ]
+        # the whole basket is checked and taken from stock under the locks
+        # of its products, baskets on other products run in parallel
+        with self._stock_locked(
+            found_product for _, _, found_product in lines if found_product
+        ):
+            return self._fill_basket(lines)
+
+    @staticmethod
+    @contextmanager
+    def _stock_locked(products: Iterable[Product]):
+        """
+        hold the stock locks of products, taken in stripe order so two
+        callers never deadlock
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        locks = stock_locks(products)
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _fill_basket(self, lines: list, take_stock: bool = True) -> Receipt:
+        """
+        price and take the stock for looked up basket lines, the caller
+        holds the stock locks
+        :param lines: (product_name, basket_quantity, found_product)
+        :type lines:
+        :param take_stock: False to only price the lines
+        :type take_stock: bool
+        :return:
+        :rtype:
+        """
+        receipt = Receipt()
+        cents_pricing = self.cents_pricing
+        calc_subtotal = (
+            self._calc_subtotal_cents if cents_pricing else self._calc_subtotal
+        )
+        for product_name, basket_quantity, found_product in lines:
+            # the subtotal of _calc_subtotal (in cents for the cents
+            # pricing) when the stock is taken, price * quantity otherwise
+            subtotal = None
+            reason = self._reject_reason(found_product, basket_quantity)
+            if reason is None and not take_stock:
+                reason = self._limit_reason(found_product, basket_quantity)
+            elif reason is None:
+                try:
+                    subtotal = calc_subtotal(found_product, basket_quantity)
+                except ValueError as error:
+                    reason = str(error)
+            if reason is not None:
+                receipt.rejected.append(
+                    RejectedLine(product_name, basket_quantity, reason)
+                )
+                continue
+            if cents_pricing:
+                subtotal_cents, total_cents = self.quote_cache.quote_cents(
+                    found_product,
+                    basket_quantity,
+                    subtotal,
+                    self._calc_any_promotions_cents,
+                )
+                line = ReceiptLine(
+                    product_name,
+                    basket_quantity,
+                    found_product.price,
+                    from_cents(subtotal_cents),
+                    from_cents(total_cents),
+                    subtotal_cents,
+                    total_cents,
+                )
+            else:
+                subtotal, total = self.quote_cache.quote(
+                    found_product,
+                    basket_quantity,
+                    subtotal,
+                    self._calc_any_promotions,
+                )
+                line = ReceiptLine(
+                    product_name,
+                    basket_quantity,
+                    found_product.price,
+                    subtotal,
+                    total,
+                )
+            receipt.lines.append(line)
+        return receipt
+
+    def _quote(self, product: Product, basket_quantity: int) -> Quote:
+        """
+        quote a basket line with the pricing the store uses
+        :param product:
+        :type product:
+        :param basket_quantity:
+        :type basket_quantity:
+        :return: (subtotal, total after promotions)
+        :rtype:
+        """
+        if self.cents_pricing:
+            subtotal, total = self.quote_cache.quote_cents(
+                product,
+                basket_quantity,
+                pricing=self._calc_any_promotions_cents,
+            )
+            return from_cents(subtotal), from_cents(total)
+        return self.quote_cache.quote(
+            product, basket_quantity, pricing=self._calc_any_promotions
+        )
+
+    @staticmethod
+    def _reject_reason(
+        found_product: Product, basket_quantity: int
+    ) -> Union[None, str]:
+        """
+        check a basket line before any stock is touched
+        :param found_product:
+        :type found_product:
+        :param basket_quantity:
+        :type basket_quantity:
+        :return: None if the line can be filled, else the reason
+        :rtype:
+        """
+        if found_product is None:
+            return "Unknown product"
+        if not isinstance(basket_quantity, int) or basket_quantity < 1:
+            return "Quantity should be a positive integer"
+        if (
+            not isinstance(found_product, NonStockedProducts)
+            and found_product.product_quantity < basket_quantity
+        ):
+            return (
+                f"Unsufficient qty for {found_product.name}. "
+                f"Available: {found_product.product_quantity}, "
+                f"Requested: {basket_quantity}"
+            )
+        return None
+
+    @staticmethod
+    def _limit_reason(
+        found_product: Product, basket_quantity: int
+    ) -> Union[None, str]:
+        """
+        check the per order limit of limited products
+        :param found_product:
+        :type found_product:
+        :param basket_quantity:
+        :type basket_quantity:
+        :return: None if the line is within the limit, else the reason
+        :rtype:
+        """
+        if (
+            isinstance(found_product, LimitedProducts)
+            and basket_quantity > MAX_LIMITED_PER_ORDER
+        ):
+            return f"{found_product.name} can only be applied {MAX_LIMITED_PER_ORDER} time(s) per order (ordered {basket_quantity} time(s))"  # noqa E501
+        return None
+
+    def _find_product(self, product):
+        """
+        find the product in inventory
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        return self._index.get(product.name)
+
+    def _by_price(self) -> PriceIndex:
+        """
+        the price index, built over all products the first time
+        :return:
+        :rtype:
+        """
+        if self._price_index is None:
+            self._price_index = PriceIndex(self.products)
+        return self._price_index
+
+    def _by_name(self) -> NameSearchIndex:
+        """
+        the name search index, built over all products the first time
+        :return:
+        :rtype:
+        """
+        if self._name_search is None:
+            self._name_search = NameSearchIndex(self.products)
+        return self._name_search
+
+    def _by_promotion(self) -> PromotionIndex:
+        """
+        the promotion index, built over all products the first time
+        :return:
+        :rtype:
+        """
+        if self._promotion_index is None:
+            self._promotion_index = PromotionIndex(self.products)
+        return self._promotion_index
+
+    def _product_number(self, product: Product) -> int:
+        """
+        the 1 based number of a product in the listing
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        self._compact()
+        return self._positions[product] + 1
+
+    def _listed(self, products: Iterable[Product]) -> list[Product]:
+        """
+        the distinct products, checked to be in the store
+        :param products:
+        :type products:
+        :return:
+        :rtype:
+        """
+        products = list(dict.fromkeys(products))
+        for product in products:
+            if product not in self:
+                raise ValueError("Product is not in the store")
+        return products
+
+    @staticmethod
+    def _validate_promotion(promotion: Promotions) -> None:
+        """
+        check a promotion
+        :param promotion:
+        :type promotion:
+        :return:
+        :rtype:
+        """
+        if not isinstance(promotion, Promotions):
+            raise ValueError("Promotion must be a valid promotion object")
+
+    @staticmethod
+    def _validate_top_n(n: int) -> None:
+        """
+        check the number of products asked for by a top n query
+        :param n:
+        :type n:
+        :return:
+        :rtype:
+        """
+        if not isinstance(n, int) or isinstance(n, bool) or n < 0:
+            raise ValueError("Number of products should be 0 or more")
+
+    def _reindex(self) -> None:
+        """
+        rebuild the name -> product index, first product with a name wins
+        and recount the aggregates
+        :return:
+        :rtype:
+        """
+        self._index = {}
+        self._name_counts: dict[str, int] = {}
+        # built on the first price query / name search / promotion
+        # lookup, kept up to date from then on
+        self._price_index: Union[None, PriceIndex] = None
+        self._name_search: Union[None, NameSearchIndex] = None
+        self._promotion_index: Union[None, PromotionIndex] = None
+        self._products_shared = False
+        self._reposition()
+        for product in self._products:
+            self._index.setdefault(product.name, product)
+            self._count_name(product.name, 1)
+            product._watch(self)
+        (
+            self._total_units,
+            self._inventory_value,
+            self._active_count,
+            self._out_of_stock_count,
+        ) = self._recount()
+
+    def _unindex(self, product: Product, name: str) -> None:
+        """
+        drop the product from the name index, a duplicate name further
+        down the list takes over the slot
+        :param product:
+        :type product:
+        :param name: the name the product is indexed under
+        :type name:
+        :return:
+        :rtype:
+        """
+        if self._index.get(name) is not product:
+            return
+        del self._index[name]
+        # only scan when another listed product still has the name
+        if not self._name_counts.get(name):
+            return
+        for store_product in self._products:
+            if store_product is not None and store_product.name == name:
+                self._index[name] = store_product
+                break
+
+    @staticmethod
+    def _merge_copy(product: Product) -> Product:
+        """
+        copy a product for a merged store, without its watchers
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        cls = type(product)
+        copy = cls.__new__(cls)
+        for slot in _state_slots(cls):
+            setattr(copy, slot, getattr(product, slot))
+        copy._promotions = list(product._promotions) or _NO_PROMOTIONS
+        copy._version = 0
+        copy._watchers = ()
+        copy._pricing = None
+        copy._display = None
+        return copy
+
+    @staticmethod
+    def _merge_into(kept: Product, product: Product, pick_price) -> None:
+        """
+        merge a product into the copy of the first product of its name
+        :param kept:
+        :type kept:
+        :param product:
+        :type product:
+        :param pick_price:
+        :type pick_price:
+        :return:
+        :rtype:
+        """
+        price = pick_price(kept._price, product._price)
+        Product._validate_price(price)
+        kept._price = round(float(price), 2)
+        if not isinstance(kept, NonStockedProducts):
+            kept._quantity += product._quantity
+        kept._active = kept._active or product._active
+        for promotion in product._promotions:
+            if promotion not in kept._promotions:
+                # sorted like add_promotion keeps them
+                insort(kept.promotions, promotion, key=str)
+
+    def _list(self, product: Product) -> None:
+        """
+        append a product to the list, index and watch it, the caller
+        validates it and accounts for it
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        if product in self._positions:
+            self._copies[product] = self._copies.get(product, 0) + 1
+        else:
+            self._positions[product] = len(self._products)
+            if self._price_index is not None:
+                self._price_index.add(product)
+            if self._name_search is not None:
+                self._name_search.add(product)
+            if self._promotion_index is not None:
+                self._promotion_index.add(product)
+        self._products.append(product)
+        self._index.setdefault(product.name, product)
+        self._count_name(product.name, 1)
+        product._watch(self)
+
+    def _delist(self, product: Product) -> None:
+        """
+        turn the first slot of a product into a tombstone and unindex it,
+        the caller accounts for it
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        if self._products_shared:
+            # handed out by products, the caller keeps the list as it was
+            self._products = list(self._products)
+            self._products_shared = False
+        position = self._positions.pop(product)
+        self._products[position] = None
+        copies = self._copies.get(product)
+        if copies:
+            # listed again further down, rare enough to look for it
+            self._positions[product] = self._products.index(
+                product, position + 1
+            )
+            if copies > 1:
+                self._copies[product] = copies - 1
+            else:
+                del self._copies[product]
+        else:
+            if self._price_index is not None:
+                self._price_index.discard(product)
+            if self._name_search is not None:
+                self._name_search.discard(product)
+            if self._promotion_index is not None:
+                self._promotion_index.discard(product)
+        self._tombstones += 1
+        product._unwatch(self)
+        self._count_name(product.name, -1)
+        self._unindex(product, product.name)
+
+    def _compact(self) -> None:
+        """
+        drop the tombstones, in place: a list holding tombstones was never
+        handed out
+        :return:
+        :rtype:
+        """
+        if not self._tombstones:
+            return
+        self._products[:] = [
+            product for product in self._products if product is not None
+        ]
+        self._reposition()
+
+    def _reposition(self) -> None:
+        """
+        rebuild the slot positions of a list without tombstones
+        :return:
+        :rtype:
+        """
+        products = self._products
+        # built from the end so the first slot of a product wins
+        self._positions = dict(
+            zip(reversed(products), range(len(products) - 1, -1, -1))
+        )
+        self._copies = {}
+        if len(self._positions) != len(products):
+            for product in products:
+                self._copies[product] = self._copies.get(product, 0) + 1
+            self._copies = {
+                product: n_copies - 1
+                for product, n_copies in self._copies.items()
+                if n_copies > 1
+            }
+        self._tombstones = 0
 
-        # Add products from both _stores
-        combined_store.products = self.products + other.products
+    def _count_name(self, name: str, delta: int) -> None:
+        """
+        count the listed products of a name
+        :param name:
+        :type name:
+        :param delta:
+        :type delta:
+        :return:
+        :rtype:
+        """
+        n_listed = self._name_counts.get(name, 0) + delta
+        if n_listed:
+            self._name_counts[name] = n_listed
+        else:
+            del self._name_counts[name]
 
-        return combined_store
+    def _recount(self) -> tuple[int, float, int, int]:
+        """
+        count the aggregates over all products
+        :return: total units, inventory value, active and out of stock
+        count
+        :rtype:
+        """
+        self._compact()
+        total_units = 0
+        inventory_value = 0.0
+        active_count = 0
+        out_of_stock_count = 0
+        for product in self._products:
+            quantity = product.product_quantity
+            total_units += quantity
+            inventory_value += product.price * quantity
+            active_count += product.is_active
+            if quantity == 0 and not isinstance(product, NonStockedProducts):
+                out_of_stock_count += 1
+        return total_units, inventory_value, active_count, out_of_stock_count
 
-    def add_product(self, product: Product) -> None:
+    def _account(self, product: Product, sign: int) -> None:
         """
-        add product to store
+        add (sign 1) or take away (sign -1) one product from the aggregates
         :param product:
         :type product:
+        :param sign:
+        :type sign:
         :return:
         :rtype:
         """
-        if not isinstance(
-            product, (Product, NonStockedProducts, LimitedProducts)
-        ):
-            raise ValueError("Product should be an instance of Product")
-        self.products.append(product)
+        quantity = product._quantity
+        with self._aggregate_lock:
+            self._total_units += sign * quantity
+            self._inventory_value += sign * product._price * quantity
+            if product._active:
+                self._active_count += sign
+            if quantity == 0 and not isinstance(product, NonStockedProducts):
+                self._out_of_stock_count += sign
 
-    def remove_product(self, product: Product) -> None:
+    def _account_many(self, products: list[Product], sign: int) -> None:
         """
-        remove product from store
-        :param product:
-        :type product:
+        _account for many products with one lock acquisition
+        :param products:
+        :type products:
+        :param sign:
+        :type sign:
         :return:
         :rtype:
         """
-        self.products.remove(product)
+        total_units = 0
+        inventory_value = 0.0
+        active_count = 0
+        out_of_stock_count = 0
+        for product in products:
+            quantity = product._quantity
+            total_units += quantity
+            inventory_value += product._price * quantity
+            active_count += bool(product._active)
+            if quantity == 0 and not isinstance(product, NonStockedProducts):
+                out_of_stock_count += 1
+        with self._aggregate_lock:
+            self._total_units += sign * total_units
+            self._inventory_value += sign * inventory_value
+            self._active_count += sign * active_count
+            self._out_of_stock_count += sign * out_of_stock_count
 
-    def get_total_quantity(self) -> Quantity:
+    def _product_changing(self, product: Product) -> None:
         """
-        get quantity _quantity of products in store
+        watcher hook, take the old state out of the aggregates
+        :param product:
+        :type product:
         :return:
         :rtype:
         """
-        total = sum([product.product_quantity for product in self.products])
-        UIHelpers.print_total_quantity(total)
-        return total
+        self._account(product, -1)
 
-    def get_all_products(self) -> list[Product]:
+    def _product_changed(self, product: Product) -> None:
         """
-        get all products in store
+        watcher hook, put the new state into the aggregates and move a
+        repriced product in the price index
+        :param product:
+        :type product:
         :return:
         :rtype:
         """
-        products = self.products
-        UIHelpers.print_all_products(products)
-        return self.products
+        self._account(product, 1)
+        if self._price_index is not None:
+            self._price_index.reprice(product)
 
-    def make_an_order(self) -> ShoppingList:
+    def _product_renamed(self, product: Product, old_name: str) -> None:
         """
-        make an order
+        watcher hook, move the product in the name index and the name
+        search
+        :param product:
+        :type product:
+        :param old_name:
+        :type old_name:
         :return:
         :rtype:
         """
-        shopping_list = []
-        print("Enter the product name and quantity to order")
-        while True:
-            self.get_all_products()
-            product_num = self._validate_prod_qty("product number")
-            if product_num is None:
-                break
-
-            if product_num < 1 or product_num > len(self.products):
-                print("Invalid product number, please enter a valid number")
-                continue
-            product = self.products[product_num - 1]
-
-            quantity = self._validate_prod_qty("quantity")
-            if quantity is None:
-                break
-            UIHelpers.print_shopping_confirmation(product, quantity)
-            print("Added to the shopping list")
-            shopping_list.append((product, quantity))
-        self._order(shopping_list)
-        return shopping_list
+        self._count_name(old_name, -1)
+        self._unindex(product, old_name)
+        self._count_name(product.name, 1)
+        self._index.setdefault(product.name, product)
+        if self._name_search is not None:
+            self._name_search.rename(product)
 
-    # private methods
-    def _validate_prod_qty(self, message: str) -> Union[None, int]:
+    def _product_promoted(
+        self, product: Product, added: tuple, removed: tuple
+    ) -> None:
         """
-        validate the order
-        :param pot_number:
-        :type pot_number:
+        watcher hook, follow the promotions of the product in the
+        promotion index
+        :param product:
+        :type product:
+        :param added:
+        :type added:
+        :param removed:
+        :type removed:
         :return:
         :rtype:
         """
-        while True:
-            user_number = input(f"Enter the {message}: ")
-            if user_number == "":
-                return None
-            try:
-                user_number = int(user_number)
-                if user_number < 1:
-                    print(f"Invalid {message}, please enter a valid number")
-                    continue
-                return user_number
-            except ValueError:
-                print(f"Invalid {message}, please enter a valid number")
-                continue
+        if self._promotion_index is not None:
+            self._promotion_index.update(product, added, removed)
 
-    def _order(self, shopping_list: ShoppingList) -> float:
+    def _calc_subtotal(
+        self, found_product: Product, basket_quantity: int
+    ) -> Subtotal:
         """
-        finalise order and print summary
-        :param shopping_list:
-        :type shopping_list:
+        pick the subtotal rule for the kind of product
+        :param found_product:
+        :type found_product:
+        :param basket_quantity:
+        :type basket_quantity:
         :return:
         :rtype:
         """
-        print("\nOrder summary:")
-        print("-" * 70)
-        UIHelpers.print_shopping_confirmation_start()
-        total = 0
-        for product, basket_quantity in shopping_list:
-            found_product = self._find_product(product)
-            subtotal = 0
-            if found_product:
-                if isinstance(found_product, NonStockedProducts):
-                    subtotal = self._calc_subtotal_non_stocked_product(
-                        found_product, basket_quantity
-                    )
-                    UIHelpers.print_shopping_confirmation(
-                        found_product, basket_quantity
-                    )
-                elif isinstance(found_product, LimitedProducts):
-                    subtotal = self._calc_subtotal_limited_product(
-                        found_product, basket_quantity
-                    )
-                    UIHelpers.print_shopping_confirmation(
-                        found_product, basket_quantity
-                    )
-                elif isinstance(found_product, Product):
-                    subtotal = self._calc_subtotal_stocked_product(
-                        found_product, basket_quantity
-                    )
-                    UIHelpers.print_shopping_confirmation(
-                        found_product, basket_quantity
-                    )
-            if found_product.promotions:
-                discounted_subtotal = self._calc_any_promotions(
-                    found_product, subtotal, basket_quantity
-                )
-                total += discounted_subtotal
-            else:
-                total += subtotal
-        UIHelpers.print_shopping_confirmation_end()
-        print(f"Total: {total} \n")
-        return total
+        if isinstance(found_product, NonStockedProducts):
+            return self._calc_subtotal_non_stocked_product(
+                found_product, basket_quantity
+            )
+        if isinstance(found_product, LimitedProducts):
+            return self._calc_subtotal_limited_product(
+                found_product, basket_quantity
+            )
+        return self._calc_subtotal_stocked_product(
+            found_product, basket_quantity
+        )
 
-    def _find_product(self, product):
+    def _calc_subtotal_cents(
+        self, found_product: Product, basket_quantity: int
+    ) -> Union[None, int]:
         """
-        find the product in inventory
-        :param product:
-        :type product:
-        :return:
+        _calc_subtotal in integer cents, for the cents pricing
+        the stock is taken by _calc_subtotal; the subtotal of the default
+        rules, price * quantity, is returned as the exact
+        price_cents * quantity, a subtotal changed by an overriding rule
+        is turned into cents
+        :param found_product:
+        :type found_product:
+        :param basket_quantity:
+        :type basket_quantity:
+        :return: None when the stock could not fill the line
         :rtype:
         """
-        for store_product in self.products:
-            if store_product.name == product.name:
-                return store_product
-            else:
-                return None
+        subtotal = self._calc_subtotal(found_product, basket_quantity)
+        if subtotal is None:
+            return None
+        if subtotal != found_product.price * basket_quantity:
+            return to_cents(subtotal)
+        return found_product.price_cents * basket_quantity
 
     def _calc_subtotal_non_stocked_product(
         self, found_product: Product, basket_quantity: int
@@ -237,11 +1389,9 @@ class Store:
         :return:
         :rtype:
         """
-        MAX = 1
-        if basket_quantity > MAX:
-            raise ValueError(
-                f"{found_product.name} can only be applied {MAX} time(s) per order (ordered {basket_quantity} time(s))"  # noqa E501
-            )
+        reason = selfself._limit_reason(found_product, basket_quantity)
+        if reason is not None:
+            raise ValueError(reason)
         found_product.product_quantity -= basket_quantity
         return found_product.price * basket_quantity
 
@@ -275,27 +1425,338 @@ class Store:
     ) -> Subtotal:
         """
         logic for calc subtotal for items with promotions
+        runs the compiled promotion chain of the product, the order paths
+        call it through the quote cache on every quote that is not cached
+        :param found_product:
+        :type found_product:
+        :param basket_quantity:
+        :type basket_quantity:
+        :return:
+        :rtype:
+        """
+        return found_product.pricing(current_subtotal, basket_quantity)
+
+    def _calc_any_promotions_cents(
+        self,
+        found_product: Product,
+        current_subtotal: int,
+        basket_quantity: int,
+    ) -> int:
+        """
+        _calc_any_promotions in integer cents, for the cents pricing
+        runs the promotions of the product on integers; a store that only
+        overrides _calc_any_promotions is priced through its override
         :param found_product:
         :type found_product:
+        :param current_subtotal: in cents
+        :type current_subtotal: int
         :param basket_quantity:
         :type basket_quantity:
+        :return: in cents
+        :rtype: int
+        """
+        calc_any_promotions = type(self)._calc_any_promotions
+        if calc_any_promotions is not Store._calc_any_promotions:
+            return to_cents(
+                calc_any_promotions(
+                    self,
+                    found_product,
+                    from_cents(current_subtotal),
+                    basket_quantity,
+                )
+            )
+        _, total = found_product.quote_cents(basket_quantity, current_subtotal)
+        return total
+
+
+class ChainedProducts(Sequence):
+    """
+    read only sequence over the product lists of several stores, in
+    order, without copying them
+    """
+
+    def __init__(self, stores: tuple[Store, ...]) -> None:
+        self._stores = stores
+
+    def __len__(self) -> int:
+        return sum(len(store.products) for store in self._stores)
+
+    def __iter__(self) -> Iterator[Product]:
+        for store in self._stores:
+            yield from store.products
+
+    def __getitem__(self, index):
+        """
+        get a product by position, or a list for a slice
+        :param index:
+        :type index:
+        :return:
+        :rtype:
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            products = []
+            for store in self._stores:
+                if stop <= 0:
+                    break
+                store_products = store.products
+                if start < len(store_products):
+                    first = max(start, 0)
+                    products.extend(store_products[first:stop])
+                start -= len(store_products)
+                stop -= len(store_products)
+            return products
+        position = operator.index(index)
+        if position < 0:
+            position += len(self)
+        if position >= 0:
+            for store in self._stores:
+                store_products = store.products
+                if position < len(store_products):
+                    return store_products[position]
+                position -= len(store_products)
+        raise IndexError("Product index out of range")
+
+    def __contains__(self, product) -> bool:
+        return any(product in store for store in self._stores)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (list, tuple, ChainedProducts)):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            product is other_product or product == other_product
+            for product, other_product in zip(self, other)
+        )
+
+    def __add__(self, other) -> list[Product]:
+        return list(self) + list(other)
+
+
+class ChainedIndex:
+    """
+    name lookups over the indexes of several stores, the first store
+    listing a name wins like in the concatenated product list
+    """
+
+    def __init__(self, stores: tuple[Store, ...]) -> None:
+        self._stores = stores
+
+    def get(self, name, default=None):
+        for store in self._stores:
+            product = store._index.get(name)
+            if product is not None:
+                return product
+        return default
+
+    def __getitem__(self, name) -> Product:
+        product = self.get(name)
+        if product is None:
+            raise KeyError(name)
+        return product
+
+    def __contains__(self, name) -> bool:
+        return self.get(name) is not None
+
+
+class StoreView(Store):
+    """
+    read only union of stores, what store_1 + store_2 returns
+    iterating, counting and looking up go to the source stores every time,
+    so the view follows their changes and never copies a product list.
+    Orders placed through the view take the stock of the source products.
+    """
+
+    def __init__(self, *stores: Store) -> None:
+        """
+        Store.__init__ is not called, a view has no product list of its
+        own
+        :param stores: the source stores, views are flattened
+        :type stores: Store
+        """
+        sources = []
+        for store in stores:
+            if not isinstance(store, Store):
+                raise ValueError(
+                    "Can only combine with another Store instance."
+                )
+            if isinstance(store, StoreView):
+                sources.extend(store.sources)
+            else:
+                sources.append(store)
+        self.sources = tuple(sources)
+        self._index = ChainedIndex(self.sources)
+        self._aggregate_lock = threading.Lock()
+        self.stores = {}
+        self.quote_cache = QuoteCache()
+
+    def __reduce__(self):
+        return StoreView, self.sources
+
+    def __contains__(self, product) -> bool:
+        return any(product in store for store in self.sources)
+
+    @property
+    def products(self) -> ChainedProducts:
+        """
+        get the products of all source stores, without copying
+        :return:
+        :rtype:
+        """
+        return ChainedProducts(self.sources)
+
+    @products.setter
+    def products(self, products: list[Product]) -> None:
+        self._read_only()
+
+    def add_products(self, products: Iterable[Product]) -> None:
+        self._read_only()
+
+    def remove_products(self, products: Iterable[Product]) -> None:
+        self._read_only()
+
+    def materialize(self) -> Store:
+        """
+        copy the view into a standalone store with its own product list,
+        the product objects are shared with the source stores
         :return:
         :rtype:
         """
+        return Store(list(self.products))
+
+    def search_products(
+        self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, fuzzy=True
+    ) -> list[Product]:
+        """
+        search the source stores, the prefix matches of all of them come
+        before the typo tolerant ones
+        """
+        found = {}
+        for store in self.sources:
+            found.update(
+                dict.fromkeys(store.search_products(query, limit, False))
+            )
+        if fuzzy and len(found) < limit:
+            for store in self.sources:
+                found.update(
+                    dict.fromkeys(store._by_name().fuzzy_search(query, limit))
+                )
+        return list(found)[:limit]
 
-        for promotion in found_product.promotions:
-            if isinstance(promotion, Promotions):
-                subtotal_after_promotion = promotion.apply_promotion(
-                    current_subtotal, basket_quantity
+    def get_products_with_promotion(
+        self, promotion: Promotions
+    ) -> list[Product]:
+        return list(
+            dict.fromkeys(
+                chain.from_iterable(
+                    store.get_products_with_promotion(promotion)
+                    for store in self.sources
                 )
-                current_subtotal = subtotal_after_promotion
+            )
+        )
+
+    # price queries merge the already sorted answers of the source stores
+    def get_products_by_price(
+        self,
+        min_price: float = None,
+        max_price: float = None,
+        active_only: bool = False,
+    ) -> list[Product]:
+        return list(
+            heapq.merge(
+                *(
+                    store.get_products_by_price(
+                        min_price, max_price, active_only
+                    )
+                    for store in self.sources
+                ),
+                key=_price,
+            )
+        )
+
+    def get_cheapest_products(
+        self, n: int, active_only: bool = False
+    ) -> list[Product]:
+        self._validate_top_n(n)
+        cheapest = heapq.merge(
+            *(
+                store.get_cheapest_products(n, active_only)
+                for store in self.sources
+            ),
+            key=_price,
+        )
+        return list(islice(cheapest, n))
+
+    def get_most_expensive_products(
+        self, n: int, active_only: bool = False
+    ) -> list[Product]:
+        self._validate_top_n(n)
+        most_expensive = heapq.merge(
+            *(
+                store.get_most_expensive_products(n, active_only)
+                for store in self.sources
+            ),
+            key=_price,
+            reverse=True,
+        )
+        return list(islice(most_expensive, n))
+
+    # the aggregates are the sums of the source aggregates
+    @property
+    def _total_units(self) -> int:
+        return sum(store._total_units for store in self.sources)
+
+    @property
+    def _inventory_value(self) -> float:
+        return sum(store._inventory_value for store in self.sources)
+
+    @property
+    def _active_count(self) -> int:
+        return sum(store._active_count for store in self.sources)
+
+    @property
+    def _out_of_stock_count(self) -> int:
+        return sum(store._out_of_stock_count for store in self.sources)
+
+    # private methods
+    def _product_number(self, product: Product) -> int:
+        """
+        the 1 based number of a product in the chained listing
+        :param product:
+        :type product:
+        :return:
+        :rtype:
+        """
+        offset = 0
+        for store in self.sources:
+            if product in store:
+                return offset + store._product_number(product)
+            offset += len(store.products)
+        raise ValueError("Product is not in the store")
+
+    def _recount(self) -> tuple[int, float, int, int]:
+        """
+        sum the recounts of the source stores
+        :return:
+        :rtype:
+        """
+        totals = (0, 0.0, 0, 0)
+        for store in self.sources:
+            totals = tuple(map(operator.add, totals, store._recount()))
+        return totals
 
-        return current_subtotal
+    @staticmethod
+    def _read_only() -> None:
+        raise ValueError(
+            "A combined store can not be changed, materialize it first"
+        )
 
 
 class StoreManager:
     def __init__(self):
         self._stores = {}  # Dictionary to store {store_name: Store instance}
+        self._pricing_pool = None
 
     @property
     def stores(self):
@@ -308,9 +1769,14 @@ class StoreManager:
             raise ValueError("Stores must be a dictionary")
         self._stores = store_dict
 
-    def add_two_stores(self):
+    def add_two_stores(self, merge: bool = False, price_policy="min"):
         """
         Combine two stores into a new store.
+        :param merge: merge products of the same name (see Store.merge)
+        instead of listing both
+        :type merge: bool
+        :param price_policy: price policy of the merge
+        :type price_policy: str | Callable
         :return: The combined store name
         :rtype: str
         """
@@ -337,8 +1803,12 @@ class StoreManager:
                 self._add_store(store_name_2, store_2)
 
         # Combine the stores
-        combined_store = store_1 + store_2
-        combined_store_name = f"{store_name_1}_{store_name_2}_combined"
+        if merge:
+            combined_store = store_1.merge(store_2, price_policy=price_policy)
+            combined_store_name = f"{store_name_1}_{store_name_2}_merged"
+        else:
+            combined_store = store_1 + store_2
+            combined_store_name = f"{store_name_1}_{store_name_2}_combined"
         print(f"Creating combined store: {combined_store_name}")
 
         # Add the combined store to the manager
@@ -349,6 +1819,99 @@ class StoreManager:
 
         return combined_store_name
 
+    def start_pricing_pool(self, max_workers: int = None) -> None:
+        """
+        start worker processes for quote jobs
+        the catalogs are pickled once and every worker loads them when it
+        starts, jobs only carry a store name and baskets. Workers quote
+        against the catalogs as they were here, restart the pool to pick
+        up later changes
+        :param max_workers: number of processes, one per CPU by default
+        :type max_workers: int
+        :return:
+        :rtype:
+        """
+        self.stop_pricing_pool()
+        self._pricing_pool = ProcessPoolExecutor(
+            max_workers,
+            initializer=_warm_pricing_worker,
+            initargs=(pickle.dumps(self._stores),),
+        )
+
+    def stop_pricing_pool(self) -> None:
+        """
+        shut the worker processes down
+        :return:
+        :rtype:
+        """
+        if self._pricing_pool is not None:
+            self._pricing_pool.shutdown()
+            self._pricing_pool = None
+
+    def quote_jobs(
+        self,
+        jobs: Iterable[tuple[str, Basket]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> list[Receipt]:
+        """
+        quote many (store_name, basket) jobs, no stock is taken
+        baskets are sent to the pricing pool in chunks per store when it
+        is running, quoted here otherwise
+        :param jobs:
+        :type jobs:
+        :param chunk_size: most baskets in one worker job
+        :type chunk_size: int
+        :return: one receipt per job, in order
+        :rtype:
+        """
+        if not isinstance(chunk_size, int) or chunk_size < 1:
+            raise ValueError("Chunk size should be a positive integer")
+        by_store: dict[str, list] = {}
+        for position, (store_name, basket) in enumerate(jobs):
+            if store_name not in self._stores:
+                raise ValueError(f"Store {store_name} does not exist")
+            by_store.setdefault(store_name, []).append(
+                (position, list(basket))
+            )
+        chunks = []
+        for store_name, entries in by_store.items():
+            for start in range(0, len(entries), chunk_size):
+                end = start + chunk_size
+                chunks.append((store_name, entries[start:end]))
+        if self._pricing_pool is None:
+            results = [
+                self._stores[store_name].quote_orders(
+                    basket for _, basket in entries
+                )
+                for store_name, entries in chunks
+            ]
+        else:
+            results = self._pricing_pool.map(
+                _quote_in_worker,
+                [store_name for store_name, _ in chunks],
+                [[basket for _, basket in entries] for _, entries in chunks],
+            )
+        receipts = [None] * sum(len(entries) for _, entries in chunks)
+        for (_, entries), chunk_receipts in zip(chunks, results):
+            for (position, _), receipt in zip(entries, chunk_receipts):
+                receipts[position] = receipt
+        return receipts
+
+    def quote_in_all_stores(self, basket: Basket) -> dict[str, Receipt]:
+        """
+        price one basket in every store
+        :param basket:
+        :type basket:
+        :return: {store_name: receipt}
+        :rtype:
+        """
+        basket = list(basket)
+        store_names = list(self._stores)
+        receipts = self.quote_jobs(
+            (store_name, basket) for store_name in store_names
+        )
+        return dict(zip(store_names, receipts))
+
     def _add_store(self, store_name: str, new_store_instance: Store) -> None:
         if store_name in self.stores:
             print("Store name already exists!")
@@ -388,3 +1951,32 @@ class StoreManager:
             else:
                 print(f"Store {store_name} does not exist.")
                 return None  # Return None if the store doesn't exist
+
+
+# catalogs of a pricing worker process, loaded once when it starts
+_worker_stores: dict[str, Store] = {}
+
+
+def _warm_pricing_worker(pickled_stores: bytes) -> None:
+    """
+    initializer of the pricing pool processes
+    :param pickled_stores:
+    :type pickled_stores:
+    :return:
+    :rtype:
+    """
+    global _worker_stores
+    _worker_stores = pickle.loads(pickled_stores)
+
+
+def _quote_in_worker(store_name: str, baskets: list) -> list[Receipt]:
+    """
+    quote a chunk of baskets against the warmed catalog of a store
+    :param store_name:
+    :type store_name:
+    :param baskets:
+    :type baskets:
+    :return:
+    :rtype:
+    """
+    return _worker_stores[store_name].quote_orders(baskets)
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+from async_sessions import AsyncStoreFrontend
+from products import Product
+from promotions import SecondHalfPrice
+from store import Store, StoreManager
+
+
+@pytest.fixture
+def test_product_1():
+    return Product("MacBook Air M2", price=1450, quantity=100)
+
+
+@pytest.fixture
+def test_product_2():
+    return Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+
+
+@pytest.fixture
+def test_store(test_product_1, test_product_2):
+    return Store([test_product_1, test_product_2])
+
+
+def test_session_places_order(test_store, test_product_1):
+    test_product_1.add_promotion(SecondHalfPrice("Second Half Price!"))
+
+    async def shop():
+        async with AsyncStoreFrontend(test_store) as front_end:
+            session = front_end.open_session()
+            quote = await session.add_line("MacBook Air M2", 2)
+            await session.add_line("Bose QuietComfort Earbuds", 1)
+            return quote, await session.finalize()
+
+    quote, receipt = asyncio.run(shop())
+    assert quote == (2900, 2175)
+    assert receipt.total == 2175 + 250
+    assert test_product_1.product_quantity == 98
+
+
+def test_many_sessions_no_oversell(test_store, test_product_1):
+    async def shopper(front_end):
+        session = front_end.open_session()
+        await session.add_line("MacBook Air M2", 1)
+        await asyncio.sleep(0)
+        await session.add_line("Bose QuietComfort Earbuds", 1)
+        return await session.finalize()
+
+    async def shop():
+        async with AsyncStoreFrontend(test_store, batch_size=16) as front_end:
+            receipts = await asyncio.gather(
+                *(shopper(front_end) for _ in range(300))
+            )
+            return front_end, receipts
+
+    front_end, receipts = asyncio.run(shop())
+    filled = sum(
+        line.quantity
+        for receipt in receipts
+        for line in receipt.lines
+        if line.product_name == "MacBook Air M2"
+    )
+    assert filled == 100
+    assert test_product_1.product_quantity == 0
+    assert sum(len(receipt.rejected) for receipt in receipts) == 200
+    assert front_end.placed == 300
+    assert test_store.verify_aggregates()
+
+
+def test_add_line_validation(test_store):
+    async def shop():
+        async with AsyncStoreFrontend(test_store) as front_end:
+            session = front_end.open_session()
+            with pytest.raises(ValueError, match="Unknown product"):
+                await session.add_line("Unknown", 1)
+            with pytest.raises(
+                ValueError, match="Quantity should be a positive integer"
+            ):
+                await session.add_line("MacBook Air M2", 0)
+            await session.finalize()
+            with pytest.raises(
+                ValueError, match="Session is already finalized"
+            ):
+                await session.add_line("MacBook Air M2", 1)
+
+    asyncio.run(shop())
+
+
+def test_finalize_needs_running_front_end(test_store):
+    async def shop():
+        front_end = AsyncStoreFrontend(test_store)
+        session = front_end.open_session()
+        with pytest.raises(ValueError, match="Front end is not running"):
+            await session.finalize()
+
+    asyncio.run(shop())
+
+
+def test_finalize_retried_after_start(test_store, test_product_1):
+    async def shop():
+        front_end = AsyncStoreFrontend(test_store)
+        session = front_end.open_session()
+        await session.add_line("MacBook Air M2", 1)
+        with pytest.raises(ValueError, match="Front end is not running"):
+            await session.finalize()
+        assert session.is_open
+        async with front_end:
+            return await session.finalize()
+
+    receipt = asyncio.run(shop())
+    assert receipt.total == 1450
+    assert test_product_1.product_quantity == 99
+
+
+def test_finalize_refused_while_stopping(test_store, test_product_1):
+    async def shop():
+        async with AsyncStoreFrontend(test_store) as front_end:
+            session = front_end.open_session()
+            await session.add_line("MacBook Air M2", 1)
+            stopping = asyncio.create_task(front_end.stop())
+            # let stop() queue the end of the baskets
+            await asyncio.sleep(0)
+            with pytest.raises(ValueError, match="Front end is not running"):
+                await session.finalize()
+            await stopping
+            assert session.is_open
+
+    asyncio.run(shop())
+    assert test_product_1.product_quantity == 100
+
+
+def test_store_manager_sessions(test_store, test_product_2):
+    store_manager = StoreManager()
+    store_manager._add_store("Best Buy", test_store)
+
+    async def shop():
+        async with AsyncStoreFrontend(store_manager) as front_end:
+            with pytest.raises(ValueError, match="Store Other does not exist"):
+                front_end.open_session("Other")
+            session = front_end.open_session("Best Buy")
+            await session.add_line("Bose QuietComfort Earbuds", 5)
+            return await session.finalize()
+
+    receipt = asyncio.run(shop())
+    assert receipt.total == 1250
+    assert test_product_2.product_quantity == 495
+
+
+def test_invalid_front_end():
+    with pytest.raises(
+        ValueError, match="Front end needs a Store or a StoreManager"
+    ):
+        AsyncStoreFrontend("Best Buy")
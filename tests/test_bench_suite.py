@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+from benchmarks.suite import (
+    BENCHMARKS,
+    Regression,
+    compare,
+    main,
+    run_benchmark,
+    run_suite,
+)
+
+# tiny catalogs and one call per run, the tests check the plumbing
+SCALE = 0.001
+
+
+def results(scale=SCALE, **best):
+    return {
+        "scale": scale,
+        "results": {
+            name: {"best": seconds, "median": seconds}
+            for name, seconds in best.items()
+        },
+    }
+
+
+@pytest.fixture
+def test_baseline(tmp_path):
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(results(product_buy=1e-9)))
+    return path
+
+
+def test_hot_paths_covered():
+    for name in (
+        "product_buy",
+        "store_order",
+        "promotions_apply",
+        "catalog_render",
+    ):
+        assert name in BENCHMARKS
+
+
+@pytest.mark.parametrize("name", list(BENCHMARKS))
+def test_run_benchmark(name):
+    result = run_benchmark(name, scale=SCALE, repeat=2, number=1)
+    assert result["number"] == 1
+    assert result["repeat"] == 2
+    assert 0 < result["best"] <= result["median"]
+
+
+def test_store_order_prints_nothing(capsys):
+    run_benchmark("store_order", scale=SCALE, repeat=1, number=1)
+    assert capsys.readouterr().out == ""
+
+
+def test_run_suite_names():
+    document = run_suite(["product_buy"], scale=SCALE, repeat=1, number=1)
+    assert list(document["results"]) == ["product_buy"]
+    assert document["scale"] == SCALE
+    json.dumps(document)
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"names": ["nope"]}, "Unknown benchmark nope"),
+        ({"repeat": 0}, "Repeat should be a positive integer"),
+        ({"number": 0}, "Number should be a positive integer"),
+        ({"scale": 0}, "Scale should be positive"),
+    ],
+)
+def test_run_suite_invalid(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        run_suite(**kwargs)
+
+
+def test_compare():
+    baseline = results(a=1.0, b=1.0, c=1.0)
+    current = results(a=1.2, b=1.3, d=5.0)
+    assert compare(current, baseline, threshold=0.25) == [
+        Regression("b", 1.0, 1.3)
+    ]
+    assert compare(current, baseline, threshold=0.5) == []
+    assert compare(current, baseline, threshold=0.1)[0].name == "a"
+
+
+def test_compare_invalid():
+    with pytest.raises(ValueError, match="Threshold should not be negative"):
+        compare(results(), results(), threshold=-0.1)
+    with pytest.raises(ValueError, match="same scale"):
+        compare(results(), results(scale=1.0))
+
+
+def test_main_writes_json(tmp_path, capsys):
+    path = tmp_path / "results.json"
+    args = ["product_buy", "--scale", str(SCALE), "--repeat", "1"]
+    assert main([*args, "--number", "1", "--json", str(path)]) == 0
+    document = json.loads(path.read_text())
+    assert list(document["results"]) == ["product_buy"]
+    assert "product_buy" in capsys.readouterr().out
+
+
+def test_main_regression(test_baseline, capsys):
+    args = ["product_buy", "--scale", str(SCALE), "--repeat", "1"]
+    exit_code = main(
+        [*args, "--number", "1", "--baseline", str(test_baseline)]
+    )
+    assert exit_code == 1
+    assert "REGRESSION product_buy" in capsys.readouterr().out
+
+
+def test_main_within_threshold(test_baseline):
+    args = ["product_buy", "--scale", str(SCALE), "--repeat", "1"]
+    exit_code = main(
+        [
+            *args,
+            "--number",
+            "1",
+            "--baseline",
+            str(test_baseline),
+            "--threshold",
+            "1e12",
+        ]
+    )
+    assert exit_code == 0
+
+
+def test_main_scale_mismatch(test_baseline):
+    with pytest.raises(SystemExit):
+        main(["--baseline", str(test_baseline)])
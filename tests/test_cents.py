@@ -0,0 +1,226 @@
+from fractions import Fraction
+import random
+
+import pytest
+
+from cents import div_round, from_cents, percent_kept, to_cents
+from products import Product, NonStockedProducts
+from promotions import (
+    Promotions,
+    PercentDiscount,
+    SecondHalfPrice,
+    ThirdOneFree,
+)
+from store import Store
+
+SAMPLES = 20_000
+
+
+@pytest.fixture
+def test_promotion_shp():
+    return SecondHalfPrice("Second Half Price!")
+
+
+@pytest.fixture
+def test_promotion_tof():
+    return ThirdOneFree("Third One Free!")
+
+
+@pytest.fixture
+def test_promotion_pd():
+    return PercentDiscount("30% off!", percent=30)
+
+
+@pytest.fixture
+def test_products(test_promotion_shp, test_promotion_tof, test_promotion_pd):
+    macbook = Product("MacBook Air M2", price=1450.99, quantity=100)
+    macbook.add_promotion(test_promotion_shp)
+    earbuds = Product("Bose QuietComfort Earbuds", price=250.1, quantity=500)
+    earbuds.add_promotion(test_promotion_tof)
+    earbuds.add_promotion(test_promotion_pd)
+    pixel = Product("Google Pixel 7", price=0.1, quantity=250)
+    windows = NonStockedProducts("Windows License", price=125.35)
+    windows.add_promotion(test_promotion_pd)
+    return [macbook, earbuds, pixel, windows]
+
+
+def exact_total(promotion, total_cents, basket_quantity):
+    """the exact promoted total in cents, before rounding"""
+    if isinstance(promotion, SecondHalfPrice):
+        discounted = basket_quantity // 2
+        return Fraction(
+            total_cents * (2 * basket_quantity - discounted),
+            2 * basket_quantity,
+        )
+    if isinstance(promotion, ThirdOneFree):
+        free = basket_quantity // 3
+        return Fraction(
+            total_cents * (basket_quantity - free), basket_quantity
+        )
+    return total_cents * promotion._kept
+
+
+@pytest.mark.parametrize(
+    "amount, cents",
+    [(0, 0), (12, 1200), (0.1, 10), (1450.99, 145099), (250.1, 25010)],
+)
+def test_to_cents(amount, cents):
+    assert to_cents(amount) == cents
+
+
+def test_from_cents():
+    assert from_cents(145099) == 1450.99
+
+
+@pytest.mark.parametrize(
+    "numerator, denominator, quotient",
+    [(7, 2, 4), (5, 2, 2), (-5, 2, -2), (10, 4, 2), (11, 4, 3), (9, 3, 3)],
+)
+def test_div_round_half_even(numerator, denominator, quotient):
+    assert div_round(numerator, denominator) == quotient
+
+
+@pytest.mark.parametrize(
+    "percent, kept",
+    [
+        (30, Fraction(7, 10)),
+        (12.5, Fraction(7, 8)),
+        (0.1, Fraction(999, 1000)),
+    ],
+)
+def test_percent_kept(percent, kept):
+    assert percent_kept(percent) == kept
+
+
+@pytest.mark.parametrize(
+    "promotion",
+    [
+        SecondHalfPrice("Second Half Price!"),
+        ThirdOneFree("Third One Free!"),
+        PercentDiscount("30% off!", percent=30),
+        PercentDiscount("12.5% off!", percent=12.5),
+    ],
+)
+def test_equivalent_to_float_path(promotion):
+    rng = random.Random(1)
+    for _ in range(SAMPLES):
+        basket_quantity = rng.randint(1, 20)
+        total_cents = rng.randint(1, 100_000) * basket_quantity
+        exact = exact_total(promotion, total_cents, basket_quantity)
+        cents = promotion.apply_promotion_cents(total_cents, basket_quantity)
+        assert cents == round(exact)
+        float_cents = to_cents(
+            promotion.apply_promotion(from_cents(total_cents), basket_quantity)
+        )
+        # an exact half cent is rounded half to even in cents, the float
+        # path rounds whichever side of it the float landed on
+        if exact.denominator == 2:
+            assert abs(float_cents - cents) <= 1
+        else:
+            assert float_cents == cents
+
+
+def test_chain_equivalent_to_float_path(test_products):
+    rng = random.Random(2)
+    for _ in range(SAMPLES // 10):
+        product = rng.choice(test_products)
+        basket_quantity = rng.randint(1, 20)
+        subtotal, total = product.quote_cents(basket_quantity)
+        float_subtotal = product.price * basket_quantity
+        float_total = product.pricing(float_subtotal, basket_quantity)
+        assert subtotal == to_cents(float_subtotal)
+        assert abs(total - to_cents(float_total)) <= 1
+
+
+def test_price_cents(test_products):
+    assert [product.price_cents for product in test_products] == [
+        145099,
+        25010,
+        10,
+        12535,
+    ]
+
+
+def test_default_apply_promotion_cents():
+    class DoubleUp(Promotions):
+        def __str__(self):
+            return self.description
+
+        def apply_promotion(self, current_total, basket_quantity):
+            return current_total * 2
+
+    assert DoubleUp("Double!").apply_promotion_cents(1001, 1) == 2002
+
+
+def test_place_order_cents(test_products):
+    basket = [(product.name, 3) for product in test_products]
+    (float_receipt,) = Store(test_products).place_orders([basket])
+    store = Store(test_products)
+    store.cents_pricing = True
+    (receipt,) = store.place_orders([basket])
+    # 3 MacBooks at second half price cost exactly 3627.475, half to even
+    # makes it 3627.48 where the float path lands on 3627.47
+    assert [line.total_cents for line in receipt.lines] == [
+        362748,
+        35014,
+        30,
+        26324,
+    ]
+    assert [to_cents(line.total) for line in float_receipt.lines] == [
+        362747,
+        35014,
+        30,
+        26323,
+    ]
+    assert receipt.subtotal == round(float_receipt.subtotal, 2) == 5479.62
+    assert receipt.total == 4241.16
+    assert receipt.discount == 1238.46
+
+
+def test_subtotal_cents_exact(test_products):
+    windows = test_products[3]
+    windows.promotions = []
+    store = Store([windows])
+    store.cents_pricing = True
+    # far beyond the cents a float subtotal keeps
+    basket_quantity = 10**15 + 1
+    assert to_cents(windows.price * basket_quantity) != 12535 * basket_quantity
+    (receipt,) = store.place_orders([[(windows.name, basket_quantity)]])
+    assert receipt.lines[0].subtotal_cents == 12535 * basket_quantity
+    assert receipt.lines[0].total_cents == 12535 * basket_quantity
+
+
+def test_calc_subtotal_cents(test_products):
+    pixel = test_products[2]
+    store = Store([pixel])
+    assert store._calc_subtotal_cents(pixel, 3) == 30
+    assert pixel.product_quantity == 247
+    assert store._calc_subtotal_cents(pixel, 248) is None
+
+
+def test_no_drift(test_products):
+    pixel = test_products[2]
+    store = Store([pixel])
+    store.cents_pricing = True
+    (receipt,) = store.place_orders([[(pixel.name, 1)] * 10])
+    assert receipt.total == 1.0
+    (float_receipt,) = Store([pixel]).place_orders([[(pixel.name, 1)] * 10])
+    assert float_receipt.total != 1.0
+
+
+def test_order_cents(test_products, capsys):
+    pixel = test_products[2]
+    store = Store([pixel])
+    store.cents_pricing = True
+    assert store._order([(pixel, 1)] * 10) == 1.0
+    assert "Total: 1.0" in capsys.readouterr().out
+
+
+def test_quote_cents(test_products):
+    store = Store(test_products)
+    store.cents_pricing = True
+    assert store._quote(test_products[0], 2) == (2901.98, 2176.48)
+    assert store.quote_cache.quote_cents(test_products[0], 2) == (
+        290198,
+        217648,
+    )
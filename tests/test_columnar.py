@@ -0,0 +1,145 @@
+import pytest
+
+import columnar
+from columnar import ColumnarStore
+from products import Product, NonStockedProducts, LimitedProducts
+
+
+@pytest.fixture(params=["numpy", "stdlib"])
+def column_backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(columnar, "np", None)
+    return request.param
+
+
+@pytest.fixture
+def test_product_1():
+    return Product("MacBook Air M2", price=1450, quantity=100)
+
+
+@pytest.fixture
+def test_product_2():
+    return Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+
+
+@pytest.fixture
+def test_non_stock_product():
+    return NonStockedProducts(name="NonStockProduct", price=10.0)
+
+
+@pytest.fixture
+def test_limited_stock_product():
+    return LimitedProducts(name="LimitedProduct", price=10.0, quantity=10)
+
+
+@pytest.fixture
+def test_store(
+    test_product_1,
+    test_product_2,
+    test_non_stock_product,
+    test_limited_stock_product,
+):
+    return ColumnarStore(
+        [
+            test_product_1,
+            test_product_2,
+            test_non_stock_product,
+            test_limited_stock_product,
+        ]
+    )
+
+
+def test_total_quantity(column_backend, test_store):
+    assert test_store.get_total_quantity() == 610
+
+
+def test_inventory_value(column_backend, test_store):
+    assert test_store.get_inventory_value() == 1450 * 100 + 250 * 500 + 100
+
+
+def test_buy_writes_through(column_backend, test_store, test_product_1):
+    test_product_1.buy(40)
+    assert test_store.get_total_quantity() == 570
+
+
+def test_place_orders_writes_through(column_backend, test_store):
+    test_store.place_orders([[("Bose QuietComfort Earbuds", 100)]])
+    assert test_store.get_total_quantity() == 510
+
+
+def test_price_change_writes_through(
+    column_backend, test_store, test_product_2
+):
+    test_product_2.price = 100
+    assert test_store.get_inventory_value() == 1450 * 100 + 100 * 500 + 100
+
+
+def test_active_count(column_backend, test_store, test_product_1):
+    assert test_store.get_active_count() == 4
+    test_product_1.deactivate()
+    assert test_store.get_active_count() == 3
+
+
+def test_find_products(
+    column_backend,
+    test_store,
+    test_product_1,
+    test_product_2,
+    test_non_stock_product,
+    test_limited_stock_product,
+):
+    assert test_store.find_products(min_price=200, max_price=1000) == [
+        test_product_2
+    ]
+    test_limited_stock_product.deactivate()
+    assert test_store.find_products(active_only=True, in_stock_only=True) == [
+        test_product_1,
+        test_product_2,
+    ]
+    assert test_store.find_products(max_price=10) == [
+        test_non_stock_product,
+        test_limited_stock_product,
+    ]
+
+
+def test_remove_product_moves_last_row(
+    column_backend, test_store, test_product_1, test_limited_stock_product
+):
+    test_store.remove_product(test_product_1)
+    assert test_store.get_total_quantity() == 510
+    assert test_store.find_products(max_price=10) == [
+        test_limited_stock_product,
+        test_store.products[1],
+    ]
+    # removed products are no longer written through
+    test_product_1.product_quantity = 1
+    assert test_store.get_total_quantity() == 510
+
+
+def test_add_product(column_backend, test_store):
+    test_store.add_product(Product("Google Pixel 7", price=500, quantity=250))
+    assert test_store.get_total_quantity() == 860
+
+
+def test_products_setter_rebuilds_columns(
+    column_backend, test_store, test_product_1, test_product_2
+):
+    test_store.products = [test_product_2]
+    assert test_store.get_total_quantity() == 500
+    test_product_1.product_quantity = 1
+    assert test_store.get_total_quantity() == 500
+
+
+def test_bulk_add_remove(column_backend, test_store, test_product_1):
+    added = [
+        Product(f"Product {idx}", price=1 + idx, quantity=1)
+        for idx in range(5)
+    ]
+    test_store.add_products(added)
+    test_store.remove_products(added[:3] + [test_product_1])
+    # rows are not kept in listing order
+    found = test_store.find_products(min_price=1, max_price=5)
+    assert sorted(found, key=lambda product: product.price) == added[3:]
+    assert len(test_store._row_products) == len(test_store.products)
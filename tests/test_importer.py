@@ -0,0 +1,176 @@
+import json
+
+import pytest
+
+from importer import (
+    import_batches,
+    import_feed,
+    product_from_row,
+    read_csv,
+)
+from products import Product, NonStockedProducts, LimitedProducts
+from promotions import PercentDiscount, SecondHalfPrice
+from store import Store
+
+CSV_FEED = """name,price,quantity,kind,active,maximum,promotions
+MacBook Air M2,1450,100,,,,second_half_price:Second Half price!
+Windows License,125,,non_stocked,,,
+Shipping,10,250,limited,true,2,third_one_free:Third One Free!
+Google Pixel 7,500,250,product,no,,percent:30:30% off!|second_half_price:Second Half price!
+Broken,abc,1,,,,
+,10,1,,,,
+Pixel Case,20,1.5,,,,
+Earbuds,250,5,gadget,,,
+"""  # noqa E501
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text(CSV_FEED, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def jsonl_path(tmp_path):
+    rows = [
+        {"name": "MacBook Air M2", "price": 1450, "quantity": 100},
+        {
+            "name": "Google Pixel 7",
+            "price": 500.5,
+            "quantity": 250,
+            "promotions": [
+                {"type": "percent", "percent": 30, "description": "30%"}
+            ],
+        },
+        {"name": "Shipping", "price": 10, "quantity": 5, "kind": "limited"},
+        {"name": "Bad", "price": -1, "quantity": 5},
+    ]
+    lines = [json.dumps(row) for row in rows]
+    lines.insert(2, "{not json")
+    lines.insert(3, "")
+    path = tmp_path / "feed.jsonl"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_import_csv(csv_path):
+    store = Store()
+    report = import_feed(store, csv_path)
+    assert report.imported == 4
+    assert report.rejected == 4
+    assert [error.line for error in report.errors] == [6, 7, 8, 9]
+    assert report.errors[0].reason == "Price should be a number"
+    assert report.errors[1].reason == "Name should be a string and not empty"
+    assert report.errors[3].reason == "Unknown product kind gadget"
+    macbook, licence, shipping, pixel = store.products
+    assert type(licence) is NonStockedProducts
+    assert type(shipping) is LimitedProducts
+    assert shipping.maximum == 2
+    assert not pixel.is_active
+    # the same spec gives the same promotion object
+    assert macbook.promotions[0] is pixel.promotions[0]
+    assert pixel.pricing(1000, 2) == 525
+    assert store.get_total_quantity() == 600
+
+
+def test_import_jsonl(jsonl_path):
+    store = Store()
+    rejected = []
+    report = import_feed(store, jsonl_path, on_rejected=rejected.append)
+    assert report.imported == 3
+    assert [row.line for row in rejected] == [3, 6]
+    assert isinstance(store.products[1].promotions[0], PercentDiscount)
+    assert store.products[1].price == 500.5
+
+
+def test_max_errors(csv_path):
+    report = import_feed(Store(), csv_path, max_errors=1)
+    assert report.rejected == 4
+    assert len(report.errors) == 1
+
+
+def test_unknown_feed_format(tmp_path):
+    with pytest.raises(ValueError):
+        import_feed(Store(), str(tmp_path / "feed.xml"))
+
+
+def test_import_batches_are_streamed(csv_path):
+    with open(csv_path, newline="") as file:
+        batches = import_batches(read_csv(file), batch_size=3)
+        sizes = [
+            (len(batch.products), len(batch.rejected)) for batch in batches
+        ]
+    assert sizes == [(3, 0), (1, 2), (0, 2)]
+
+
+def test_import_batches_batch_size():
+    with pytest.raises(ValueError):
+        list(import_batches([], batch_size=0))
+
+
+def test_product_from_row_types():
+    product = product_from_row(
+        {"name": "MacBook", "price": "1450", "quantity": "100"}
+    )
+    assert type(product) is Product
+    assert product.product_quantity == 100
+    with pytest.raises(ValueError):
+        product_from_row({"name": "MacBook", "price": "nan", "quantity": 1})
+    with pytest.raises(ValueError):
+        product_from_row({"name": "MacBook", "price": 1, "quantity": True})
+    with pytest.raises(ValueError):
+        product_from_row(
+            {
+                "name": "MacBook",
+                "price": 1,
+                "quantity": 1,
+                "promotions": "percent:130:too much",
+            }
+        )
+    product = product_from_row(
+        {
+            "name": "MacBook",
+            "price": 1,
+            "quantity": 1,
+            "promotions": ["second_half_price"],
+        }
+    )
+    assert isinstance(product.promotions[0], SecondHalfPrice)
+    assert product.promotions[0].description is None
+
+
+@pytest.mark.parametrize("active", [True, False])
+def test_product_from_row_non_stocked(active):
+    product = product_from_row(
+        {
+            "name": "Windows License",
+            "price": 125,
+            "kind": "non_stocked",
+            "active": active,
+        }
+    )
+    assert type(product) is NonStockedProducts
+    assert product.is_active is active
+    assert product.product_quantity == 0
+
+
+def test_non_string_kind_rejected():
+    records = [
+        (1, '{"name": "MacBook", "price": 1, "quantity": 1, "kind": 5}'),
+        (2, '{"name": "MacBook", "price": 1, "quantity": 1}'),
+    ]
+    (batch,) = import_batches(records)
+    assert len(batch.products) == 1
+    assert batch.rejected[0].reason == "Unknown product kind 5"
+
+
+def test_huge_price_rejected():
+    price = "1" + "0" * 400
+    records = [
+        (1, f'{{"name": "MacBook", "price": {price}, "quantity": 1}}'),
+        (2, '{"name": "MacBook", "price": 1, "quantity": 1}'),
+    ]
+    (batch,) = import_batches(records)
+    assert len(batch.products) == 1
+    assert batch.rejected[0].reason == "Price should be a number"
@@ -0,0 +1,178 @@
+import io
+import json
+import os
+import signal
+
+import pytest
+
+import instrumentation
+from products import Product, NonStockedProducts, LimitedProducts
+from promotions import SecondHalfPrice
+from store import Store
+from ui_helpers import UIHelpers
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+@pytest.fixture
+def test_products():
+    macbook = Product("MacBook Air M2", price=1450, quantity=100)
+    macbook.add_promotion(SecondHalfPrice("Second Half Price!"))
+    return [
+        macbook,
+        NonStockedProducts("Windows License", price=125),
+        LimitedProducts("Shipping", price=10, quantity=250, maximum=1),
+    ]
+
+
+@pytest.fixture
+def test_store(test_products):
+    return Store(test_products)
+
+
+def order(store, products):
+    store._order(
+        [(products[0], 2), (products[1], 1), (products[2], 1)],
+    )
+
+
+def test_disabled_by_default(test_store, test_products, capsys):
+    order(test_store, test_products)
+    assert not instrumentation.is_enabled()
+    assert instrumentation.snapshot() == {}
+
+
+def test_stages(test_store, test_products, capsys):
+    instrumentation.enable()
+    order(test_store, test_products)
+    stages = instrumentation.snapshot()
+    assert stages["Store._order"]["calls"] == 1
+    assert stages["Store._find_product"]["calls"] == 3
+    assert stages["Store._calc_subtotal_stocked_product"]["calls"] == 1
+    assert stages["Store._calc_subtotal_non_stocked_product"]["calls"] == 1
+    assert stages["Store._calc_subtotal_limited_product"]["calls"] == 1
+    assert stages["QuoteCache.quote"]["calls"] == 3
+    assert stages["UIHelpers.print_shopping_confirmation"]["calls"] == 3
+    assert stages["UIHelpers.print_shopping_confirmation_start"]["calls"] == 1
+    assert stages["UIHelpers.print_shopping_confirmation_end"]["calls"] == 1
+    order_stats = stages["Store._order"]
+    assert order_stats["total"] >= stages["Store._find_product"]["total"]
+    assert order_stats["mean"] == order_stats["total"]
+    assert order_stats["max"] == order_stats["total"]
+
+
+def test_promotions_stage(test_store, test_products, capsys):
+    instrumentation.enable()
+    order(test_store, test_products)
+    stages = instrumentation.snapshot()
+    # only the MacBook line has a promotion, priced on the cache miss
+    assert stages["QuoteCache.quote"]["calls"] == 3
+    assert stages["Store._calc_any_promotions"]["calls"] == 1
+    order(test_store, test_products)
+    stages = instrumentation.snapshot()
+    assert stages["Store._calc_any_promotions"]["calls"] == 1
+    test_store.cents_pricing = True
+    order(test_store, test_products)
+    stages = instrumentation.snapshot()
+    assert stages["QuoteCache.quote_cents"]["calls"] == 3
+    assert stages["Store._calc_any_promotions_cents"]["calls"] == 1
+
+
+def test_disable_restores_originals(test_store, test_products, capsys):
+    originals = {
+        name: Store.__dict__[name] for name in ("_order", "_find_product")
+    }
+    printer = UIHelpers.__dict__["print_shopping_confirmation"]
+    instrumentation.enable()
+    instrumentation.enable()
+    assert Store.__dict__["_order"] is not originals["_order"]
+    instrumentation.disable()
+    for name, original in originals.items():
+        assert Store.__dict__[name] is original
+    assert UIHelpers.__dict__["print_shopping_confirmation"] is printer
+    order(test_store, test_products)
+    assert instrumentation.snapshot() == {}
+
+
+def test_static_methods_stay_static():
+    instrumentation.enable()
+    assert isinstance(
+        UIHelpers.__dict__["print_shopping_confirmation_start"], staticmethod
+    )
+
+
+def test_subclass_override(test_products, capsys):
+    class CountingStore(Store):
+        def _find_product(self, product):
+            return super()._find_product(product)
+
+    original = CountingStore.__dict__["_find_product"]
+    with instrumentation.instrumented():
+        order(CountingStore(test_products), test_products)
+    assert CountingStore.__dict__["_find_product"] is original
+    # the override and the Store method it calls
+    assert instrumentation.snapshot()["Store._find_product"]["calls"] == 6
+
+
+def test_instrumented_keeps_enabled():
+    instrumentation.enable()
+    with instrumentation.instrumented():
+        pass
+    assert instrumentation.is_enabled()
+
+
+def test_reset(test_store, test_products, capsys):
+    with instrumentation.instrumented():
+        order(test_store, test_products)
+    assert instrumentation.snapshot()
+    instrumentation.reset()
+    assert instrumentation.snapshot() == {}
+
+
+def test_dump(test_store, test_products, capsys):
+    with instrumentation.instrumented():
+        order(test_store, test_products)
+    file = io.StringIO()
+    text = instrumentation.dump(file)
+    assert file.getvalue() == text + "\n"
+    assert json.loads(text)["Store._order"]["calls"] == 1
+
+
+@pytest.mark.skipif(
+    not hasattr(signal, "SIGUSR1"), reason="no SIGUSR1 on this platform"
+)
+def test_dump_on_signal(test_store, test_products, capsys):
+    previous = signal.getsignal(signal.SIGUSR1)
+    file = io.StringIO()
+    try:
+        instrumentation.dump_on_signal(file=file)
+        with instrumentation.instrumented():
+            order(test_store, test_products)
+        os.kill(os.getpid(), signal.SIGUSR1)
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+    assert json.loads(file.getvalue())["Store._order"]["calls"] == 1
+
+
+@pytest.mark.skipif(
+    not hasattr(signal, "SIGUSR1"), reason="no SIGUSR1 on this platform"
+)
+def test_dump_on_signal_while_recording():
+    previous = signal.getsignal(signal.SIGUSR1)
+    file = io.StringIO()
+    try:
+        instrumentation.dump_on_signal(file=file)
+        # the signal arrives while the main thread holds the stats lock
+        with instrumentation.stats._lock:
+            os.kill(os.getpid(), signal.SIGUSR1)
+            instrumentation.stats.record("stage", 1.0)
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+    assert json.loads(file.getvalue()) == {}
+    assert instrumentation.snapshot()["stage"]["calls"] == 1
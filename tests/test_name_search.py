@@ -0,0 +1,93 @@
+import pytest
+
+from name_search import NameSearchIndex, name_words, word_grams
+from products import Product
+
+
+@pytest.fixture
+def catalog():
+    return [
+        Product("MacBook Air M2", price=1450, quantity=100),
+        Product("Bose QuietComfort Earbuds", price=250, quantity=500),
+        Product("Google Pixel 7", price=500, quantity=250),
+        Product("Magic Mouse", price=80, quantity=40),
+        Product("MacBook Pro 14", price=2000, quantity=10),
+    ]
+
+
+@pytest.fixture
+def name_index(catalog):
+    return NameSearchIndex(catalog)
+
+
+def names(products):
+    return [product.name for product in products]
+
+
+def test_name_words():
+    assert name_words("MacBook Air M2") == ("macbook", "air", "m2")
+    assert name_words("Bose-Bose earbuds") == ("bose", "earbuds")
+    assert word_grams("air") == {"$ai", "air", "ir$"}
+
+
+def test_prefix_search(name_index):
+    assert names(name_index.prefix_search("mac")) == [
+        "MacBook Air M2",
+        "MacBook Pro 14",
+    ]
+    # in the alphabetical order of the matched words
+    assert names(name_index.prefix_search("ma")) == [
+        "MacBook Air M2",
+        "MacBook Pro 14",
+        "Magic Mouse",
+    ]
+    assert names(name_index.prefix_search("AIR")) == ["MacBook Air M2"]
+    # every word of the query has to match
+    assert names(name_index.prefix_search("mac pro")) == ["MacBook Pro 14"]
+    assert names(name_index.prefix_search("m", limit=1)) == ["MacBook Air M2"]
+    assert names(name_index.prefix_search("1")) == ["MacBook Pro 14"]
+    assert name_index.prefix_search("iphone") == []
+    # a word without completions ends the search at once
+    assert name_index.prefix_search("mac iphone") == []
+    assert name_index.prefix_search("  ") == []
+
+
+def test_fuzzy_search(name_index):
+    assert names(name_index.fuzzy_search("macbok")) == [
+        "MacBook Air M2",
+        "MacBook Pro 14",
+    ]
+    assert names(name_index.fuzzy_search("pixle")) == ["Google Pixel 7"]
+    assert names(name_index.fuzzy_search("macbok pro")) == ["MacBook Pro 14"]
+    assert name_index.fuzzy_search("xyz") == []
+    # numbers are only found by prefix
+    assert name_index.fuzzy_search("15") == []
+
+
+def test_search_fills_with_fuzzy(name_index):
+    assert names(name_index.search("earbud")) == ["Bose QuietComfort Earbuds"]
+    assert names(name_index.search("googel")) == ["Google Pixel 7"]
+
+
+def test_add_discard_rename(name_index, catalog):
+    macbook_air, _, _, mouse, macbook_pro = catalog
+    name_index.discard(macbook_pro)
+    assert names(name_index.prefix_search("pro")) == []
+    assert name_index.fuzzy_search("pro") == []
+    assert name_index.prefix_search("mac") == [macbook_air]
+    mouse.name = "MacBook Charger"
+    name_index.rename(mouse)
+    assert name_index.prefix_search("magic") == []
+    assert name_index.prefix_search("macbook ch") == [mouse]
+    name_index.add(macbook_pro)
+    name_index.add(macbook_pro)
+    assert len(name_index) == 5
+    assert macbook_pro in name_index
+
+
+def test_discard_prunes_trie(catalog):
+    name_index = NameSearchIndex(catalog[:1])
+    name_index.discard(catalog[0])
+    assert name_index._trie == {}
+    assert name_index._grams == {}
+    assert len(name_index) == 0
@@ -1,3 +1,5 @@
+import pickle
+
 import pytest
 
 from products import Product, NonStockedProducts, LimitedProducts
@@ -324,3 +326,273 @@ def test_product_comparison_less_than(test_product_1, test_product_2):
     check if price product 1 > product 2"""
     # expected = True
     assert test_product_1 < test_product_2
+
+
+# tests for the compact representation
+def test_product_has_no_instance_dict(
+    test_product_1, test_non_stock_product, test_limited_stock
+):
+    for product in (
+        test_product_1,
+        test_non_stock_product,
+        test_limited_stock,
+    ):
+        assert not hasattr(product, "__dict__")
+
+
+def test_empty_promotions_are_shared_until_used(
+    test_product_1, test_product_2
+):
+    assert test_product_1._promotions is test_product_2._promotions
+    test_product_1.promotions.append("Second Half price!")
+    assert test_product_2.promotions == []
+    assert test_product_1._promotions is not test_product_2._promotions
+
+
+def test_add_promotion_does_not_leak(
+    test_product_1, test_product_2, test_shp_promotion
+):
+    test_product_1.add_promotion(test_shp_promotion)
+    assert test_product_2.promotions == []
+    assert str(test_product_2) == (
+        "Product2                       - 20.0   - 10    \n"
+    )
+
+
+def test_remove_promotion_from_shared_empty(
+    test_product_1, test_shp_promotion, capfd
+):
+    test_product_1.remove_promotion(test_shp_promotion)
+    captured = capfd.readouterr()
+    assert (
+        captured.out == f"Promotion was not applied to {test_product_1.name}\n"
+    )
+    assert test_product_1._promotions == ()
+
+
+def test_limited_product_keeps_maximum(test_limited_stock):
+    test_limited_stock.maximum = 3
+    assert "(Max per order:3)" in str(test_limited_stock)
+
+
+# tests for the compiled pricing callable
+def test_pricing_without_promotions(test_product_1):
+    assert test_product_1.pricing(100.0, 10) == 100.0
+
+
+def test_pricing_is_cached(test_product_1, test_shp_promotion):
+    test_product_1.add_promotion(test_shp_promotion)
+    assert test_product_1.pricing is test_product_1.pricing
+
+
+def test_pricing_matches_chain(test_product_1):
+    for promotion in (
+        PercentDiscount("30% off!", percent=30),
+        SecondHalfPrice("Second Half price!"),
+        ThirdOneFree("Third One Free!"),
+    ):
+        test_product_1.add_promotion(promotion)
+    expected = 100.0
+    for promotion in test_product_1.promotions:
+        expected = promotion.apply_promotion(expected, 10)
+    assert test_product_1.pricing(100.0, 10) == expected
+
+
+def test_pricing_invalidated_by_add_promotion(
+    test_product_1, test_shp_promotion
+):
+    assert test_product_1.pricing(20.0, 2) == 20.0
+    test_product_1.add_promotion(test_shp_promotion)
+    assert test_product_1.pricing(20.0, 2) == 15.0
+
+
+def test_pricing_invalidated_by_remove_promotion(
+    test_product_1, test_shp_promotion
+):
+    test_product_1.add_promotion(test_shp_promotion)
+    assert test_product_1.pricing(20.0, 2) == 15.0
+    test_product_1.remove_promotion(test_shp_promotion)
+    assert test_product_1.pricing(20.0, 2) == 20.0
+
+
+def test_pricing_invalidated_by_appending(test_product_1, test_shp_promotion):
+    assert test_product_1.pricing(20.0, 2) == 20.0
+    test_product_1.promotions.append(test_shp_promotion)
+    assert test_product_1.pricing(20.0, 2) == 15.0
+
+
+def test_pricing_invalidated_by_promotions_setter(
+    test_product_1, test_shp_promotion, test_percent_discount
+):
+    test_product_1.add_promotion(test_shp_promotion)
+    assert test_product_1.pricing(20.0, 2) == 15.0
+    test_product_1.promotions = [test_percent_discount]
+    assert test_product_1.pricing(20.0, 2) == 14.0
+
+
+def test_pricing_skips_non_promotions(test_product_1):
+    test_product_1.promotions = ["Second Half price!"]
+    assert test_product_1.pricing(20.0, 2) == 20.0
+
+
+# tests for the cached display line
+def test_display_is_cached(test_product_1):
+    assert str(test_product_1) is str(test_product_1)
+    assert test_product_1.show() is str(test_product_1)
+
+
+@pytest.mark.parametrize(
+    "change, expected",
+    [
+        (
+            lambda product: setattr(product, "name", "Renamed"),
+            "Renamed                        - 10.0   - 10    \n",
+        ),
+        (
+            lambda product: setattr(product, "price", 12.5),
+            "Product                        - 12.5   - 10    \n",
+        ),
+        (
+            lambda product: product.buy(3),
+            "Product                        - 10.0   - 7     \n",
+        ),
+        (
+            lambda product: setattr(product, "product_quantity", 4),
+            "Product                        - 10.0   - 4     \n",
+        ),
+        (
+            lambda product: product.add_promotion(
+                SecondHalfPrice("Second Half price!")
+            ),
+            "Product                        - 10.0   - 10    \n"
+            "Promotion: 02 Second Half price!",
+        ),
+    ],
+)
+def test_display_invalidated(test_product_1, change, expected):
+    str(test_product_1)
+    change(test_product_1)
+    assert str(test_product_1) == expected
+
+
+def test_display_invalidated_by_active_state(test_product_1):
+    cached = str(test_product_1)
+    test_product_1.deactivate()
+    assert test_product_1._display is None
+    assert str(test_product_1) == cached
+
+
+def test_display_invalidated_by_remove_promotion(test_product_1):
+    promotion = ThirdOneFree("Third One Free!")
+    test_product_1.add_promotion(promotion)
+    str(test_product_1)
+    test_product_1.remove_promotion(promotion)
+    assert str(test_product_1) == (
+        "Product                        - 10.0   - 10    \n"
+    )
+
+
+def test_display_invalidated_by_promotions_list(test_product_1):
+    str(test_product_1)
+    test_product_1.promotions.append("Third One Free!")
+    assert str(test_product_1).endswith("\nThird One Free!")
+
+
+def test_display_limited_maximum(test_limited_stock):
+    str(test_limited_stock)
+    test_limited_stock.maximum = 2
+    assert str(test_limited_stock).endswith("(Max per order:2)\n")
+
+
+def test_display_non_stocked_cached(test_non_stock_product):
+    assert str(test_non_stock_product) is test_non_stock_product.show()
+
+
+def test_pickle_drops_watchers_and_caches():
+    product = LimitedProducts("Shipping", price=10, quantity=5, maximum=2)
+    product.add_promotion(PercentDiscount("10% off!", 10))
+    product._watch(object())
+    str(product)
+    product.pricing
+    copy = pickle.loads(pickle.dumps(product))
+    assert copy._watchers == ()
+    assert copy._pricing is None
+    assert copy._display is None
+    assert copy.maximum == 2
+    assert copy.pricing(100, 1) == 90
+    assert str(copy) == str(product)
+
+
+class PromotionWatcher:
+    def __init__(self):
+        self.calls = []
+
+    def _product_promoted(self, product, added, removed):
+        self.calls.append((product, added, removed))
+
+
+def test_promotion_changes_are_watched(test_product_1):
+    watcher = PromotionWatcher()
+    test_product_1._watch(watcher)
+    shp = SecondHalfPrice("Second Half Price!")
+    tif = ThirdOneFree("Third One Free!")
+    test_product_1.add_promotion(shp)
+    test_product_1.add_promotion(shp)
+    test_product_1.promotions = [tif]
+    test_product_1.remove_promotion(tif)
+    assert watcher.calls == [
+        (test_product_1, (shp,), ()),
+        (test_product_1, (tif,), (shp,)),
+        (test_product_1, (), (tif,)),
+    ]
+
+
+def test_promotions_list_changes_are_watched(test_product_1):
+    watcher = PromotionWatcher()
+    test_product_1._watch(watcher)
+    shp = SecondHalfPrice("Second Half Price!")
+    tif = ThirdOneFree("Third One Free!")
+    test_product_1.promotions.append(shp)
+    test_product_1.promotions.extend([tif])
+    del test_product_1.promotions[0]
+    test_product_1.promotions.clear()
+    assert watcher.calls == [
+        (test_product_1, (shp,), ()),
+        (test_product_1, (tif,), ()),
+        (test_product_1, (), (shp,)),
+        (test_product_1, (), (tif,)),
+    ]
+
+
+def test_reading_promotions_keeps_caches(test_product_1, test_shp_promotion):
+    test_product_1.add_promotion(test_shp_promotion)
+    pricing = test_product_1.pricing
+    version = test_product_1._version
+    assert test_product_1.promotions == [test_shp_promotion]
+    assert test_product_1.pricing is pricing
+    assert test_product_1._version == version
+
+
+def test_promotions_setter_copies_list(
+    test_product_1, test_shp_promotion, test_percent_discount
+):
+    promotions = [test_shp_promotion]
+    test_product_1.promotions = promotions
+    promotions.append(test_percent_discount)
+    assert test_product_1.promotions == [test_shp_promotion]
+    # a list handed out before the setter no longer changes the product
+    old_promotions = test_product_1.promotions
+    test_product_1.promotions = []
+    version = test_product_1._version
+    old_promotions.append(test_percent_discount)
+    assert test_product_1.promotions == []
+    assert test_product_1._version == version
+
+
+def test_pickle_promotions_as_list(test_product_1, test_shp_promotion):
+    test_product_1.add_promotion(test_shp_promotion)
+    copy = pickle.loads(pickle.dumps(test_product_1))
+    assert type(copy._promotions) is list
+    copy.promotions.append(PercentDiscount("10% off!", 10))
+    assert copy.pricing(20.0, 2) == 13.5
+    assert test_product_1.pricing(20.0, 2) == 15.0
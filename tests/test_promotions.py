@@ -1,5 +1,8 @@
+import random
+
 import pytest
 
+import promotions
 from products import Product
 from promotions import SecondHalfPrice, ThirdOneFree, PercentDiscount
 
@@ -101,3 +104,122 @@ def test_promotion_percent_discount(test_product, test_percent_discount):
         current_price, basket_quantity
     )
     assert total == 70  # 10*10 = 100 - 100*(30/100)
+
+
+# tests for batch evaluation
+@pytest.fixture(params=["numpy", "stdlib"])
+def promotion_backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(promotions, "np", None)
+    return request.param
+
+
+@pytest.fixture
+def batch_pairs():
+    rng = random.Random(7)
+    quantities = [rng.randint(1, 60) for _ in range(5000)]
+    prices = [rng.randint(1, 200_000) / 100 for _ in range(5000)]
+    # prices that put the products of the promotion maths on .5 ties
+    prices[:6] = [0.05, 0.15, 1.005, 2.675, 0.35, 1.45]
+    totals = [price * qty for price, qty in zip(prices, quantities)]
+    return totals, quantities
+
+
+def test_batch_matches_scalar(
+    promotion_backend,
+    batch_pairs,
+    test_shp_promotion,
+    test_tof_promotion,
+    test_percent_discount,
+):
+    totals, quantities = batch_pairs
+    for promotion in (
+        test_shp_promotion,
+        test_tof_promotion,
+        test_percent_discount,
+    ):
+        expected = [
+            promotion.apply_promotion(total, qty)
+            for total, qty in zip(totals, quantities)
+        ]
+        actual = promotion.apply_promotion_batch(totals, quantities)
+        assert list(actual) == expected
+
+
+def test_batch_matches_scalar_large_totals(
+    promotion_backend,
+    test_shp_promotion,
+    test_tof_promotion,
+    test_percent_discount,
+):
+    rng = random.Random(11)
+    quantities = [rng.randint(1, 60) for _ in range(2000)]
+    # around and above 2**53 cents, where value * 100 has no fraction left
+    totals = [rng.uniform(5e13, 5e15) for _ in range(2000)]
+    for promotion in (
+        test_shp_promotion,
+        test_tof_promotion,
+        test_percent_discount,
+    ):
+        expected = [
+            promotion.apply_promotion(total, qty)
+            for total, qty in zip(totals, quantities)
+        ]
+        actual = promotion.apply_promotion_batch(totals, quantities)
+        assert list(actual) == expected
+
+
+def test_batch_chain_matches_scalar(
+    promotion_backend,
+    batch_pairs,
+    test_shp_promotion,
+    test_tof_promotion,
+    test_percent_discount,
+):
+    totals, quantities = batch_pairs
+    chain = [test_tof_promotion, test_shp_promotion, test_percent_discount]
+    expected = []
+    for total, qty in zip(totals, quantities):
+        for promotion in chain:
+            total = promotion.apply_promotion(total, qty)
+        expected.append(total)
+    actual = promotions.apply_promotions_batch(chain, totals, quantities)
+    assert list(actual) == expected
+
+
+def test_batch_chain_without_promotions(promotion_backend):
+    actual = promotions.apply_promotions_batch([], [10.0, 20.0], [1, 2])
+    assert list(actual) == [10.0, 20.0]
+
+
+class FlatOff(promotions.Promotions):
+    """a promotion without a batch version"""
+
+    def __str__(self):
+        return "Promotion: 04 flat off"
+
+    def apply_promotion(self, current_total, basket_quantity):
+        return current_total - 1
+
+
+@pytest.mark.parametrize("quantity", [0, -2])
+def test_batch_rejects_quantities_below_one(
+    promotion_backend,
+    quantity,
+    test_shp_promotion,
+    test_tof_promotion,
+    test_percent_discount,
+):
+    chain = [
+        test_shp_promotion,
+        test_tof_promotion,
+        test_percent_discount,
+        FlatOff(),
+    ]
+    for promotion in chain:
+        with pytest.raises(ValueError, match="Quantity should be a positive"):
+            promotion.apply_promotion_batch([10.0, 20.0], [1, quantity])
+    with pytest.raises(ValueError, match="Quantity should be a positive"):
+        promotions.apply_promotions_batch(chain, [10.0, 20.0], [1, quantity])
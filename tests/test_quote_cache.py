@@ -0,0 +1,168 @@
+import pytest
+
+from products import Product
+from promotions import SecondHalfPrice, PercentDiscount
+from quote_cache import QuoteCache
+from store import Store
+
+
+@pytest.fixture
+def test_product_1():
+    return Product("MacBook Air M2", price=1450, quantity=100)
+
+
+@pytest.fixture
+def test_product_2():
+    return Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+
+
+@pytest.fixture
+def test_promotion_shp():
+    return SecondHalfPrice("Second Half Price!")
+
+
+@pytest.fixture
+def test_cache():
+    return QuoteCache(maxsize=2)
+
+
+def test_invalid_maxsize():
+    with pytest.raises(
+        ValueError, match="Maxsize should be a positive integer"
+    ):
+        QuoteCache(maxsize=0)
+
+
+def test_quote(test_cache, test_product_1, test_promotion_shp):
+    test_product_1.add_promotion(test_promotion_shp)
+    assert test_cache.quote(test_product_1, 2) == (2900, 2175)
+
+
+def test_without_promotions_not_cached(test_cache, test_product_1):
+    assert test_cache.quote(test_product_1, 2) == (2900, 2900)
+    assert test_cache.stats()["misses"] == 0
+    assert len(test_cache) == 0
+
+
+def test_hit_and_miss(test_cache, test_product_1, test_promotion_shp):
+    test_product_1.add_promotion(test_promotion_shp)
+    test_cache.quote(test_product_1, 1)
+    test_cache.quote(test_product_1, 1)
+    test_cache.quote(test_product_1, 2)
+    assert test_cache.hits == 1
+    assert test_cache.misses == 2
+    assert len(test_cache) == 2
+
+
+def test_price_change_bumps_version(
+    test_cache, test_product_1, test_promotion_shp
+):
+    test_product_1.add_promotion(test_promotion_shp)
+    assert test_cache.quote(test_product_1, 2) == (2900, 2175)
+    test_product_1.price = 1000
+    assert test_cache.quote(test_product_1, 2) == (2000, 1500)
+    assert test_cache.hits == 0
+
+
+def test_promotion_change_bumps_version(
+    test_cache, test_product_1, test_promotion_shp
+):
+    assert test_cache.quote(test_product_1, 2) == (2900, 2900)
+    test_product_1.add_promotion(test_promotion_shp)
+    assert test_cache.quote(test_product_1, 2) == (2900, 2175)
+    test_product_1.promotions = [PercentDiscount("10% off!", percent=10)]
+    assert test_cache.quote(test_product_1, 2) == (2900, 2610)
+    test_product_1.remove_promotion(test_product_1.promotions[0])
+    assert test_cache.quote(test_product_1, 2) == (2900, 2900)
+    assert test_cache.hits == 0
+
+
+def test_lru_eviction(
+    test_cache, test_product_1, test_product_2, test_promotion_shp
+):
+    test_product_1.add_promotion(test_promotion_shp)
+    test_product_2.add_promotion(test_promotion_shp)
+    test_cache.quote(test_product_1, 1)
+    test_cache.quote(test_product_2, 1)
+    # touch product 1 so product 2 is the least recently used
+    test_cache.quote(test_product_1, 1)
+    test_cache.quote(test_product_1, 3)
+    assert test_cache.evictions == 1
+    test_cache.quote(test_product_1, 1)
+    test_cache.quote(test_product_2, 1)
+    assert test_cache.stats() == {
+        "hits": 2,
+        "misses": 4,
+        "evictions": 2,
+        "size": 2,
+        "maxsize": 2,
+    }
+
+
+def test_clear(test_cache, test_product_1, test_promotion_shp):
+    test_product_1.add_promotion(test_promotion_shp)
+    test_cache.quote(test_product_1, 1)
+    test_cache.clear()
+    assert len(test_cache) == 0
+    assert test_cache.stats()["misses"] == 0
+
+
+def test_store_uses_cache(test_product_1, test_promotion_shp):
+    test_store = Store([test_product_1])
+    test_product_1.add_promotion(test_promotion_shp)
+    receipts = test_store.place_orders([[("MacBook Air M2", 2)]] * 3)
+    assert [receipt.total for receipt in receipts] == [2175, 2175, 2175]
+    assert test_store.quote_cache.hits == 2
+    assert test_store.quote_cache.misses == 1
+
+
+def test_store_order_skips_unfilled_line(test_product_1, capfd):
+    test_store = Store([test_product_1])
+    assert test_store._order([(test_product_1, 101)]) == 0
+    assert test_product_1.product_quantity == 100
+
+
+def test_appending_promotion_invalidates(
+    test_cache, test_product_1, test_promotion_shp
+):
+    test_product_1.add_promotion(PercentDiscount("30% off!", percent=30))
+    assert test_cache.quote(test_product_1, 2) == (2900, 2030)
+    test_product_1.promotions.append(test_promotion_shp)
+    assert test_cache.quote(test_product_1, 2) == (2900, 1522.5)
+
+
+def test_subtotal_in_key(test_cache, test_product_1, test_promotion_shp):
+    test_product_1.add_promotion(test_promotion_shp)
+    assert test_cache.quote(test_product_1, 2) == (2900, 2175)
+    assert test_cache.quote(test_product_1, 2, 2000) == (2000, 1500)
+    assert test_cache.quote(test_product_1, 2, 2900) == (2900, 2175)
+    assert test_cache.quote_cents(test_product_1, 2, 200000) == (
+        200000,
+        150000,
+    )
+    assert test_cache.stats()["hits"] == 1
+
+
+def test_pricing(test_cache, test_product_1, test_promotion_shp):
+    test_product_1.add_promotion(test_promotion_shp)
+
+    def pricing(product, subtotal, basket_quantity):
+        return subtotal - basket_quantity
+
+    assert test_cache.quote(test_product_1, 2, pricing=pricing) == (
+        2900,
+        2898,
+    )
+    assert test_cache.quote_cents(test_product_1, 2, pricing=pricing) == (
+        290000,
+        289998,
+    )
+
+
+def test_reading_promotions_keeps_quotes(test_product_1, test_promotion_shp):
+    test_store = Store([test_product_1])
+    test_product_1.add_promotion(test_promotion_shp)
+    test_store.place_orders([[("MacBook Air M2", 2)]])
+    assert test_product_1.promotions == [test_promotion_shp]
+    test_store.place_orders([[("MacBook Air M2", 2)]])
+    assert test_store.quote_cache.hits == 1
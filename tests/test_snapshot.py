@@ -0,0 +1,147 @@
+import pickle
+
+import pytest
+
+import snapshot
+from products import Product, NonStockedProducts, LimitedProducts
+from promotions import SecondHalfPrice, PercentDiscount, ThirdOneFree
+from snapshot import SnapshotStore, save_snapshot
+from store import Store
+
+
+@pytest.fixture(params=["numpy", "stdlib"])
+def column_backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(snapshot, "np", None)
+    return request.param
+
+
+@pytest.fixture
+def catalog():
+    second_half_price = SecondHalfPrice("Second Half price!")
+    macbook = Product("MacBook Air M2", price=1450, quantity=100)
+    macbook.add_promotion(second_half_price)
+    pixel = Product("Google Pixel 7", price=500, quantity=250)
+    pixel.add_promotion(second_half_price)
+    pixel.add_promotion(PercentDiscount("30% off!", percent=30))
+    shipping = LimitedProducts("Shipping", price=10, quantity=1, maximum=2)
+    shipping.product_quantity = 0
+    shipping.add_promotion(ThirdOneFree(None))
+    return [
+        macbook,
+        pixel,
+        NonStockedProducts("Windows License", price=125),
+        shipping,
+        Product("Pixel Case", price=20, quantity=5, active=False),
+        Product("Google Pixel 7", price=450, quantity=1),
+    ]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, catalog):
+    path = str(tmp_path / "store.snap")
+    save_snapshot(Store(catalog), path)
+    return path
+
+
+def test_open_loads_nothing(snapshot_path, column_backend):
+    with SnapshotStore(snapshot_path) as store:
+        assert store._products == []
+        assert store.get_total_quantity() == 356
+        assert store.get_inventory_value() == 145000 + 125000 + 100 + 450
+        assert store.get_active_count() == 5
+        assert store.get_out_of_stock_count() == 1
+
+
+def test_lookup_loads_one_product(snapshot_path):
+    with SnapshotStore(snapshot_path) as store:
+        pixel = store._index.get("Google Pixel 7")
+        assert store._products == [pixel]
+        assert store._index.get("Google Pixel 7") is pixel
+        assert store._index.get("Google Pixel") is None
+        assert store._index.get("Unknown") is None
+        assert pixel.price == 500
+        assert pixel.pricing(1000, 2) == 525
+
+
+def test_load_all_keeps_order(snapshot_path, catalog):
+    with SnapshotStore(snapshot_path) as store:
+        store._index.get("Shipping")
+        products = store.products
+        assert [str(product) for product in products] == [
+            str(product) for product in catalog
+        ]
+        assert products[0].promotions[0] is products[1].promotions[0]
+        assert products[3].promotions[0].description is None
+        assert type(products[2]) is NonStockedProducts
+
+
+def test_duplicate_names_load_in_order(snapshot_path):
+    with SnapshotStore(snapshot_path) as store:
+        first = store._index["Google Pixel 7"]
+        store.remove_product(first)
+        assert store._index["Google Pixel 7"].price == 450
+
+
+def test_changes_write_through(snapshot_path, column_backend):
+    with SnapshotStore(snapshot_path) as store:
+        store.place_orders([[("MacBook Air M2", 2)]])
+        store._index["Pixel Case"].activate()
+        assert store.get_total_quantity() == 354
+        assert store.verify_aggregates()
+    # the file is only mapped as a copy
+    with SnapshotStore(snapshot_path) as store:
+        assert store.get_total_quantity() == 356
+
+
+def test_write_back(snapshot_path):
+    with SnapshotStore(snapshot_path, write_back=True) as store:
+        store.place_orders([[("MacBook Air M2", 2)]])
+        store.remove_product(store._index["Pixel Case"])
+    with SnapshotStore(snapshot_path) as store:
+        assert store.get_total_quantity() == 349
+        assert store._index.get("Pixel Case") is None
+        assert store._index["MacBook Air M2"].product_quantity == 98
+
+
+def test_add_product_stays_in_memory(snapshot_path, column_backend):
+    with SnapshotStore(snapshot_path) as store:
+        store.add_product(Product("Bose Earbuds", price=250, quantity=4))
+        assert store.get_total_quantity() == 360
+        assert store.verify_aggregates()
+        assert store.products[-1].name == "Bose Earbuds"
+
+
+def test_products_setter_replaces_catalog(snapshot_path, column_backend):
+    with SnapshotStore(snapshot_path) as store:
+        store.products = [Product("Pixel 8", price=700, quantity=3)]
+        assert store.get_total_quantity() == 3
+        assert store._index.get("MacBook Air M2") is None
+        assert store.verify_aggregates()
+
+
+def test_not_a_snapshot(tmp_path):
+    path = tmp_path / "store.snap"
+    path.write_bytes(b"not a snapshot" * 10)
+    with pytest.raises(ValueError):
+        SnapshotStore(str(path))
+
+
+# the sections end with at most 7 bytes of padding, every cut loses data
+@pytest.mark.parametrize("cut", [8, 13, 64])
+def test_truncated_snapshot(snapshot_path, cut):
+    with open(snapshot_path, "rb") as file:
+        data = file.read()
+    with open(snapshot_path, "wb") as file:
+        file.write(data[:-cut])
+    with pytest.raises(ValueError, match="File is not a store snapshot"):
+        SnapshotStore(snapshot_path)
+
+
+def test_pickles_as_store(snapshot_path):
+    with SnapshotStore(snapshot_path) as store:
+        copy = pickle.loads(pickle.dumps(store))
+    assert type(copy) is Store
+    assert len(copy.products) == 6
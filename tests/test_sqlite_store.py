@@ -0,0 +1,200 @@
+import pickle
+
+import pytest
+
+from products import Product, NonStockedProducts, LimitedProducts
+from promotions import SecondHalfPrice, PercentDiscount
+from sqlite_store import SQLiteStore
+from store import Store
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "store.db")
+
+
+@pytest.fixture
+def catalog():
+    second_half_price = SecondHalfPrice("Second Half price!")
+    macbook = Product("MacBook Air M2", price=1450, quantity=100)
+    macbook.add_promotion(second_half_price)
+    pixel = Product("Google Pixel 7", price=500, quantity=250)
+    pixel.add_promotion(second_half_price)
+    pixel.add_promotion(PercentDiscount("30% off!", percent=30))
+    return [
+        macbook,
+        pixel,
+        NonStockedProducts("Windows License", price=125),
+        LimitedProducts("Shipping", price=10, quantity=250, maximum=1),
+    ]
+
+
+@pytest.fixture
+def saved_store(db_path, catalog):
+    with SQLiteStore(db_path) as store:
+        store.save_products(catalog)
+    return db_path
+
+
+def test_open_loads_nothing(saved_store):
+    with SQLiteStore(saved_store) as store:
+        assert store._products == []
+        assert store.get_total_quantity() == 600
+        assert store.get_inventory_value() == 145000 + 125000 + 2500
+        assert store.get_active_count() == 4
+        assert store.get_out_of_stock_count() == 0
+
+
+def test_lookup_loads_one_product(saved_store):
+    with SQLiteStore(saved_store) as store:
+        pixel = store._index.get("Google Pixel 7")
+        assert store._products == [pixel]
+        assert store._index.get("Google Pixel 7") is pixel
+        assert store._index.get("Unknown") is None
+        assert pixel.price == 500
+        assert [str(promotion) for promotion in pixel.promotions] == [
+            "Promotion: 02 Second Half price!",
+            "Promotion: 03 30% off!",
+        ]
+        assert pixel.pricing(1000, 2) == 525
+
+
+def test_shared_promotions_stay_shared(saved_store):
+    with SQLiteStore(saved_store) as store:
+        macbook, pixel = store.products[:2]
+        assert macbook.promotions[0] is pixel.promotions[0]
+
+
+def test_load_all_keeps_order(saved_store, catalog):
+    with SQLiteStore(saved_store) as store:
+        store._index.get("Shipping")
+        products = store.products
+        assert [product.name for product in products] == [
+            product.name for product in catalog
+        ]
+        assert type(products[2]) is NonStockedProducts
+        assert products[3].maximum == 1
+
+
+def test_orders_are_written_back(saved_store):
+    with SQLiteStore(saved_store, flush_every=10) as store:
+        (receipt,) = store.place_orders([[("MacBook Air M2", 2)]])
+        assert receipt.total == 2175
+        assert store.get_total_quantity() == 598
+        assert len(store._dirty) == 1
+    with SQLiteStore(saved_store) as store:
+        assert store.get_total_quantity() == 598
+        assert store._index["MacBook Air M2"].product_quantity == 98
+
+
+def test_changes_flush_in_batches(saved_store):
+    with SQLiteStore(saved_store, flush_every=2) as store:
+        store._index["MacBook Air M2"].price = 1000
+        assert len(store._dirty) == 1
+        store._index["Google Pixel 7"].deactivate()
+        assert not store._dirty
+        assert store.verify_aggregates()
+
+
+def test_changes_after_close_are_not_written(saved_store):
+    with SQLiteStore(saved_store, flush_every=1) as store:
+        macbook = store._index["MacBook Air M2"]
+    macbook.buy(1)
+    macbook.name = "MacBook Air M3"
+    store.close()
+    assert macbook.product_quantity == 99
+    with SQLiteStore(saved_store) as store:
+        assert store._index["MacBook Air M2"].product_quantity == 100
+
+
+def test_rename_is_written_back(saved_store):
+    with SQLiteStore(saved_store) as store:
+        store._index["Shipping"].name = "Express Shipping"
+        assert store._index.get("Shipping") is None
+    with SQLiteStore(saved_store) as store:
+        assert store._index.get("Shipping") is None
+        assert store._index["Express Shipping"].product_quantity == 250
+
+
+def test_add_remove_product(saved_store):
+    with SQLiteStore(saved_store) as store:
+        store.add_product(Product("Bose Earbuds", price=250, quantity=500))
+        store.remove_product(store._index["MacBook Air M2"])
+        assert store.get_total_quantity() == 1000
+        assert store.verify_aggregates()
+    with SQLiteStore(saved_store) as store:
+        assert [product.name for product in store.products] == [
+            "Google Pixel 7",
+            "Windows License",
+            "Shipping",
+            "Bose Earbuds",
+        ]
+
+
+def test_add_same_product_twice(db_path):
+    product = Product("MacBook Air M2", price=1450, quantity=100)
+    with SQLiteStore(db_path) as store:
+        store.add_product(product)
+        with pytest.raises(ValueError):
+            store.add_product(product)
+
+
+def test_save_writes_promotions(saved_store):
+    with SQLiteStore(saved_store) as store:
+        store._index["MacBook Air M2"].promotions = []
+        store._index["Shipping"].add_promotion(
+            PercentDiscount("10% off!", percent=10)
+        )
+        store.save()
+    with SQLiteStore(saved_store) as store:
+        assert store._index["MacBook Air M2"].promotions == []
+        assert store._index["Shipping"].pricing(100, 1) == 90
+
+
+def test_products_setter_replaces_catalog(saved_store):
+    with SQLiteStore(saved_store) as store:
+        store.products = [Product("Pixel 8", price=700, quantity=3)]
+        assert store.get_total_quantity() == 3
+    with SQLiteStore(saved_store) as store:
+        assert [product.name for product in store.products] == ["Pixel 8"]
+
+
+def test_pickles_as_store(saved_store):
+    with SQLiteStore(saved_store) as store:
+        copy = pickle.loads(pickle.dumps(store))
+    assert type(copy) is Store
+    assert len(copy.products) == 4
+    assert copy.get_total_quantity() == 600
+
+
+def test_promotion_queries_see_saved_products(db_path):
+    promotion = SecondHalfPrice("Second Half price!")
+    macbook = Product("MacBook Air M2", price=1450, quantity=100)
+    macbook.add_promotion(promotion)
+    pixel = Product("Google Pixel 7", price=500, quantity=250)
+    pixel.add_promotion(promotion)
+    with SQLiteStore(db_path) as store:
+        store.save_products([macbook])
+        assert [
+            product.name
+            for product in store.get_products_with_promotion(promotion)
+        ] == ["MacBook Air M2"]
+        store.save_products([pixel])
+        assert [
+            product.name
+            for product in store.get_products_with_promotion(promotion)
+        ] == ["MacBook Air M2", "Google Pixel 7"]
+        assert store.end_campaign(promotion) == 2
+        store.save()
+    with SQLiteStore(db_path) as store:
+        store.load_all()
+        assert all(not product.promotions for product in store.products)
+
+
+def test_price_queries_load_the_catalog(saved_store):
+    with SQLiteStore(saved_store) as store:
+        assert store.get_cheapest_products(1)[0].name == "Shipping"
+        store.save_products([Product("Cable", price=5, quantity=1)])
+        assert store.get_cheapest_products(1)[0].name == "Cable"
+        store._index["MacBook Air M2"].price = 2000
+        assert store.get_most_expensive_products(1)[0].price == 2000
@@ -1,10 +1,14 @@
+import pickle
+import random
+import sys
+import threading
 from unittest.mock import patch
 
 import pytest
 
 from products import Product, NonStockedProducts, LimitedProducts
 from promotions import SecondHalfPrice, ThirdOneFree, PercentDiscount
-from store import Store, StoreManager
+from store import Store, StoreManager, StoreView
 
 
 @pytest.fixture
@@ -250,3 +254,990 @@ def test_add_two_stores(test_store, test_product_1, test_product_2):
     expected_products = [test_product_1, test_product_2]
     assert isinstance(combined_store, Store)
     assert combined_store.products == expected_products
+
+
+# tests for the name index
+def test__find_product_after_first(test_store, test_product_1, test_product_2):
+    test_store.add_product(test_product_1)
+    test_store.add_product(test_product_2)
+    assert test_store._find_product(test_product_2) is test_product_2
+
+
+def test_contains_uses_index(test_store, test_product_1, test_product_2):
+    test_store.add_product(test_product_1)
+    assert test_product_1 in test_store
+    assert test_product_2 not in test_store
+    assert "MacBook Air M2" not in test_store
+
+
+def test_remove_product_updates_index(test_store, test_product_1):
+    test_store.add_product(test_product_1)
+    test_store.remove_product(test_product_1)
+    assert test_product_1 not in test_store
+    assert test_store._find_product(test_product_1) is None
+
+
+def test_remove_product_duplicate_name_takes_over(test_store, test_product_1):
+    duplicate = Product("MacBook Air M2", price=1500, quantity=5)
+    test_store.add_product(test_product_1)
+    test_store.add_product(duplicate)
+    assert test_store._find_product(duplicate) is test_product_1
+    assert duplicate in test_store
+    test_store.remove_product(test_product_1)
+    assert test_store._find_product(test_product_1) is duplicate
+
+
+def test_products_setter_rebuilds_index(
+    test_store, test_product_1, test_product_2
+):
+    test_store.products = [test_product_1, test_product_2]
+    assert test_store._find_product(test_product_2) is test_product_2
+
+
+def test_add_stores_builds_index(test_product_1, test_product_2):
+    combined_store = Store([test_product_1]) + Store([test_product_2])
+    assert test_product_1 in combined_store
+    assert combined_store._find_product(test_product_2) is test_product_2
+
+
+def test_order_second_product(test_store, test_product_1, test_product_2):
+    test_store.add_product(test_product_1)
+    test_store.add_product(test_product_2)
+    total = test_store._order([(test_product_2, 2)])
+    assert total == 500
+    assert test_product_2.product_quantity == 498
+
+
+# tests for batch orders
+def test_place_orders(test_store, test_product_1, test_product_2):
+    test_store.add_product(test_product_1)
+    test_store.add_product(test_product_2)
+    receipts = test_store.place_orders(
+        [
+            [("MacBook Air M2", 2), ("Bose QuietComfort Earbuds", 1)],
+            [("Bose QuietComfort Earbuds", 3)],
+        ]
+    )
+    assert len(receipts) == 2
+    assert [line.subtotal for line in receipts[0].lines] == [2900, 250]
+    assert receipts[0].total == 3150
+    assert receipts[1].total == 750
+    assert test_product_1.product_quantity == 98
+    assert test_product_2.product_quantity == 496
+
+
+def test_place_orders_applies_promotions(
+    test_store, test_product_1, test_promotion_shp
+):
+    test_store.add_product(test_product_1)
+    test_product_1.add_promotion(test_promotion_shp)
+    (receipt,) = test_store.place_orders([[("MacBook Air M2", 2)]])
+    line = receipt.lines[0]
+    assert line.subtotal == 2900
+    assert line.total == 2175
+    assert line.discount == 725
+    assert receipt.discount == 725
+
+
+def test_place_orders_rejects_without_printing(
+    test_store, test_product_1, test_limited_stock_product, capfd
+):
+    test_store.add_product(test_product_1)
+    test_store.add_product(test_limited_stock_product)
+    (receipt,) = test_store.place_orders(
+        [
+            [
+                ("Unknown", 1),
+                ("MacBook Air M2", 101),
+                ("LimitedProduct", 2),
+                ("MacBook Air M2", 1),
+            ]
+        ]
+    )
+    assert capfd.readouterr().out == ""
+    assert [line.product_name for line in receipt.lines] == ["MacBook Air M2"]
+    assert [rejected.product_name for rejected in receipt.rejected] == [
+        "Unknown",
+        "MacBook Air M2",
+        "LimitedProduct",
+    ]
+    assert receipt.rejected[0].reason == "Unknown product"
+    assert test_product_1.product_quantity == 99
+    assert test_limited_stock_product.product_quantity == 10
+
+
+def test_place_orders_non_stocked(test_store, test_non_stock_product):
+    test_store.add_product(test_non_stock_product)
+    (receipt,) = test_store.place_orders([[("NonStockProduct", 5)]])
+    assert receipt.total == 50
+    assert receipt.rejected == []
+
+
+# tests for the paged order prompt
+@patch("builtins.input", side_effect=["n", "22", "1", ""])
+def test_make_an_order_shows_one_page(mock_input, test_store, capfd):
+    products = [
+        Product(f"Product {idx}", price=10, quantity=5) for idx in range(30)
+    ]
+    test_store.products = products
+    shopping_list = test_store.make_an_order()
+    assert shopping_list == [(products[21], 1)]
+    out = capfd.readouterr().out
+    assert "All products in store" not in out
+    assert "(page 1 of 2)" in out
+    assert "(page 2 of 2)" in out
+    assert products[21].product_quantity == 4
+
+
+# tests for the running aggregates
+@pytest.fixture
+def stocked_store(
+    test_product_1,
+    test_product_2,
+    test_non_stock_product,
+    test_limited_stock_product,
+):
+    return Store(
+        [
+            test_product_1,
+            test_product_2,
+            test_non_stock_product,
+            test_limited_stock_product,
+        ]
+    )
+
+
+def test_aggregates(stocked_store):
+    assert stocked_store.get_total_quantity() == 610
+    assert stocked_store.get_inventory_value() == 145000 + 125000 + 100
+    assert stocked_store.get_active_count() == 4
+    assert stocked_store.get_out_of_stock_count() == 0
+    assert stocked_store.verify_aggregates()
+
+
+def test_aggregates_follow_buy(stocked_store, test_limited_stock_product):
+    test_limited_stock_product.buy(10)
+    assert stocked_store.get_total_quantity() == 600
+    assert stocked_store.get_out_of_stock_count() == 1
+    assert stocked_store.verify_aggregates()
+
+
+def test_aggregates_follow_setters(
+    stocked_store, test_product_1, test_product_2
+):
+    test_product_1.product_quantity = 0
+    test_product_2.price = 100
+    test_product_2.deactivate()
+    assert stocked_store.get_total_quantity() == 510
+    assert stocked_store.get_inventory_value() == 50000 + 100
+    assert stocked_store.get_active_count() == 3
+    assert stocked_store.get_out_of_stock_count() == 1
+    assert stocked_store.verify_aggregates()
+
+
+def test_aggregates_follow_orders(stocked_store):
+    stocked_store.place_orders([[("MacBook Air M2", 100)]])
+    stocked_store._order([(stocked_store.products[1], 10)])
+    assert stocked_store.get_total_quantity() == 500
+    assert stocked_store.get_out_of_stock_count() == 1
+    assert stocked_store.verify_aggregates()
+
+
+def test_aggregates_follow_add_remove(stocked_store, test_product_1):
+    stocked_store.remove_product(test_product_1)
+    # removed products no longer count
+    test_product_1.product_quantity = 5
+    assert stocked_store.get_total_quantity() == 510
+    stocked_store.add_product(test_product_1)
+    assert stocked_store.get_total_quantity() == 515
+    assert stocked_store.verify_aggregates()
+
+
+def test_aggregates_follow_products_setter(
+    stocked_store, test_product_1, test_product_2
+):
+    stocked_store.products = [test_product_2]
+    test_product_1.product_quantity = 1
+    assert stocked_store.get_total_quantity() == 500
+    assert stocked_store.verify_aggregates()
+
+
+def test_verify_aggregates_detects_drift(stocked_store, test_product_1):
+    # writing the private attribute skips the watchers
+    test_product_1._quantity = 1
+    assert not stocked_store.verify_aggregates()
+
+
+def test_rename_moves_index(stocked_store, test_product_1):
+    test_product_1.name = "MacBook Pro"
+    assert stocked_store._index.get("MacBook Pro") is test_product_1
+    assert "MacBook Air M2" not in stocked_store._index
+
+
+# tests for concurrent checkout
+@pytest.fixture
+def fast_thread_switching():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_place_orders_concurrent_no_oversell(
+    fast_thread_switching, test_store, test_product_1, test_product_2
+):
+    test_store.add_product(test_product_1)
+    test_store.add_product(test_product_2)
+    basket = [("MacBook Air M2", 1), ("Bose QuietComfort Earbuds", 3)]
+    receipts = []
+
+    def checkout():
+        receipts.extend(test_store.place_orders([basket] * 50))
+
+    threads = [threading.Thread(target=checkout) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    sold_1 = sum(
+        line.quantity
+        for receipt in receipts
+        for line in receipt.lines
+        if line.product_name == "MacBook Air M2"
+    )
+    sold_2 = sum(
+        line.quantity
+        for receipt in receipts
+        for line in receipt.lines
+        if line.product_name == "Bose QuietComfort Earbuds"
+    )
+    assert sold_1 == 100
+    assert test_product_1.product_quantity == 0
+    assert sold_2 == 498
+    assert test_product_2.product_quantity == 2
+    assert test_store.verify_aggregates()
+
+
+def test_buy_concurrent_no_oversell(fast_thread_switching, test_product_1):
+    bought = []
+
+    def buyer():
+        for _ in range(50):
+            try:
+                test_product_1.buy(1)
+                bought.append(1)
+            except ValueError:
+                pass
+
+    threads = [threading.Thread(target=buyer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(bought) == 100
+    assert test_product_1.product_quantity == 0
+
+
+def test_quote_orders_takes_no_stock(
+    stocked_store, test_product_1, test_promotion_shp
+):
+    test_product_1.add_promotion(test_promotion_shp)
+    (receipt,) = stocked_store.quote_orders(
+        [[("MacBook Air M2", 2), ("LimitedProduct", 2), ("Unknown", 1)]]
+    )
+    assert receipt.total == 2175
+    assert [line.product_name for line in receipt.rejected] == [
+        "LimitedProduct",
+        "Unknown",
+    ]
+    assert test_product_1.product_quantity == 100
+    assert stocked_store.get_total_quantity() == 610
+
+
+def test_store_pickle(stocked_store, test_product_1, test_promotion_shp):
+    test_product_1.add_promotion(test_promotion_shp)
+    copy = pickle.loads(pickle.dumps(stocked_store))
+    copied_product = copy.products[0]
+    assert copied_product is not test_product_1
+    assert copied_product.name == "MacBook Air M2"
+    assert copied_product.promotions[0].description == "Second Half Price!"
+    assert copy._index["MacBook Air M2"] is copied_product
+    # the copy watches its own products
+    copied_product.product_quantity = 0
+    assert copy.get_total_quantity() == 510
+    assert stocked_store.get_total_quantity() == 610
+    assert copy.verify_aggregates()
+
+
+@pytest.fixture
+def store_manager(test_product_1, test_product_2):
+    store_manager = StoreManager()
+    store_manager.stores = {
+        "Best Buy": Store([test_product_1, test_product_2]),
+        "Outlet": Store([Product("MacBook Air M2", price=1000, quantity=1)]),
+    }
+    yield store_manager
+    store_manager.stop_pricing_pool()
+
+
+def test_quote_in_all_stores(store_manager):
+    receipts = store_manager.quote_in_all_stores([("MacBook Air M2", 1)])
+    assert receipts["Best Buy"].total == 1450
+    assert receipts["Outlet"].total == 1000
+
+
+def test_quote_jobs_keeps_order(store_manager):
+    jobs = [
+        ("Outlet", [("MacBook Air M2", 2)]),
+        ("Best Buy", [("MacBook Air M2", 2)]),
+        ("Outlet", [("MacBook Air M2", 1)]),
+    ]
+    receipts = store_manager.quote_jobs(jobs, chunk_size=1)
+    assert [receipt.total for receipt in receipts] == [0, 2900, 1000]
+    assert len(receipts[0].rejected) == 1
+
+
+def test_quote_jobs_unknown_store(store_manager):
+    with pytest.raises(ValueError):
+        store_manager.quote_jobs([("Nowhere", [("MacBook Air M2", 1)])])
+
+
+def test_quote_jobs_in_pricing_pool(store_manager, test_product_1):
+    jobs = [
+        (store_name, [("MacBook Air M2", quantity)])
+        for quantity in range(1, 20)
+        for store_name in ("Best Buy", "Outlet")
+    ]
+    expected = store_manager.quote_jobs(jobs)
+    store_manager.start_pricing_pool(max_workers=2)
+    assert store_manager.quote_jobs(jobs, chunk_size=4) == expected
+    # workers quote the catalogs as they were when the pool started
+    test_product_1.product_quantity = 0
+    assert store_manager.quote_jobs(jobs) == expected
+
+
+@pytest.fixture
+def many_products():
+    return [
+        Product(f"Product {idx}", price=10, quantity=1 + idx)
+        for idx in range(10)
+    ]
+
+
+def test_add_products(test_store, many_products):
+    test_store.add_products(many_products)
+    assert test_store.products == many_products
+    assert test_store.get_total_quantity() == 55
+    assert test_store._find_product(many_products[3]) is many_products[3]
+    assert test_store.verify_aggregates()
+
+
+def test_add_products_rejects_all(test_store, many_products):
+    with pytest.raises(ValueError):
+        test_store.add_products(many_products + ["not a product"])
+    assert test_store.products == []
+
+
+def test_remove_products_keeps_order(test_store, many_products):
+    test_store.add_products(many_products)
+    products = test_store.products
+    test_store.remove_products(many_products[1:4])
+    test_store.remove_product(many_products[7])
+    assert test_store.products == [
+        many_products[idx] for idx in (0, 4, 5, 6, 8, 9)
+    ]
+    # the list handed out before the removals is left as it was
+    assert products == many_products
+    assert many_products[2] not in test_store
+    assert many_products[8] in test_store
+    assert test_store._find_product(many_products[2]) is None
+    assert test_store.get_total_quantity() == 55 - 2 - 3 - 4 - 8
+    assert test_store.verify_aggregates()
+
+
+def test_removal_keeps_caller_lists(many_products):
+    products = many_products[:3]
+    store = Store(products)
+    store.remove_product(many_products[0])
+    assert products == many_products[:3]
+    listed = store.get_all_products()
+    store.remove_product(many_products[1])
+    assert listed == many_products[1:3]
+    assert store.products == [many_products[2]]
+
+
+def test_remove_products_rejects_all(test_store, many_products):
+    test_store.add_products(many_products[:5])
+    with pytest.raises(ValueError):
+        test_store.remove_products(many_products[3:6])
+    with pytest.raises(ValueError):
+        test_store.remove_products([many_products[0], many_products[0]])
+    assert test_store.products == many_products[:5]
+
+
+def test_remove_products_listed_twice(test_store, test_product_1):
+    test_store.products = [test_product_1, test_product_1]
+    test_store.remove_product(test_product_1)
+    assert test_product_1 in test_store
+    assert test_store._find_product(test_product_1) is test_product_1
+    test_product_1.product_quantity = 10
+    assert test_store.get_total_quantity() == 10
+    test_store.remove_product(test_product_1)
+    assert test_store.products == []
+    assert test_store.get_total_quantity() == 0
+
+
+def test_make_an_order_numbers_after_removal(
+    test_store, test_product_1, test_product_2, many_products
+):
+    test_store.add_products([test_product_1] + many_products)
+    test_store.add_product(test_product_2)
+    test_store.remove_products(many_products)
+    with patch("builtins.input", side_effect=["2", "1", ""]):
+        shopping_list = test_store.make_an_order()
+    assert shopping_list == [(test_product_2, 1)]
+
+
+@pytest.fixture
+def combined_store(test_product_1, test_product_2, test_limited_stock_product):
+    store_1 = Store([test_product_1])
+    store_2 = Store([test_product_2, test_limited_stock_product])
+    return store_1 + store_2
+
+
+def test_combined_store_is_a_view(
+    combined_store, test_product_1, test_product_2, test_limited_stock_product
+):
+    assert isinstance(combined_store, StoreView)
+    assert len(combined_store.products) == 3
+    assert combined_store.products[1] is test_product_2
+    assert combined_store.products[-1] is test_limited_stock_product
+    assert combined_store.products[1:] == [
+        test_product_2,
+        test_limited_stock_product,
+    ]
+    assert list(combined_store.products) == [
+        test_product_1,
+        test_product_2,
+        test_limited_stock_product,
+    ]
+    with pytest.raises(IndexError):
+        combined_store.products[3]
+
+
+def test_combined_store_follows_sources(combined_store):
+    store_1, store_2 = combined_store.sources
+    pixel = Product("Google Pixel 7", price=500, quantity=250)
+    store_1.add_product(pixel)
+    assert combined_store.products[1] is pixel
+    assert combined_store._index.get("Google Pixel 7") is pixel
+    assert combined_store.get_total_quantity() == 860
+    assert combined_store.verify_aggregates()
+
+
+def test_combined_store_orders(combined_store, test_product_2):
+    (receipt,) = combined_store.place_orders(
+        [[("Bose QuietComfort Earbuds", 2), ("Unknown", 1)]]
+    )
+    assert receipt.total == 500
+    assert test_product_2.product_quantity == 498
+    assert combined_store.get_total_quantity() == 608
+
+
+def test_combined_store_is_read_only(combined_store, test_product_1):
+    with pytest.raises(ValueError):
+        combined_store.add_product(test_product_1)
+    with pytest.raises(ValueError):
+        combined_store.remove_product(test_product_1)
+    with pytest.raises(ValueError):
+        combined_store.products = []
+
+
+def test_combined_views_flatten(combined_store, test_product_1):
+    view = combined_store + Store([test_product_1])
+    assert len(view.sources) == 3
+    assert view.products[0] is view.products[3]
+
+
+def test_materialize(combined_store, test_product_1):
+    store = combined_store.materialize()
+    assert type(store) is Store
+    assert store.products == combined_store.products
+    store.remove_product(test_product_1)
+    assert len(combined_store.products) == 3
+
+
+def test_combined_store_pickle(combined_store):
+    copy = pickle.loads(pickle.dumps(combined_store))
+    assert isinstance(copy, StoreView)
+    assert copy.get_total_quantity() == 610
+
+
+@pytest.fixture
+def stores_to_merge(test_promotion_shp, test_promotion_pd):
+    macbook = Product("MacBook Air M2", price=1450, quantity=100)
+    macbook.add_promotion(test_promotion_shp)
+    cheap_macbook = Product("MacBook Air M2", price=1300, quantity=20)
+    cheap_macbook.add_promotion(test_promotion_pd)
+    cheap_macbook.add_promotion(test_promotion_shp)
+    cheap_macbook.deactivate()
+    licence = NonStockedProducts("Windows License", price=125)
+    store_1 = Store(
+        [macbook, licence, Product("Google Pixel 7", price=500, quantity=1)]
+    )
+    store_2 = Store(
+        [
+            Product("Bose Earbuds", price=250, quantity=500),
+            cheap_macbook,
+            Product("Windows License", price=100, quantity=5),
+        ]
+    )
+    return store_1, store_2
+
+
+def test_merge(stores_to_merge, test_promotion_shp, test_promotion_pd):
+    store_1, store_2 = stores_to_merge
+    merged = store_1.merge(store_2)
+    assert [product.name for product in merged.products] == [
+        "MacBook Air M2",
+        "Windows License",
+        "Google Pixel 7",
+        "Bose Earbuds",
+    ]
+    macbook, licence, _, _ = merged.products
+    assert macbook is not store_1.products[0]
+    assert macbook.price == 1300
+    assert macbook.product_quantity == 120
+    assert macbook.is_active
+    assert macbook.promotions == [test_promotion_shp, test_promotion_pd]
+    assert type(licence) is NonStockedProducts
+    assert licence.product_quantity == 0
+    assert merged.get_total_quantity() == 621
+    assert merged.verify_aggregates()
+    # the sources are not changed
+    assert store_1.products[0].product_quantity == 100
+    assert store_1.products[0].promotions == [test_promotion_shp]
+    assert len(store_2.products[1].promotions) == 2
+
+
+def test_merge_price_policies(stores_to_merge):
+    store_1, store_2 = stores_to_merge
+
+    def macbook_price(price_policy):
+        merged = store_1.merge(store_2, price_policy=price_policy)
+        return merged._index["MacBook Air M2"].price
+
+    assert macbook_price("max") == 1450
+    assert macbook_price("first") == 1450
+    assert macbook_price("last") == 1300
+    assert macbook_price(lambda kept, other: (kept + other) / 2) == 1375
+    with pytest.raises(ValueError):
+        macbook_price("cheapest")
+    with pytest.raises(ValueError):
+        macbook_price(lambda kept, other: 0)
+
+
+def test_merge_dedups_one_store(test_product_1):
+    store = Store(
+        [test_product_1, Product("MacBook Air M2", price=1400, quantity=1)]
+    )
+    merged = store.merge()
+    assert len(merged.products) == 1
+    assert merged._find_product(test_product_1).product_quantity == 101
+
+
+@patch("builtins.input", side_effect=["TestStore_1", "TestStore_2"])
+def test_add_two_stores_merge(mock_input, stores_to_merge):
+    store_manager = StoreManager()
+    store_manager.stores = dict(
+        zip(("TestStore_1", "TestStore_2"), stores_to_merge)
+    )
+    merged_name = store_manager.add_two_stores(merge=True)
+    assert merged_name == "TestStore_1_TestStore_2_merged"
+    assert len(store_manager.stores[merged_name].products) == 4
+
+
+@pytest.fixture
+def priced_store():
+    return Store(
+        [
+            Product(f"Product {price}", price=price, quantity=1)
+            for price in (40, 10, 30, 20, 30, 50)
+        ]
+    )
+
+
+def prices(products):
+    return [product.price for product in products]
+
+
+def test_price_queries(priced_store):
+    assert prices(priced_store.get_products_by_price(20, 40)) == [
+        20,
+        30,
+        30,
+        40,
+    ]
+    assert prices(priced_store.get_products_by_price(max_price=25)) == [
+        10,
+        20,
+    ]
+    assert prices(priced_store.get_products_by_price(min_price=45)) == [50]
+    assert priced_store.get_products_by_price(41, 49) == []
+    assert prices(priced_store.get_cheapest_products(3)) == [10, 20, 30]
+    assert prices(priced_store.get_most_expensive_products(2)) == [50, 40]
+    assert len(priced_store.get_cheapest_products(100)) == 6
+    assert priced_store.get_most_expensive_products(0) == []
+    # equal prices keep the store order
+    assert [
+        product.name for product in priced_store.get_products_by_price(30, 30)
+    ] == ["Product 30", "Product 30"]
+    with pytest.raises(ValueError):
+        priced_store.get_cheapest_products(-1)
+
+
+def test_price_queries_active_only(priced_store):
+    cheapest = priced_store.get_cheapest_products(1)[0]
+    cheapest.deactivate()
+    assert prices(priced_store.get_cheapest_products(2, active_only=True)) == [
+        20,
+        30,
+    ]
+    assert prices(
+        priced_store.get_products_by_price(max_price=20, active_only=True)
+    ) == [20]
+
+
+def test_price_index_follows_changes(priced_store, test_product_1):
+    priced_store.get_cheapest_products(1)
+    priced_store.add_product(Product("Cheap", price=5, quantity=1))
+    assert priced_store.get_cheapest_products(1)[0].name == "Cheap"
+    most_expensive = priced_store.get_most_expensive_products(1)[0]
+    priced_store.remove_product(most_expensive)
+    assert prices(priced_store.get_most_expensive_products(1)) == [40]
+    priced_store.products[0].price = 100
+    assert prices(priced_store.get_most_expensive_products(2)) == [100, 30]
+    # a stock change leaves the price index alone
+    priced_store.products[0].product_quantity = 10
+    assert prices(priced_store.get_most_expensive_products(1)) == [100]
+    priced_store.products = [test_product_1]
+    assert priced_store.get_cheapest_products(5) == [test_product_1]
+    assert pickle.loads(pickle.dumps(priced_store)).get_cheapest_products(1)
+
+
+def test_price_index_product_listed_twice(test_store, test_product_1):
+    test_store.add_products([test_product_1, test_product_1])
+    assert test_store.get_cheapest_products(5) == [test_product_1]
+    test_store.remove_product(test_product_1)
+    assert test_store.get_cheapest_products(5) == [test_product_1]
+    test_store.remove_product(test_product_1)
+    assert test_store.get_cheapest_products(5) == []
+
+
+def test_combined_store_price_queries(priced_store, test_product_1):
+    combined = priced_store + Store(
+        [test_product_1, Product("Cheap", price=5, quantity=1)]
+    )
+    assert prices(combined.get_cheapest_products(2)) == [5, 10]
+    assert prices(combined.get_most_expensive_products(2)) == [1450, 50]
+    assert prices(combined.get_products_by_price(30, 100)) == [
+        30,
+        30,
+        40,
+        50,
+    ]
+
+
+def test_price_index_small_buckets(monkeypatch):
+    monkeypatch.setattr("price_index.PRICE_BUCKET_SIZE", 2)
+    rng = random.Random(7)
+    products = [
+        Product(f"Product {idx}", price=rng.randrange(1, 20), quantity=1)
+        for idx in range(30)
+    ]
+    store = Store(products[:10])
+    store.get_cheapest_products(1)
+    store.add_products(products[10:])
+    for product in rng.sample(products, 20):
+        product.price = rng.randrange(1, 20)
+    store.remove_products(products[:5])
+    expected = sorted(store.products, key=lambda product: product.price)
+    assert prices(store.get_cheapest_products(100)) == prices(expected)
+    assert prices(store.get_most_expensive_products(7)) == prices(
+        expected[::-1][:7]
+    )
+    for low, high in ((1, 19), (5, 9), (3, 3), (0, 100), (12, 4)):
+        assert store.get_products_by_price(low, high) == [
+            product for product in expected if low <= product.price <= high
+        ]
+
+
+def test_search_products(stocked_store, test_product_1, test_product_2):
+    assert stocked_store.search_products("mac") == [test_product_1]
+    assert stocked_store.search_products("macbok") == [test_product_1]
+    assert stocked_store.search_products("macbok", fuzzy=False) == []
+    assert stocked_store.search_products("earbuds", limit=1) == [
+        test_product_2
+    ]
+    with pytest.raises(ValueError):
+        stocked_store.search_products("mac", limit=0)
+    with pytest.raises(ValueError):
+        stocked_store.search_products(None)
+
+
+def test_search_follows_changes(stocked_store, test_product_1):
+    stocked_store.search_products("mac")
+    pixel = Product("Google Pixel 7", price=500, quantity=250)
+    stocked_store.add_product(pixel)
+    assert stocked_store.search_products("pix") == [pixel]
+    stocked_store.remove_product(pixel)
+    assert stocked_store.search_products("pix") == []
+    test_product_1.name = "MacBook Pro 14"
+    assert stocked_store.search_products("pro") == [test_product_1]
+    assert stocked_store.search_products("air", fuzzy=False) == []
+
+
+@patch("builtins.input", side_effect=["pixel", "23", "2", ""])
+def test_make_an_order_searches_names(mock_input, test_store, capfd):
+    products = [
+        Product(f"Product {idx}", price=10, quantity=5) for idx in range(30)
+    ]
+    pixel = Product("Google Pixel 7", price=500, quantity=250)
+    test_store.products = products[:22] + [pixel] + products[22:]
+    shopping_list = test_store.make_an_order()
+    assert shopping_list == [(pixel, 2)]
+    out = capfd.readouterr().out
+    assert "Products matching 'pixel'" in out
+    assert "23: Google Pixel 7" in out
+
+
+def test_combined_store_search(combined_store, test_product_2):
+    assert combined_store.search_products("bose") == [test_product_2]
+    assert combined_store._product_number(test_product_2) == 2
+
+
+@pytest.fixture
+def campaign_store(test_product_1, test_product_2, test_limited_stock_product):
+    return Store([test_product_1, test_product_2, test_limited_stock_product])
+
+
+def test_products_with_promotion(
+    campaign_store, test_product_1, test_product_2, test_promotion_tif
+):
+    assert campaign_store.get_products_with_promotion(test_promotion_tif) == []
+    test_product_1.add_promotion(test_promotion_tif)
+    test_product_2.promotions = [test_promotion_tif]
+    assert campaign_store.get_products_with_promotion(test_promotion_tif) == [
+        test_product_1,
+        test_product_2,
+    ]
+    test_product_1.remove_promotion(test_promotion_tif)
+    assert campaign_store.get_products_with_promotion(test_promotion_tif) == [
+        test_product_2
+    ]
+    campaign_store.remove_product(test_product_2)
+    assert campaign_store.get_products_with_promotion(test_promotion_tif) == []
+    campaign_store.add_product(test_product_2)
+    assert campaign_store.get_products_with_promotion(test_promotion_tif) == [
+        test_product_2
+    ]
+    with pytest.raises(ValueError):
+        campaign_store.get_products_with_promotion("Third One Free!")
+
+
+def test_attach_detach_promotion(
+    campaign_store,
+    test_product_1,
+    test_product_2,
+    test_limited_stock_product,
+    test_promotion_shp,
+    capfd,
+):
+    test_product_1.add_promotion(test_promotion_shp)
+    capfd.readouterr()
+    attached = campaign_store.attach_promotion(
+        test_promotion_shp, [test_product_1, test_product_2]
+    )
+    assert attached == 1
+    assert capfd.readouterr().out == ""
+    assert test_product_2.promotions == [test_promotion_shp]
+    assert (
+        campaign_store.quote_orders([[("Bose QuietComfort Earbuds", 2)]])[
+            0
+        ].total
+        == 375
+    )
+    stranger = Product("Google Pixel 7", price=500, quantity=250)
+    with pytest.raises(ValueError):
+        campaign_store.attach_promotion(
+            test_promotion_shp, [test_limited_stock_product, stranger]
+        )
+    assert test_limited_stock_product.promotions == []
+    assert (
+        campaign_store.detach_promotion(test_promotion_shp, [test_product_1])
+        == 1
+    )
+    assert campaign_store.detach_promotion(test_promotion_shp) == 1
+    assert campaign_store.get_products_with_promotion(test_promotion_shp) == []
+    assert test_product_2.promotions == []
+
+
+def test_end_campaign(
+    campaign_store,
+    test_product_1,
+    test_product_2,
+    test_limited_stock_product,
+    test_promotion_shp,
+    test_promotion_pd,
+):
+    campaign_store.attach_promotion(
+        test_promotion_shp, [test_product_1, test_product_2]
+    )
+    campaign_store.attach_promotion(
+        test_promotion_pd, [test_product_2, test_limited_stock_product]
+    )
+    quoted = campaign_store.quote_orders([[("MacBook Air M2", 2)]])
+    assert quoted[0].total == 2175
+    assert (
+        campaign_store.end_campaign(test_promotion_shp, test_promotion_pd) == 3
+    )
+    for product in (
+        test_product_1,
+        test_product_2,
+        test_limited_stock_product,
+    ):
+        assert product.promotions == []
+    quoted = campaign_store.quote_orders([[("MacBook Air M2", 2)]])
+    assert quoted[0].total == 2900
+    assert campaign_store.end_campaign(test_promotion_shp) == 0
+
+
+def test_end_campaign_appended_promotions(
+    campaign_store, test_product_1, test_product_2, test_promotion_tif
+):
+    # the promotion index is built before the promotions are appended
+    assert campaign_store.get_products_with_promotion(test_promotion_tif) == []
+    test_product_1.promotions.append(test_promotion_tif)
+    test_product_2.promotions.extend([test_promotion_tif])
+    assert campaign_store.get_products_with_promotion(test_promotion_tif) == [
+        test_product_1,
+        test_product_2,
+    ]
+    assert campaign_store.end_campaign(test_promotion_tif) == 2
+    assert test_product_1.promotions == []
+    assert test_product_2.promotions == []
+    assert campaign_store.get_products_with_promotion(test_promotion_tif) == []
+
+
+def test_combined_store_promotions(
+    combined_store, test_product_1, test_product_2, test_promotion_tif
+):
+    combined_store.attach_promotion(
+        test_promotion_tif, [test_product_1, test_product_2]
+    )
+    assert combined_store.get_products_with_promotion(test_promotion_tif) == [
+        test_product_1,
+        test_product_2,
+    ]
+    assert combined_store.end_campaign(test_promotion_tif) == 2
+
+
+def test_end_campaign_is_atomic(fast_thread_switching, test_promotion_pd):
+    products = [
+        Product(f"Product {idx}", price=10, quantity=10_000)
+        for idx in range(20)
+    ]
+    store = Store(products)
+    store.attach_promotion(test_promotion_pd, products)
+    basket = [(product.name, 1) for product in products]
+    receipts = []
+
+    def checkout():
+        for _ in range(50):
+            receipts.extend(store.place_orders([basket]))
+
+    thread = threading.Thread(target=checkout)
+    thread.start()
+    store.end_campaign(test_promotion_pd)
+    thread.join()
+    # a basket is priced with the campaign on all lines or on none
+    for receipt in receipts:
+        assert len({line.total for line in receipt.lines}) == 1
+
+
+class MemberStore(Store):
+    """a store whose subtotal rule gives members 10% off stocked lines"""
+
+    def _calc_subtotal_stocked_product(self, found_product, basket_quantity):
+        subtotal = super()._calc_subtotal_stocked_product(
+            found_product, basket_quantity
+        )
+        return None if subtotal is None else subtotal * 0.9
+
+
+@pytest.mark.parametrize("cents_pricing", [False, True])
+def test_subtotal_override_used_by_order(
+    test_product_1, test_promotion_shp, cents_pricing, capsys
+):
+    test_product_1.add_promotion(test_promotion_shp)
+    store = MemberStore([test_product_1])
+    store.cents_pricing = cents_pricing
+    assert store._order([(test_product_1, 2)]) == 1957.5
+
+
+@pytest.mark.parametrize("cents_pricing", [False, True])
+def test_subtotal_override_used_by_place_orders(
+    test_product_1, test_product_2, test_promotion_shp, cents_pricing
+):
+    test_product_1.add_promotion(test_promotion_shp)
+    store = MemberStore([test_product_1, test_product_2])
+    store.cents_pricing = cents_pricing
+    (receipt,) = store.place_orders(
+        [[(test_product_1.name, 2), (test_product_2.name, 1)]]
+    )
+    assert [(line.subtotal, line.total) for line in receipt.lines] == [
+        (2610, 1957.5),
+        (225, 225),
+    ]
+    # a plain store quotes the same line from price * quantity
+    (receipt,) = Store([test_product_1]).place_orders(
+        [[(test_product_1.name, 2)]]
+    )
+    assert receipt.lines[0].total == 2175
+
+
+class GiveawayStore(Store):
+    """a store whose promotion rule gives every promoted line away"""
+
+    def _calc_any_promotions(
+        self, found_product, current_subtotal, basket_quantity
+    ):
+        return 0.0
+
+
+@pytest.mark.parametrize("cents_pricing", [False, True])
+def test_promotions_override_used_by_order(
+    test_product_1, test_product_2, test_promotion_shp, cents_pricing, capsys
+):
+    test_product_1.add_promotion(test_promotion_shp)
+    store = GiveawayStore([test_product_1, test_product_2])
+    store.cents_pricing = cents_pricing
+    assert store._order([(test_product_1, 2), (test_product_2, 1)]) == 250
+
+
+@pytest.mark.parametrize("cents_pricing", [False, True])
+def test_promotions_override_used_by_place_orders(
+    test_product_1, test_product_2, test_promotion_shp, cents_pricing
+):
+    test_product_1.add_promotion(test_promotion_shp)
+    store = GiveawayStore([test_product_1, test_product_2])
+    store.cents_pricing = cents_pricing
+    (receipt,) = store.place_orders(
+        [[(test_product_1.name, 2), (test_product_2.name, 1)]]
+    )
+    assert [(line.subtotal, line.total) for line in receipt.lines] == [
+        (2900, 0),
+        (250, 250),
+    ]
+    assert receipt.total == 250
@@ -1,5 +1,5 @@
 import pytest
-from ui_helpers import UIHelpers
+from ui_helpers import UIHelpers, ProductPager
 from store import Store
 from products import Product
 
@@ -61,3 +61,77 @@ def test_print_shopping_confirmation(capsys, test_product_1):
     captured = capsys.readouterr()
     expected_output = f"{test_product_1.name:<30}{test_product_1.price:>15.2f}{1:>6}{test_product_1.price * 1:>10.2f}\t\n"  # noqa E501
     assert captured.out == expected_output
+
+
+# tests for buffered and paged listings
+def test_print_all_products(capsys, test_product_1, test_product_2):
+    UIHelpers.print_all_products([test_product_1, test_product_2])
+    captured = capsys.readouterr()
+    rule = "-" * 80 + "\n"
+    expected_output = (
+        "\nAll products in store:\n"
+        + rule
+        + "Product".ljust(30)
+        + "Price".center(15)
+        + "Qty".center(6)
+        + "Sub-quantity".center(10)
+        + "\n"
+        + rule
+        + f"1: {test_product_1}\n"
+        + f"2: {test_product_2}\n"
+        + rule
+    )
+    assert captured.out == expected_output
+
+
+def test_page_count():
+    assert UIHelpers.page_count(0, 20) == 1
+    assert UIHelpers.page_count(20, 20) == 1
+    assert UIHelpers.page_count(21, 20) == 2
+
+
+@pytest.fixture
+def many_products():
+    return [
+        Product(f"Product {idx}", price=10, quantity=1) for idx in range(5)
+    ]
+
+
+def test_render_products_page(many_products):
+    page = UIHelpers.render_products_page(many_products, page=2, page_size=2)
+    assert page.startswith("\nProducts in store (page 2 of 3):\n")
+    assert f"3: {many_products[2]}\n" in page
+    assert f"4: {many_products[3]}\n" in page
+    assert "Product 1 " not in page
+    assert "Product 4 " not in page
+
+
+def test_render_products_page_out_of_range(many_products):
+    with pytest.raises(ValueError, match="Page should be between 1 and 3"):
+        UIHelpers.render_products_page(many_products, page=4, page_size=2)
+
+
+def test_print_products_page_single_write(capsys, many_products):
+    UIHelpers.print_products_page(many_products, page=3, page_size=2)
+    captured = capsys.readouterr()
+    assert captured.out == UIHelpers.render_products_page(
+        many_products, page=3, page_size=2
+    )
+
+
+def test_pager_moves(many_products):
+    pager = ProductPager(many_products, page_size=2)
+    assert pager.pages == 3
+    assert pager.previous_page() == 1
+    assert pager.next_page() == 2
+    assert pager.next_page() == 3
+    assert pager.next_page() == 3
+    assert pager.go_to_product(1) == 1
+    assert pager.go_to_product(4) == 2
+
+
+def test_pager_invalid_page_size(many_products):
+    with pytest.raises(
+        ValueError, match="Page size should be a positive integer"
+    ):
+        ProductPager(many_products, page_size=0)
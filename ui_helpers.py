@@ -2,8 +2,14 @@
 ui)helpers.py
 contains all the ui print methods fr displaying to the screen
 no inheritance or class related objects. Just in a lass to keep them organised
+listings are built in one buffer and written with a single write
 """
 
+# imports
+import sys
+
+PAGE_SIZE = 20
+
 
 class UIHelpers:
 
@@ -51,11 +57,119 @@ class UIHelpers:
         :return:
         :rtype:
         """
-        print("\nAll products in store:")
-        UIHelpers.print_shopping_confirmation_start()
-        for idx, product in enumerate(products):
-            print(f"{idx + 1}:", str(product))
-        UIHelpers.print_shopping_confirmation_end()
+        sys.stdout.write(
+            "\nAll products in store:\n" + UIHelpers.render_products(products)
+        )
+
+    @staticmethod
+    def render_products(products, start: int = 0) -> str:
+        """
+        build the product table in one buffer
+        :param products: the products to list
+        :type products:
+        :param start: index of the first product, used for the numbering
+        :type start: int
+        :return:
+        :rtype:
+        """
+        return UIHelpers.render_numbered_products(
+            enumerate(products, start + 1)
+        )
+
+    @staticmethod
+    def render_numbered_products(numbered_products) -> str:
+        """
+        build the product table in one buffer, for products that are not
+        numbered one after the other
+        :param numbered_products: (number, product) pairs
+        :type numbered_products:
+        :return:
+        :rtype:
+        """
+        rule = "-" * 80 + "\n"
+        lines = [
+            rule,
+            f"{'Product':<30}{'Price':^15}{'Qty':^6}{'Sub-quantity':^10}\n",
+            rule,
+        ]
+        lines.extend(
+            f"{number}: {product}\n" for number, product in numbered_products
+        )
+        lines.append(rule)
+        return "".join(lines)
+
+    @staticmethod
+    def print_search_results(query: str, numbered_products) -> None:
+        """
+        print the products found for a search, numbered like the listing
+        :param query:
+        :type query:
+        :param numbered_products: (number, product) pairs
+        :type numbered_products:
+        :return:
+        :rtype:
+        """
+        sys.stdout.write(
+            f"\nProducts matching {query!r}:\n"
+            + UIHelpers.render_numbered_products(numbered_products)
+        )
+
+    @staticmethod
+    def page_count(product_count: int, page_size: int = PAGE_SIZE) -> int:
+        """
+        number of pages for a listing, an empty listing still has one page
+        :param product_count:
+        :type product_count:
+        :param page_size:
+        :type page_size:
+        :return:
+        :rtype:
+        """
+        return max(1, -(-product_count // page_size))
+
+    @staticmethod
+    def render_products_page(
+        products, page: int = 1, page_size: int = PAGE_SIZE
+    ) -> str:
+        """
+        build one page of the product table, numbered like the full listing
+        :param products:
+        :type products:
+        :param page: 1 based page number
+        :type page: int
+        :param page_size:
+        :type page_size: int
+        :return:
+        :rtype:
+        """
+        pages = UIHelpers.page_count(len(products), page_size)
+        if not 1 <= page <= pages:
+            raise ValueError(f"Page should be between 1 and {pages}")
+        start = (page - 1) * page_size
+        end = start + page_size
+        return (
+            f"\nProducts in store (page {page} of {pages}):\n"
+            + UIHelpers.render_products(products[start:end], start)
+        )
+
+    @staticmethod
+    def print_products_page(
+        products, page: int = 1, page_size: int = PAGE_SIZE
+    ) -> None:
+        """
+        print one page of the product table with a single write
+        :param products:
+        :type products:
+        :param page:
+        :type page:
+        :param page_size:
+        :type page_size:
+        :return:
+        :rtype:
+        """
+        sys.stdout.write(
+            UIHelpers.render_products_page(products, page, page_size)
+        )
 
     @staticmethod
     def print_total_quantity(total: int) -> None:
@@ -83,3 +197,71 @@ class UIHelpers:
         print("Menu:")
         for key, value in menu.items():
             print(f"{key}: {value[0]}")
+
+
+class ProductPager:
+    """
+    cursor over a product listing, page by page
+    """
+
+    def __init__(self, products, page_size: int = PAGE_SIZE) -> None:
+        """
+        start on the first page
+        :param products:
+        :type products:
+        :param page_size:
+        :type page_size:
+        """
+        if not isinstance(page_size, int) or page_size < 1:
+            raise ValueError("Page size should be a positive integer")
+        self.products = products
+        self.page_size = page_size
+        self.page = 1
+
+    @property
+    def pages(self) -> int:
+        """
+        number of pages
+        :return:
+        :rtype:
+        """
+        return UIHelpers.page_count(len(self.products), self.page_size)
+
+    def next_page(self) -> int:
+        """
+        move to the next page, stays on the last page
+        :return: the current page
+        :rtype:
+        """
+        self.page = min(self.page + 1, self.pages)
+        return self.page
+
+    def previous_page(self) -> int:
+        """
+        move to the previous page, stays on the first page
+        :return: the current page
+        :rtype:
+        """
+        self.page = max(self.page - 1, 1)
+        return self.page
+
+    def go_to_product(self, product_number: int) -> int:
+        """
+        move to the page holding a 1 based product number
+        :param product_number:
+        :type product_number:
+        :return: the current page
+        :rtype:
+        """
+        page = (product_number - 1) // self.page_size + 1
+        self.page = min(max(page, 1), self.pages)
+        return self.page
+
+    def show(self) -> None:
+        """
+        print the current page
+        :return:
+        :rtype:
+        """
+        self.page = min(self.page, self.pages)
+        UIHelpers.print_products_page(self.products, self.page, self.page_size)